@@ -3,7 +3,22 @@ Primary celery module. Holds the celery app instance.
 """
 
 from celery import Celery
+from celery.signals import task_prerun, task_postrun
+
+from Knowledge_Database_App.storage import orm_core as orm
 
 
 celery_app = Celery("celery_app", broker="amqp://guest@localhost//")
 celery_app.config_from_object("Knowledge_Database_App.content.celery_config")
+
+
+@task_prerun.connect
+def begin_task_unit_of_work(**kwargs):
+    """Gives each task its own storage session and transaction."""
+    orm.begin_unit_of_work()
+
+
+@task_postrun.connect
+def end_task_unit_of_work(state=None, **kwargs):
+    """Commits the task's storage changes if it succeeded."""
+    orm.end_unit_of_work(commit=(state == "SUCCESS"))
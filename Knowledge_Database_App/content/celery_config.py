@@ -2,6 +2,8 @@
 Celery configuration settings.
 """
 
+from datetime import timedelta
+
 from kombu import Queue
 
 
@@ -17,9 +19,22 @@ CELERY_TRACK_STARTED = True
 # CELERY_IGNORE_RESULT = True
 CELERY_STORE_ERRORS_EVEN_IF_IGNORED = True
 
+# Periodic tasks, run by celery beat.
+CELERYBEAT_SCHEDULE = {
+    "sweep-edit-deadlines": {
+        "task": "edit.sweep_deadlines",
+        "schedule": timedelta(minutes=5),
+    },
+    "flush-index-outbox": {
+        "task": "index.flush_outbox",
+        "schedule": timedelta(seconds=5),
+    },
+}
+
 # List of modules to import when celery starts.
 CELERY_IMPORTS = ["Knowledge_Database_App.user.user",
-                  "Knowledge_Database_App.content.edit"]
+                  "Knowledge_Database_App.content.edit",
+                  "Knowledge_Database_App.search.index"]
 
 # TODO: Fix routing setup
 # Queue settings.
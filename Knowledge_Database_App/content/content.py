@@ -12,9 +12,10 @@ from Knowledge_Database_App.storage import (orm_core as orm,
                                             select_queries as select,
                                             action_queries as action)
 from Knowledge_Database_App.storage.exceptions import (
-    InputError, SelectError, MissingDataError)
+    InputError, MissingDataError)
 from Knowledge_Database_App import search as search_api
 from Knowledge_Database_App.search import index
+from . import redis_api
 from . import content_config as config
 from .exceptions import ApplicationError, ContentError
 
@@ -415,7 +416,8 @@ class Content:
 
     @classmethod
     def bulk_retrieve(cls, sort="created_at", content_part=None, user_id=None,
-                      page_num=0, return_count=False, ids_only=False):
+                      page_num=0, return_count=False, ids_only=False,
+                      after=None, return_cursor=False):
         """
         Args:
             sort: String, accepts 'created_at' or 'last_edited_at'.
@@ -426,8 +428,15 @@ class Content:
             page_num: Integer. Defaults to 0.
             return_count: Boolean. Defaults to False.
             ids_only: Boolean. Defaults to False.
+            after: String, an opaque page cursor returned by a previous
+                call with return_cursor=True; when given, page_num is
+                ignored and the page following the cursor is returned.
+                Defaults to None.
+            return_cursor: Boolean, also return the cursor of the next
+                page, or None if there is no next page. Defaults to False.
         Returns:
-            List of Content objects.
+            List of Content objects, or a tuple of the form
+            (content, cursor) if return_cursor is True.
         """
         if user_id is not None:
             try:
@@ -455,19 +464,37 @@ class Content:
                     return content
         else:
             try:
-                if page_num < 1:
-                    raise InputError("Invalid argument(s) provided.",
-                                     message="Invalid data provided.",
-                                     inputs={"page_num": page_num})
-                content_pieces = cls.storage_handler.call(
-                    select.get_content_pieces, sort=sort,
-                    content_part=content_part, page_num=page_num)
+                if after is not None:
+                    content_pieces = cls.storage_handler.call(
+                        select.get_content_pieces, sort=sort,
+                        content_part=content_part,
+                        after=select.decode_cursor(after))
+                else:
+                    if page_num < 1:
+                        raise InputError("Invalid argument(s) provided.",
+                                         message="Invalid data provided.",
+                                         inputs={"page_num": page_num})
+                    content_pieces = cls.storage_handler.call(
+                        select.get_content_pieces, sort=sort,
+                        content_part=content_part, page_num=page_num)
                 content = [Content(content_piece=content_piece)
                            for content_piece in content_pieces]
             except:
                 raise
             else:
-                return content
+                if not return_cursor:
+                    return content
+                if len(content) < 10:
+                    next_after = None
+                else:
+                    last_piece = content[-1]
+                    if sort == "created_at":
+                        sort_value = last_piece.timestamp
+                    else:
+                        sort_value = last_piece.last_edited_timestamp
+                    next_after = select.encode_cursor(
+                        (sort_value, last_piece.content_id))
+                return content, next_after
 
     @classmethod
     def get_parts(cls, content_part, page_num=None, per_page=None):
@@ -552,19 +579,34 @@ class Content:
                              inputs={"content_part": content_part})
 
     @classmethod
-    def filter_by(cls, content_part, part_string, page_num=1):
+    def filter_by(cls, content_part, part_string, page_num=1, after=None,
+                  return_cursor=False, cursor=False):
         """
         Args:
             content_part: String, accepts 'keyword', 'content_type',
                 'name', or 'citation'.
             part_string: String.
             page_num: Positive integer. Defaults to None.
+            after: String, an opaque page cursor returned by a previous
+                call with return_cursor=True; when given, page_num is
+                ignored and the page following the cursor is returned.
+                Defaults to None.
+            return_cursor: Boolean, also return the cursor of the next
+                page, or None if there is no next page or the page was
+                fetched by page_num. Defaults to False.
+            cursor: Boolean, fetch the first page in cursor mode, which
+                ignores page_num and issues a cursor for the next page.
+                Cursor pages are ranked without the rescoring of
+                page_num pages. Defaults to False.
         Returns:
-            Dictionary of results.
+            Dictionary of results, or a tuple of the form
+            (results, cursor) if return_cursor is True.
         """
+        cursor = cursor or after is not None
         try:
-            results = search_api.filter_by(content_part, part_string,
-                                           page_num=page_num)
+            results = search_api.filter_by(
+                content_part, part_string, page_num=page_num, cursor=cursor,
+                after=None if after is None else select.decode_cursor(after))
         except:
             raise
         else:
@@ -573,25 +615,59 @@ class Content:
                     del results["results"][i]["score"]
                 except KeyError:
                     pass
-            return results
+            return cls._search_page(results, return_cursor)
 
     @classmethod
-    def search(cls, query, page_num=1):
+    def search(cls, query, page_num=1, after=None, return_cursor=False,
+               cursor=False):
         """
         Args:
             query: String.
             page_num: Integer. Defaults to 1.
+            after: String, an opaque page cursor returned by a previous
+                call with return_cursor=True; when given, page_num is
+                ignored and the page following the cursor is returned.
+                Defaults to None.
+            return_cursor: Boolean, also return the cursor of the next
+                page, or None if there is no next page or the page was
+                fetched by page_num. Defaults to False.
+            cursor: Boolean, fetch the first page in cursor mode, which
+                ignores page_num and issues a cursor for the next page.
+                Cursor pages are ranked without the rescoring of
+                page_num pages. Defaults to False.
         Returns:
-            Dictionary of results.
+            Dictionary of results, or a tuple of the form
+            (results, cursor) if return_cursor is True.
         """
+        cursor = cursor or after is not None
         try:
-            results = search_api.search(query, page_num)
+            results = search_api.search(
+                query, page_num, cursor=cursor,
+                after=None if after is None else select.decode_cursor(after))
         except:
             raise
         else:
             for i in range(len(results["results"])):
                 del results["results"][i]["score"]
+            return cls._search_page(results, return_cursor)
+
+    @staticmethod
+    def _search_page(results, return_cursor):
+        """
+        Args:
+            results: Dictionary of search results, with an "after" key
+                if they were fetched in cursor mode.
+            return_cursor: Boolean.
+        Returns:
+            The results without their sort values, and the encoded
+            cursor of the next page if return_cursor is True.
+        """
+        sort_values = results.pop("after", None)
+        if not return_cursor:
             return results
+        next_after = (None if sort_values is None
+                      else select.encode_cursor(sort_values))
+        return results, next_after
 
     @classmethod
     def autocomplete(cls, content_part, query):
@@ -613,33 +689,12 @@ class Content:
         if self.stored:
             return
         else:
-            keywords_for_storage = []
-            for keyword_string in self.keywords:
-                try:
-                    keyword = self.storage_handler.call(select.get_keyword,
-                                                        keyword_string)
-                except SelectError:
-                    keyword = orm.Keyword(keyword=keyword_string,
-                                          timestamp=self.timestamp)
-                    keywords_for_storage.append(keyword)
-                except:
-                    raise
-                else:
-                    keywords_for_storage.append(keyword)
-            citations_for_storage = []
-            for citation_string in self.citations:
-                try:
-                    citation = self.storage_handler.call(select.get_citation,
-                                                         citation_string)
-                except SelectError:
-                    citation = orm.Citation(citation_text=citation_string,
-                                            timestamp=self.timestamp)
-                    citations_for_storage.append(citation)
-                except:
-                    raise
-                else:
-                    citations_for_storage.append(citation)
             try:
+                keywords_for_storage = self.storage_handler.call(
+                    action.store_keywords, self.keywords, self.timestamp)
+                citations_for_storage = self.storage_handler.call(
+                    action.store_citations, self.citations or [],
+                    self.timestamp)
                 content_id = self.storage_handler.call(
                     action.store_content_piece,
                     self.first_author.user_id,
@@ -653,15 +708,9 @@ class Content:
                     alternate_names=[name.storage_object
                                      for name in self.alternate_names],
                 )
-                index.index_content_piece(
-                    content_id,
-                    self.name.name,
-                    [name.name for name in self.alternate_names],
-                    self.text.text,
-                    self.content_type,
-                    self.keywords,
-                    self.citations if self.citations is not None else []
-                )
+                index.queue_update(content_id, ["all"])
+                orm.on_commit(
+                    lambda: redis_api.store_author_count(content_id, 1))
             except:
                 raise
             else:
@@ -689,8 +738,7 @@ class Content:
                 content_type = select.get_content_type(part_text)
                 cls.storage_handler.call(action.update_content_type,
                                           content_id, content_type)
-                index.update_content_piece(content_id, content_part,
-                    part_string=content_type.content_type)
+                index.queue_update(content_id, [content_part])
             except:
                 raise
         elif update_type == "add":
@@ -698,31 +746,20 @@ class Content:
                 if isinstance(part_text, orm.Name):
                     cls.storage_handler.call(action.store_content_part,
                                              part_text, content_id)
-                    index.add_to_content_piece(content_id, "alternate_name",
-                                               content_part.name)
+                    index.queue_update(content_id, ["alternate_name"])
                 elif content_part == "keyword" and part_text is not None:
-                    try:
-                        keyword = cls.storage_handler.call(
-                            select.get_keyword, part_text)
-                    except SelectError:
-                        keyword = orm.Keyword(keyword=part_text,
-                                              timestamp=timestamp)
+                    keyword = cls.storage_handler.call(
+                        action.store_keywords, [part_text], timestamp)[0]
                     cls.storage_handler.call(action.store_content_part,
                                              keyword, content_id)
-                    index.add_to_content_piece(content_id, content_part,
-                                               keyword.keyword)
+                    index.queue_update(content_id, [content_part])
                 elif content_part == "citation" and part_text is not None:
-                    try:
-                        citation = cls.storage_handler.call(
-                            select.get_citation, part_text)
-                    except SelectError:
-                        citation = orm.Citation(citation_text=part_text,
-                                                timestamp=timestamp)
+                    citation = cls.storage_handler.call(
+                        action.store_citations, [part_text], timestamp)[0]
                     cls.storage_handler.call(
                         action.store_content_part, citation, content_id,
                         edited_citations=edited_citations)
-                    index.add_to_content_piece(content_id, content_part,
-                                               citation.citation_text)
+                    index.queue_update(content_id, [content_part])
                 else:
                     raise InputError("Invalid argument(s) provided.",
                                      message="Invalid data provided.",
@@ -733,25 +770,10 @@ class Content:
             try:
                 cls.storage_handler.call(action.remove_content_part,
                                          content_id, part_id, content_part)
-                if content_part == "alternate_name":
-                    alternate_names = cls.storage_handler.call(
-                        select.get_alternate_names, content_id)
-                    alternate_names = [name.name for name in alternate_names]
-                    index.update_content_piece(content_id, content_part,
-                                               part_strings=alternate_names)
-                elif content_part == "keyword":
-                    keywords = cls.storage_handler.call(
-                        select.get_keywords, content_id)
-                    keywords = [keyword.keyword for keyword in keywords]
-                    index.update_content_piece(content_id, content_part,
-                                               part_strings=keywords)
-                elif content_part == "citation":
-                    citations = cls.storage_handler.call(
-                        select.get_citations, content_id)
-                    citations = [citation.citation_text
-                                 for citation in citations]
-                    index.update_content_piece(content_id, content_part,
-                                               part_strings=citations)
+                if (content_part == "alternate_name" or
+                        content_part == "keyword" or
+                        content_part == "citation"):
+                    index.queue_update(content_id, [content_part])
                 else:
                     raise InputError("Invalid argument(s) provided.",
                                      message="Invalid data provided.",
@@ -766,15 +788,9 @@ class Content:
                 elif content_part == "text":
                     cls.storage_handler.call(action.update_content_part,
                                              part_id, content_part, part_text)
-                if content_part == "name" or content_part == "text":
-                    index.update_content_piece(content_id, content_part,
-                                               part_string=part_text)
-                elif content_part == "alternate_name":
-                    alternate_names = cls.storage_handler.call(
-                        select.get_alternate_names, content_id)
-                    alternate_names = [name.name for name in alternate_names]
-                    index.update_content_piece(content_id, content_part,
-                                               part_strings=alternate_names)
+                if (content_part == "name" or content_part == "text" or
+                        content_part == "alternate_name"):
+                    index.queue_update(content_id, [content_part])
                 elif content_part == "keyword":
                     try:
                         cls.update(content_id, content_part, "remove", part_id)
@@ -782,11 +798,6 @@ class Content:
                         pass
                     cls.update(content_id, content_part,
                                "add", timestamp, part_text=part_text)
-                    keywords = cls.storage_handler.call(
-                        select.get_keywords, content_id)
-                    keywords = [keyword.keyword for keyword in keywords]
-                    index.update_content_piece(content_id, content_part,
-                                               part_strings=keywords)
                 elif content_part == "citation":
                     try:
                         cls.update(content_id, content_part, "remove", part_id)
@@ -806,12 +817,6 @@ class Content:
                                        previous_citation.citation_id)
                     cls.update(content_id, content_part, "add", timestamp,
                         part_text=part_text, edited_citations=edited_citations)
-                    citations = cls.storage_handler.call(
-                        select.get_citations, content_id)
-                    citations = [citation.citation_text
-                                 for citation in citations]
-                    index.update_content_piece(content_id, content_part,
-                                               part_strings=citations)
                 else:
                     raise InputError("Invalid argument(s) provided.",
                                      message="Invalid data provided.",
@@ -827,11 +832,11 @@ class Content:
         if not self.stored:
             return
         else:
-            deleted_timestamp = datetime.now()
+            deleted_timestamp = datetime.utcnow()
             try:
                 self.storage_handler.call(action.delete_content_piece,
                                           self.content_id, deleted_timestamp)
-                index.remove_content_piece(self.content_id)
+                index.queue_update(self.content_id, ["deleted"])
             except:
                 raise
             else:
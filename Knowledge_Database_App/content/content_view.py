@@ -69,13 +69,18 @@ class ContentView:
                 self.__dict__.update(self.content)
 
     @classmethod
-    def bulk_retrieve(cls, sort="created_at", content_part=None, page_num=0):
+    def bulk_retrieve(cls, sort="created_at", content_part=None, page_num=0,
+                      after=None, return_cursor=False):
         try:
             content = Content.bulk_retrieve(
-                sort=sort, content_part=content_part, page_num=page_num)
+                sort=sort, content_part=content_part, page_num=page_num,
+                after=after, return_cursor=return_cursor)
         except:
             raise
         else:
+            if return_cursor:
+                content, next_after = content
+                return [piece.json_ready for piece in content], next_after
             content = [piece.json_ready for piece in content]
             return content
 
@@ -128,31 +133,43 @@ class ContentView:
             return content_parts
 
     @classmethod
-    def search(cls, query, page_num=1):
+    def search(cls, query, page_num=1, after=None, return_cursor=False,
+               cursor=False):
         """
         Args:
             query: String.
             page_num: Integer. Defaults to 1.
+            after: String, a page cursor. Defaults to None.
+            return_cursor: Boolean. Defaults to False.
+            cursor: Boolean. Defaults to False.
         """
         try:
-            results = Content.search(query, page_num=page_num)
+            results = Content.search(query, page_num=page_num, after=after,
+                                     return_cursor=return_cursor,
+                                     cursor=cursor)
         except:
             raise
         else:
             return results
 
     @classmethod
-    def filter_by(cls, content_part, part_string, page_num=1):
+    def filter_by(cls, content_part, part_string, page_num=1, after=None,
+                  return_cursor=False, cursor=False):
         """
         Args:
             content_part: String, accepts 'keyword', 'content_type',
                 'name', or 'citation'.
             part_string: String.
             page_num: Integer. Defaults to 1.
+            after: String, a page cursor. Defaults to None.
+            return_cursor: Boolean. Defaults to False.
+            cursor: Boolean. Defaults to False.
         """
         try:
-            results = Content.filter_by(content_part, part_string, 
-                                        page_num=page_num)
+            results = Content.filter_by(content_part, part_string,
+                                        page_num=page_num, after=after,
+                                        return_cursor=return_cursor,
+                                        cursor=cursor)
         except:
             raise
         else:
@@ -182,85 +199,39 @@ class ContentView:
         # Retrieve activity info
         try:
             content_ids = Content.bulk_retrieve(user_id=user_id, ids_only=True)
-            content_names = Name.bulk_retrieve(content_ids)
-            validating_edits = Edit.bulk_retrieve(
-                "validating", content_ids=content_ids)
-            accepted_edits = Edit.bulk_retrieve(
-                "accepted", content_ids=content_ids)
-            rejected_edits = Edit.bulk_retrieve(
-                "rejected", content_ids=content_ids)
-            user_rejected_edits = Edit.bulk_retrieve(
-                "rejected", user_id=user_id)
+            edits = Edit.timeline(content_ids, user_id=user_id,
+                                  page_num=page_num)
+            if not edits:
+                return []
+            content_names = Name.bulk_retrieve(
+                list({edit["content_id"] for edit in edits}))
+            author_ids = {edit["author_id"] for edit in edits
+                          if edit["author_id"] is not None}
+            if author_ids:
+                authors = UserData.bulk_retrieve(user_data_objects=[
+                    UserData(user_id=author_id) for author_id in author_ids])
+                authors = {author.user_id: author for author in authors}
+            else:
+                authors = {}
         except:
             raise
-        else:
-            user_rejected_edits = [edit for edit in user_rejected_edits
-                                   if edit.content_id not in content_ids]
-
-        def ordering_func(edit):
-            if edit is None:
-                return datetime.min
-            if edit.validation_status == "validating":
-                return edit.timestamp
-            else:
-                return edit.validated_timestamp
-
-        # Use ordering function to sort edits 
-        # in descending chronological order.
-        validating_edits.reverse()
-        accepted_edits.reverse()
-        rejected_edits.reverse()
-        user_rejected_edits.reverse()
-        descending_edits = []
-        while True:
-            try:
-                validating_edit = validating_edits[-1]
-            except IndexError:
-                validating_edit = None
-            try:
-                accepted_edit = accepted_edits[-1]
-            except IndexError:
-                accepted_edit = None
-            try:
-                rejected_edit = rejected_edits[-1]
-            except IndexError:
-                rejected_edit = None
-            try:
-                user_rejected_edit = user_rejected_edits[-1]
-            except IndexError:
-                user_rejected_edit = None
-            if (validating_edit is None and accepted_edit is None
-                    and rejected_edit is None and user_rejected_edit is None):
-                break
-            next_oldest_edit = max(validating_edit, accepted_edit, 
-                                   rejected_edit, user_rejected_edit, 
-                                   key=ordering_func)
-            if next_oldest_edit.validation_status == "validating":
-                validating_edits.pop()
-            elif next_oldest_edit.validation_status == "accepted":
-                accepted_edits.pop()
-            else:
-                if next_oldest_edit.content_id in content_ids:
-                    rejected_edits.pop()
-                else:
-                    user_rejected_edits.pop()
-            descending_edits.append(next_oldest_edit)
 
-        # Now serialize and remove excess data.
-        for i in range(len(descending_edits)):
-            edit = descending_edits[i].json_ready
-            descending_edits[i] = {
-                "content_id": edit["content_id"],
-                "content_name": content_names[edit["content_id"]].name,
-                "edit_id": edit["edit_id"],
-                "timestamp": edit["timestamp"],
-                "validated_timestamp": edit["validated_timestamp"],
-                "validation_status": edit["validation_status"],
-                "content_part": edit["content_part"],
-                "author_type": edit["author_type"],
-                "author": edit["author"],
-            }
-        return descending_edits[20*(page_num-1) : 20*page_num]
+        # Now serialize.
+        return [{
+            "content_id": edit["content_id"],
+            "content_name": content_names[edit["content_id"]].name,
+            "edit_id": edit["edit_id"],
+            "timestamp": (str(edit["timestamp"])
+                          if edit["timestamp"] is not None else None),
+            "validated_timestamp": (str(edit["validated_timestamp"])
+                                    if edit["validated_timestamp"] is not None
+                                    else None),
+            "validation_status": edit["validation_status"],
+            "content_part": edit["content_part"],
+            "author_type": edit["author_type"],
+            "author": (authors[edit["author_id"]].json_ready
+                       if edit["author_id"] in authors else None),
+        } for edit in edits]
 
     @classmethod
     def validation_data(cls, user_id, content_id, validating_page_num=1,
@@ -286,12 +257,12 @@ class ContentView:
             val_edit_votes = AuthorVote.bulk_retrieve(
                 "in-progress", content_id=content_id,
                 validation_status="validating")
-            acc_edit_votes = AuthorVote.bulk_retrieve(
-                "ended", content_id=content_id,
-                validation_status="accepted")
-            rej_edit_votes = AuthorVote.bulk_retrieve(
-                "ended", content_id=content_id,
-                validation_status="rejected")
+            acc_edit_tallies = AuthorVote.closed_tallies(
+                "accepted",
+                edit_ids=[edit.edit_id for edit in accepted_edits])
+            rej_edit_tallies = AuthorVote.closed_tallies(
+                "rejected",
+                edit_ids=[edit.edit_id for edit in rejected_edits])
             votes_needed = AuthorVote.votes_needed(
                 user_id, content_ids=[content_id])
         except:
@@ -324,36 +295,14 @@ class ContentView:
                 del accepted_edits[i]["start_timestamp"]
                 del accepted_edits[i]["edit_text"]
                 del accepted_edits[i]["applied_edit_text"]
-                votes = acc_edit_votes[accepted_edits[i]["edit_id"]]
-                for_count = 0
-                against_count = 0
-                for vote in votes:
-                    if vote.vote == "Y":
-                        for_count += 1
-                    else:
-                        against_count += 1
-                accepted_edits[i]["vote"] = {
-                    "for_count": for_count,
-                    "against_count": against_count,
-                    "close_timestamp": votes[0].close_timestamp,
-                }
+                accepted_edits[i]["vote"] = acc_edit_tallies[
+                    accepted_edits[i]["edit_id"]]
             for i in range(len(rejected_edits)):
                 del rejected_edits[i]["start_timestamp"]
                 del rejected_edits[i]["edit_text"]
                 del rejected_edits[i]["applied_edit_text"]
-                votes = rej_edit_votes[rejected_edits[i]["edit_id"]]
-                for_count = 0
-                against_count = 0
-                for vote in votes:
-                    if vote.vote == "Y":
-                        for_count += 1
-                    else:
-                        against_count += 1
-                rejected_edits[i]["vote"] = {
-                    "for_count": for_count,
-                    "against_count": against_count,
-                    "close_timestamp": votes[0].close_timestamp,
-                }
+                rejected_edits[i]["vote"] = rej_edit_tallies[
+                    rejected_edits[i]["edit_id"]]
 
             def ordering_func(edit):
                 if edit is None:
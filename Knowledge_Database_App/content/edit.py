@@ -7,12 +7,14 @@ Classes:
 
 Functions:
 
-    is_ip_address
+    sweep_deadlines, validate_batch, apply_decision, is_ip_address
 """
 
 import re
+import heapq
 from datetime import datetime, timedelta
 from collections import namedtuple
+from itertools import islice
 from celery.contrib.methods import task_method
 
 from Knowledge_Database_App import _email as mail
@@ -29,6 +31,23 @@ from .content import Content, Name, UserData
 from .exceptions import DuplicateError, DataMatchingError, ContentError
 
 
+# Days after submission at which a validating edit is revisited by
+# sweep_deadlines, and what is then done with it.
+VALIDATION_SCHEDULE = [
+    (4, "vote_reminder"),
+    (5, "validate"),
+    (8, "vote_reminder"),
+    (10, "validate"),
+]
+
+# The maximum number of due deadlines sweep_deadlines handles at once.
+SWEEP_BATCH_SIZE = 500
+
+# How long after its final validation is queued an edit still in Redis
+# is validated again, in case that validation failed.
+VALIDATION_RETRY_INTERVAL = timedelta(hours=1)
+
+
 EditMetrics = namedtuple("EditMetrics",
     ["original_chars", "applied_chars", "insertions", "deletions"])
 
@@ -59,15 +78,17 @@ class Edit:
             conflicts with another edit.
 
     Static Methods:
-        _check_legal
+        _check_legal, _decide
 
     Instance Methods:
         _retrieve_from_storage, _retrieve_from_redis, _transfer,
-        start_vote, save, validate, _accept, _compute_merging_diff,
-        apply_edit, _reject, _notify
+        start_vote, save, _author_count, decision_possible,
+        _claim_decision, validate, _accept, _store_accepted,
+        _notify_accepted, _compute_merging_diff, apply_edit,
+        _update_part, _reject, _notify
 
     Class Methods:
-        edits_validating, bulk_retrieve
+        edits_validating, bulk_retrieve, timeline, accept_batch
     """
 
     storage_handler = orm.StorageHandler()
@@ -342,6 +363,65 @@ class Edit:
                 edit_ids[content_id] = bool(edit_ids[content_id])
             return edit_ids
 
+    @classmethod
+    def timeline(cls, content_ids, user_id=None, page_num=1, per_page=20):
+        """
+        Args:
+            content_ids: List of Integers.
+            user_id: Integer, also include the rejected edits authored
+                by this user. Defaults to None.
+            page_num: Integer. Defaults to 1.
+            per_page: Integer. Defaults to 20.
+        Returns:
+            List of dictionaries summarizing the validating, accepted,
+            and rejected edits on the requested page, ordered from most
+            to least recent activity. Each has the keys content_id,
+            edit_id, timestamp, validated_timestamp, validation_status,
+            content_part, author_type, and author_id.
+        """
+        # No stream can contribute more than this many edits
+        # to the pages up to and including the requested one.
+        edit_limit = per_page*page_num
+        try:
+            closed_edits = cls.storage_handler.call(
+                select.get_edit_timeline, content_ids=content_ids,
+                user_id=user_id, limit=edit_limit)
+            if content_ids:
+                validating_edits = redis_api.get_edits(
+                    content_ids=content_ids, count=edit_limit).values()
+            else:
+                validating_edits = []
+        except:
+            raise
+        closed_edits = [{
+            "content_id": edit.content_id,
+            "edit_id": edit.edit_id,
+            "timestamp": edit.timestamp,
+            "validated_timestamp": edit.validated_timestamp,
+            "validation_status": edit.validation_status,
+            "content_part": edit.content_part,
+            "author_type": edit.author_type,
+            "author_id": edit.author_id,
+        } for edit in closed_edits]
+        validating_edits = heapq.nlargest(edit_limit, ({
+            "content_id": edit["content_id"],
+            "edit_id": edit["edit_id"],
+            "timestamp": edit["timestamp"],
+            "validated_timestamp": None,
+            "validation_status": "validating",
+            "content_part": edit["content_part"],
+            "author_type": edit["author_type"],
+            "author_id": (edit["user_id"]
+                          if edit["author_type"] == "U" else None),
+        } for edit in validating_edits), key=lambda edit: edit["timestamp"])
+
+        def activity_timestamp(edit):
+            return edit["validated_timestamp"] or edit["timestamp"]
+
+        edits = heapq.merge(validating_edits, closed_edits,
+                            key=activity_timestamp, reverse=True)
+        return list(islice(edits, per_page*(page_num-1), edit_limit))
+
     @classmethod
     def bulk_retrieve(cls, validation_status, user_id=None, content_id=None,
                       content_ids=None, text_id=None, citation_id=None, 
@@ -359,12 +439,13 @@ class Edit:
             name_id: Integer. Defaults to None.
             keyword_id: Integer. Defaults to None.
             content_type_id: Integer. Defaults to None.
-            page_num: Integer. Defaults to 0.
+            page_num: Integer, pages hold 20 edits; 0 returns all
+                matching edits. Defaults to 1.
             return_count: Boolean. Defaults to False.
             ids_only: Boolean. Defaults to False.
         Returns:
             If ids_only == True, returns list of Integers, otherwise returns
-            list of Edits.
+            list of Edits, ordered from most to least recent.
         """
         if (validation_status != "validating"
                 and validation_status != "accepted"
@@ -373,209 +454,99 @@ class Edit:
                              message="Invalid data provided.",
                              inputs={"validation_status": validation_status})
         if user_id is not None:
-            if validation_status == "validating":
-                try:
-                    edits = redis_api.get_edits(user_id=user_id).values()
-                except:
-                    raise
-            elif validation_status == "accepted":
-                try:
-                    edits = cls.storage_handler.call(select.get_accepted_edits,
-                                                     user_id=user_id)
-                except:
-                    raise
-            elif validation_status == "rejected":
-                try:
-                    edits = cls.storage_handler.call(select.get_rejected_edits,
-                                                     user_id=user_id)
-                except:
-                    raise
+            filters = {"user_id": user_id}
         elif content_ids is not None:
-            if validation_status == "validating":
-                try:
-                    edits = redis_api.get_edits(content_ids=content_ids).values()
-                except:
-                    raise
-            elif validation_status == "accepted":
-                try:
-                    edits = cls.storage_handler.call(select.get_accepted_edits,
-                                                     content_ids=content_ids)
-                except:
-                    raise
-            elif validation_status == "rejected":
-                try:
-                    edits = cls.storage_handler.call(select.get_rejected_edits,
-                                                      content_ids=content_ids)
-                except:
-                    raise
+            filters = {"content_ids": content_ids}
         elif citation_id is not None:
-            if validation_status == "validating":
-                try:
-                    citation_edits = redis_api.get_edits(
-                        citation_id=citation_id).values()
-                    if content_id is not None:
-                        citation_edits = set(citation_edits)
-                        content_edits = set(redis_api.get_edits(
-                            content_id=content_id).values())
-                        edits = list(citation_edits & content_edits)
-                    else:
-                        edits = citation_edits
-                except:
-                    raise
-            elif validation_status == "accepted":
-                try:
-                    edits = cls.storage_handler.call(
-                        select.get_accepted_edits, content_id=content_id,
-                        citation_id=citation_id)
-                except:
-                    raise
-            elif validation_status == "rejected":
-                try:
-                    edits = cls.storage_handler.call(
-                        select.get_rejected_edits, content_id=content_id,
-                        citation_id=citation_id)
-                except:
-                    raise
+            filters = {"content_id": content_id, "citation_id": citation_id}
         elif keyword_id is not None:
-            if validation_status == "validating":
-                try:
-                    keyword_edits = redis_api.get_edits(
-                        keyword_id=keyword_id).values()
-                    if content_id is not None:
-                        keyword_edits = set(keyword_edits)
-                        content_edits = set(redis_api.get_edits(
-                            content_id=content_id).values())
-                        edits = list(keyword_edits & content_edits)
-                    else:
-                        edits = keyword_edits
-                except:
-                    raise
-            elif validation_status == "accepted":
-                try:
-                    edits = cls.storage_handler.call(
-                        select.get_accepted_edits, content_id=content_id,
-                        keyword_id=keyword_id)
-                except:
-                    raise
-            elif validation_status == "rejected":
-                try:
-                    edits = cls.storage_handler.call(
-                        select.get_rejected_edits, content_id=content_id,
-                        keyword_id=keyword_id)
-                except:
-                    raise
+            filters = {"content_id": content_id, "keyword_id": keyword_id}
         elif content_type_id is not None:
-            if validation_status == "validating":
-                try:
-                    content_type_edits = redis_api.get_edits(
-                        content_type_id=content_type_id).values()
-                    if content_id is not None:
-                        content_type_edits = set(content_type_edits)
-                        content_edits = set(redis_api.get_edits(
-                            content_id=content_id).values())
-                        edits = list(content_type_edits & content_edits)
-                    else:
-                        edits = content_type_edits
-                except:
-                    raise
-            elif validation_status == "accepted":
-                try:
-                    edits = cls.storage_handler.call(
-                        select.get_accepted_edits, content_id=content_id,
-                        content_type_id=content_type_id)
-                except:
-                    raise
-            elif validation_status == "rejected":
-                try:
-                    edits = cls.storage_handler.call(
-                        select.get_rejected_edits, content_id=content_id,
-                        content_type_id=content_type_id)
-                except:
-                    raise
+            filters = {"content_id": content_id,
+                       "content_type_id": content_type_id}
         elif content_id is not None:
-            if validation_status == "validating":
-                try:
-                    edits = redis_api.get_edits(content_id=content_id).values()
-                except:
-                    raise
-            elif validation_status == "accepted":
-                try:
-                    edits = cls.storage_handler.call(select.get_accepted_edits,
-                                                     content_id=content_id)
-                except:
-                    raise
-            elif validation_status == "rejected":
-                try:
-                    edits = cls.storage_handler.call(select.get_rejected_edits,
-                                                     content_id=content_id)
-                except:
-                    raise
+            filters = {"content_id": content_id}
         elif text_id is not None:
-            if validation_status == "validating":
-                try:
-                    edits = redis_api.get_edits(text_id=text_id).values()
-                except:
-                    raise
-            elif validation_status == "accepted":
-                try:
-                    edits = cls.storage_handler.call(select.get_accepted_edits,
-                                                     text_id=text_id)
-                except:
-                    raise
-            elif validation_status == "rejected":
-                try:
-                    edits = cls.storage_handler.call(select.get_rejected_edits,
-                                                     text_id=text_id)
-                except:
-                    raise
+            filters = {"text_id": text_id}
         elif name_id is not None:
-            if validation_status == "validating":
-                try:
-                    edits = redis_api.get_edits(name_id=name_id).values()
-                except:
-                    raise
-            elif validation_status == "accepted":
-                try:
-                    edits = cls.storage_handler.call(select.get_accepted_edits,
-                                                     name_id=name_id)
-                except:
-                    raise
-            elif validation_status == "rejected":
-                try:
-                    edits = cls.storage_handler.call(select.get_rejected_edits,
-                                                     name_id=name_id)
-                except:
-                    raise
+            filters = {"name_id": name_id}
         else:
             return []
 
-        edits = [Edit(edit_object=edit, validation_status=validation_status)
-                 for edit in edits]
-        edit_count = len(edits)
-        if page_num != 0:
-            edits = edits[20*(page_num-1) : 20*page_num]
+        if validation_status == "validating":
+            index_filters = {key: value for key, value in filters.items()
+                             if value is not None}
+            # Pages are matched, read, and counted in Redis, except
+            # across several content pieces.
+            paged = page_num != 0 and "content_ids" not in index_filters
+            try:
+                if paged:
+                    edits = list(redis_api.get_edits(
+                        offset=20*(page_num-1), count=20,
+                        **index_filters).values())
+                    edit_count = (redis_api.count_edits(**index_filters)
+                                  if return_count else None)
+                else:
+                    edits = list(redis_api.get_edits(
+                        **index_filters).values())
+            except:
+                raise
+            edits = [Edit(edit_object=edit, validation_status=validation_status)
+                     for edit in edits]
+            if not paged:
+                edit_count = len(edits)
+            edits = sorted(edits, key=lambda edit: edit.timestamp,
+                           reverse=True)
+            if page_num != 0 and not paged:
+                edits = edits[20*(page_num-1) : 20*page_num]
+        else:
+            # Closed edits are ordered, paged, and counted in the database,
+            # so only the edits on the requested page are loaded.
+            if validation_status == "accepted":
+                select_function = select.get_accepted_edits
+            else:
+                select_function = select.get_rejected_edits
+            try:
+                if page_num != 0:
+                    edits = cls.storage_handler.call(
+                        select_function, order_by="validated_at",
+                        page_num=page_num, per_page=20, **filters)
+                else:
+                    edits = cls.storage_handler.call(
+                        select_function, order_by="validated_at", **filters)
+                if return_count and page_num != 0:
+                    edit_count = cls.storage_handler.call(
+                        select_function, count_only=True, **filters)
+                else:
+                    edit_count = len(edits)
+            except:
+                raise
+            if ids_only:
+                edits = [edit.edit_id for edit in edits]
+                if return_count:
+                    return edits, edit_count
+                else:
+                    return edits
+            edits = [Edit(edit_object=edit, validation_status=validation_status)
+                     for edit in edits]
+
         if ids_only and return_count:
             return [edit.edit_id for edit in edits], edit_count
         elif ids_only:
             return [edit.edit_id for edit in edits]
         else:
-            edits = sorted(edits, key=lambda edit: edit.author.user_id)
-            authors = [edit.author for edit in edits]
+            authors = [edit.author for edit in edits
+                       if edit.author is not None]
             try:
                 loaded_authors = UserData.bulk_retrieve(
                     user_data_objects=authors)
             except:
                 raise
-            loaded_authors = sorted(loaded_authors,
-                                    key=lambda user: user.user_id)
-            for i in range(len(edits)):
-                edits[i].author = loaded_authors[i]
-            if validation_status == "validating":
-                edits = sorted(edits, key=lambda edit: edit.timestamp, 
-                               reverse=True)
-            else:
-                edits = sorted(edits, key=lambda edit: edit.validated_timestamp, 
-                               reverse=True)
+            loaded_authors = {user.user_id: user for user in loaded_authors}
+            for edit in edits:
+                if edit.author is not None:
+                    edit.author = loaded_authors.get(
+                        edit.author.user_id, edit.author)
             if return_count:
                 return edits, edit_count
             else:
@@ -584,23 +555,19 @@ class Edit:
     def start_vote(self):
         """
         Saves the edit, notifies all authors of the submission of
-        the edit, and schedules periodic validation and additional
-        notifications.
+        the edit, and schedules its first deadline for periodic
+        validation and additional notifications.
         """
         self.save()
-        if not self.validate():
-            self.validate.apply_async(eta=self.timestamp+timedelta(days=5))
-            self.validate.apply_async(eta=self.timestamp+timedelta(days=10))
+        self.validate()
+        if self.validation_status == "validating":
             author_info = self.storage_handler.call(
                 select.get_user_info, content_id=self.content_id)
             self._notify.apply_async(args=["edit_submitted"],
                 kwargs={"author_info": author_info})
-            self._notify.apply_async(args=["vote_reminder"],
-                kwargs={"author_info": author_info, "days_remaining": 6},
-                eta=self.timestamp+timedelta(days=4))
-            self._notify.apply_async(args=["vote_reminder"],
-                kwargs={"author_info": author_info, "days_remaining": 2},
-                eta=self.timestamp+timedelta(days=8))
+            redis_api.store_deadlines({
+                self.edit_id: self.timestamp + timedelta(
+                    days=VALIDATION_SCHEDULE[0][0])})
 
     def save(self):
         """
@@ -618,33 +585,40 @@ class Edit:
             self.validation_status = "validating"
             self.edit_id = edit_id
 
-    @celery_app.task(name="edit.validate", filter=task_method)
-    def validate(self):
+    def _author_count(self):
         """
-        Validates the edit based on the distribution of author votes
-        and the number of days from submission.
-
-        See the specifications for an explanation of the
-        validation criteria.
+        Returns:
+            Integer, the number of authors of the edited content piece,
+            cached in Redis after the first lookup.
         """
         try:
-            author_count = self.storage_handler.call(select.get_author_count,
-                                                     self.content_id)
-        except:
-            raise
-        try:
-            votes = author_vote.AuthorVote.bulk_retrieve(
-                vote_status="in-progress", edit_id=self.edit_id)
+            author_count = redis_api.get_author_count(self.content_id)
+            if author_count is None:
+                author_count = self.storage_handler.call(
+                    select.get_author_count, self.content_id)
+                redis_api.store_author_count(self.content_id, author_count)
         except:
             raise
-        vote_count = len(votes)
-        for_vote_count = len([True for vote in votes
-                              if vote.vote == "Y"])
+        else:
+            return author_count
+
+    @staticmethod
+    def _decide(author_count, for_vote_count, vote_count,
+                days_since_creation):
+        """
+        Args:
+            author_count: Integer.
+            for_vote_count: Integer.
+            vote_count: Integer.
+            days_since_creation: Integer.
+        Returns:
+            'accept' or 'reject' if the validation criteria decide the
+            edit, otherwise None.
+        """
         against_vote_count = vote_count - for_vote_count
-        days_since_creation = (datetime.utcnow() - self.timestamp).days
-        if not votes:
+        if not vote_count:
             if author_count == 0 or days_since_creation >= 10:
-                return self._accept(votes)
+                return "accept"
         else:
             if ((author_count == vote_count and
                     for_vote_count/vote_count >= 0.5) or
@@ -654,11 +628,70 @@ class Edit:
                      for_vote_count/vote_count >= .66) or
                     (days_since_creation >= 10 and
                      for_vote_count/vote_count >= 0.5)):
-                return self._accept(votes)
+                return "accept"
 
         if against_vote_count >= author_count/2 or days_since_creation >= 10:
+            return "reject"
+
+    def _decision(self, tallies=None):
+        try:
+            author_count = self._author_count()
+            if tallies is None:
+                tallies = redis_api.get_tallies(self.edit_id)
+        except:
+            raise
+        for_vote_count, against_vote_count, vote_count = tallies
+        days_since_creation = (datetime.utcnow() - self.timestamp).days
+        return self._decide(author_count, for_vote_count, vote_count,
+                            days_since_creation)
+
+    def decision_possible(self, tallies=None):
+        """
+        Args:
+            tallies: Tuple of integers of the form
+                (for vote count, against vote count, total vote count).
+                Defaults to None, in which case they are read from
+                Redis.
+        Returns:
+            True if validating the edit now would accept or reject it.
+        """
+        return self._decision(tallies) is not None
+
+    @celery_app.task(name="edit.validate", filter=task_method)
+    def validate(self):
+        """
+        Validates the edit based on the distribution of author votes
+        and the number of days from submission.
+
+        See the specifications for an explanation of the
+        validation criteria.
+        """
+        decision, votes = self._claim_decision()
+        if decision == "accept":
+            return self._accept(votes)
+        elif decision == "reject":
             return self._reject(votes)
 
+    def _claim_decision(self):
+        """
+        Returns:
+            Tuple of the form (decision, votes), where decision is
+            'accept' or 'reject' if the edit is decided and this
+            validation claimed it, otherwise None, and votes is the
+            list of AuthorVotes on the edit, or None if undecided.
+        """
+        decision = self._decision()
+        if decision is None:
+            return None, None
+        try:
+            if not redis_api.claim_edit(self.edit_id):
+                return None, None   # Already validated, or being validated
+            votes = author_vote.AuthorVote.bulk_retrieve(
+                vote_status="in-progress", edit_id=self.edit_id)
+        except:
+            raise
+        return decision, votes
+
     def _accept(self, votes):
         """
         Updates the corresponding content part, stores the edit,
@@ -666,8 +699,21 @@ class Edit:
         content authors of the edit's acceptance.
         """
         accepted_timestamp = datetime.utcnow()
-        vote_string = author_vote.AuthorVote.get_vote_summary(votes)
         self.apply_edit()
+        self._store_accepted(votes, accepted_timestamp)
+        self._notify_accepted()
+
+    def _store_accepted(self, votes, accepted_timestamp):
+        """
+        Stores the edit, once applied, as accepted and deletes it
+        from Redis.
+
+        Args:
+            votes: List of AuthorVotes.
+            accepted_timestamp: Datetime.
+        """
+        voter_votes = [(vote.author.user_id, vote.vote, vote.timestamp)
+                       for vote in votes]
         try:
             edit_id = self.storage_handler.call(
                 action.store_accepted_edit,
@@ -678,8 +724,7 @@ class Edit:
                 self.content_part,
                 self.part_id,
                 self.content_id,
-                vote_string,
-                [vote.author.user_id for vote in votes],
+                voter_votes,
                 self.start_timestamp,
                 self.timestamp,
                 accepted_timestamp,
@@ -688,27 +733,80 @@ class Edit:
             )
         except:
             raise
-        redis_edit_id = self.edit_id
+        self._delete_validation_data(self.edit_id)
+        if self.author_type == "U":
+            # The edit's author may now be one of the content's authors.
+            content_id = self.content_id
+            orm.on_commit(lambda: redis_api.expire_author_count(content_id))
         self.edit_id = edit_id
         self.validation_status = "accepted"
         self.validated_timestamp = accepted_timestamp
-        try:
-            redis_api.delete_validation_data(
-                self.content_id, redis_edit_id,
-                self.author.user_id if self.author else None,
-                self.part_id, self.content_part)
-        except:
-            raise
+
+    def _notify_accepted(self):
         try:
             author_info = self.storage_handler.call(
-                select.get_user_info, content_id=content_id)
+                select.get_user_info, content_id=self.content_id)
         except:
             raise
         self._notify.apply_async(args=["edit_accepted"])
         self._notify.apply_async(args=["author_acceptance"],
                                  kwargs={"author_info": author_info})
 
-    def _compute_merging_diff(self):
+    @classmethod
+    def accept_batch(cls, edit_votes):
+        """
+        Accepts several edits at once. Edits to the same text are
+        merged in chronological order, so that the text is written and
+        reindexed only once for all of them, and all of the edits are
+        stored in the same transaction.
+
+        Args:
+            edit_votes: List of tuples of the form (edit, votes), where
+                edit is a validating Edit to accept and votes is the
+                list of AuthorVotes on it.
+        """
+        accepted_timestamp = datetime.utcnow()
+        part_groups = {}
+        edit_votes = sorted(edit_votes,
+                            key=lambda edit_vote: edit_vote[0].timestamp)
+        for edit, votes in edit_votes:
+            part_groups.setdefault(
+                (edit.content_id, edit.content_part, edit.part_id), []).append(
+                (edit, votes))
+        with orm.unit_of_work():
+            for (content_id, content_part, part_id), group in \
+                    part_groups.items():
+                if (content_part != "text" or part_id is None or
+                        len(group) == 1):
+                    for edit, votes in group:
+                        edit.apply_edit()
+                        edit._store_accepted(votes, accepted_timestamp)
+                    continue
+                merged_edits = []
+                for edit, votes in group:
+                    edit.applied_edit_text = edit._compute_merging_diff(
+                        batch_accepted_edits=merged_edits)
+                    edit.validated_timestamp = accepted_timestamp
+                    merged_edits.append(edit)
+                last_edit = merged_edits[-1]
+                last_edit._update_part(diff.restore(
+                    last_edit.applied_edit_text, version="edit"))
+                for edit, votes in group:
+                    edit._store_accepted(votes, accepted_timestamp)
+        for edit, votes in edit_votes:
+            edit._notify_accepted()
+
+    def _compute_merging_diff(self, batch_accepted_edits=None):
+        """
+        Args:
+            batch_accepted_edits: List of Edits to the same content
+                part accepted before this one in the same batch, in
+                ascending chronological order, with their applied edit
+                texts computed but not yet stored. Defaults to None.
+        Returns:
+            The diff of the edit merged with the accepted edits
+            submitted since it was started.
+        """
         if self.content_part == "text":
             accepted_edits = Edit.bulk_retrieve(
                 "accepted", text_id=self.part_id)
@@ -718,6 +816,9 @@ class Edit:
                 citation_id=self.part_id)
         else:
             return self.edit_text   # No merging keywords, names, content types
+        if batch_accepted_edits:
+            accepted_edits = (list(reversed(batch_accepted_edits))
+                              + accepted_edits)
         prior_accepted_edits = [edit for edit in accepted_edits
             if edit.validated_timestamp < self.start_timestamp]
         if len(accepted_edits) == len(prior_accepted_edits):
@@ -777,6 +878,13 @@ class Edit:
             self.applied_edit_text = self._compute_merging_diff()
             new_part_text = diff.restore(self.applied_edit_text,
                                          version="edit")
+        self._update_part(new_part_text)
+
+    def _update_part(self, new_part_text):
+        """
+        Args:
+            new_part_text: String, the edited content part's new text.
+        """
         if self.part_id is None:
             if self.content_part == "alternate_name":
                 new_part_text = Name(name=new_part_text,
@@ -799,7 +907,8 @@ class Edit:
         the author and other content authors of the edit's rejection.
         """
         rejected_timestamp = datetime.utcnow()
-        vote_string = author_vote.AuthorVote.get_vote_summary(votes)
+        voter_votes = [(vote.author.user_id, vote.vote, vote.timestamp)
+                       for vote in votes]
         try:
             edit_id = self.storage_handler.call(
                 action.store_rejected_edit,
@@ -809,8 +918,7 @@ class Edit:
                 self.content_part,
                 self.part_id,
                 self.content_id,
-                vote_string,
-                [vote.author.user_id for vote in votes],
+                voter_votes,
                 self.timestamp,
                 rejected_timestamp,
                 self.author_type,
@@ -818,25 +926,32 @@ class Edit:
             )
         except:
             raise
+        self._delete_validation_data(self.edit_id)
         self.edit_id = edit_id
         self.validation_status = "rejected"
         self.validated_timestamp = rejected_timestamp
-        try:
-            redis_api.delete_validation_data(
-                self.content_id, self.edit_id,
-                self.author.user_id if self.author else None,
-                self.part_id, self.content_part)
-        except:
-            raise
         try:
             author_info = self.storage_handler.call(
-                select.get_user_info, content_id=content_id)
+                select.get_user_info, content_id=self.content_id)
         except:
             raise
         self._notify.apply_async(args=["edit_rejected"])
         self._notify.apply_async(args=["author_rejection"],
                                  kwargs={"author_info": author_info})
 
+    def _delete_validation_data(self, redis_edit_id):
+        """
+        Deletes the edit from Redis once the current unit of work
+        commits, so that the edit is kept if storing it is rolled back.
+
+        Args:
+            redis_edit_id: Integer, the edit's ID in Redis.
+        """
+        user_id = self.author.user_id if self.author else None
+        orm.on_commit(lambda: redis_api.delete_validation_data(
+            self.content_id, redis_edit_id, user_id,
+            self.part_id, self.content_part))
+
     @celery_app.task(name="edit._notify", filter=task_method)
     def _notify(self, email_type, days_remaining=None, author_info=None):
         """
@@ -1099,6 +1214,131 @@ class Edit:
     json_ready = property(json_ready_)
 
 
+@celery_app.task(name="edit.sweep_deadlines")
+def sweep_deadlines(batch_size=SWEEP_BATCH_SIZE):
+    """
+    Run periodically by celery beat. Pops the deadlines of validating
+    edits that have passed, batch_size at a time, queues validation
+    or vote reminders for those edits as VALIDATION_SCHEDULE says,
+    and sets each edit's next deadline. Past the final validation, an
+    edit keeps a deadline VALIDATION_RETRY_INTERVAL away until it is
+    accepted or rejected, which deletes it.
+
+    Args:
+        batch_size: Integer. Defaults to SWEEP_BATCH_SIZE.
+    Returns:
+        Integer, the number of deadlines handled.
+    """
+    schedule = dict(VALIDATION_SCHEDULE)
+    validation_days = VALIDATION_SCHEDULE[-1][0]
+    sweep_timestamp = datetime.utcnow()
+    deadline_count = 0
+    while True:
+        deadlines = redis_api.pop_deadlines(sweep_timestamp, batch_size)
+        if not deadlines:
+            return deadline_count
+        try:
+            edits = redis_api.get_edits_by_id(
+                [edit_id for edit_id, deadline in deadlines])
+            author_info = {}
+            next_deadlines = {}
+            validating_edit_ids = []
+            for edit_id, deadline in deadlines:
+                if edit_id not in edits:
+                    continue    # Already accepted or rejected
+                edit = Edit(validation_status="validating",
+                            edit_object=edits[edit_id])
+                days = min(round((deadline - edit.timestamp).total_seconds()
+                                 / 86400), validation_days)
+                if schedule.get(days) == "validate":
+                    validating_edit_ids.append(edit_id)
+                elif schedule.get(days) == "vote_reminder":
+                    if edit.content_id not in author_info:
+                        author_info[edit.content_id] = \
+                            Edit.storage_handler.call(
+                                select.get_user_info,
+                                content_id=edit.content_id)
+                    edit._notify.apply_async(args=["vote_reminder"], kwargs={
+                        "author_info": author_info[edit.content_id],
+                        "days_remaining": validation_days - days,
+                    })
+                later_days = [schedule_days for schedule_days, action
+                              in VALIDATION_SCHEDULE if schedule_days > days]
+                if later_days:
+                    next_deadlines[edit_id] = edit.timestamp + timedelta(
+                        days=later_days[0])
+                else:
+                    next_deadlines[edit_id] = (sweep_timestamp +
+                                               VALIDATION_RETRY_INTERVAL)
+            if validating_edit_ids:
+                validate_batch.apply_async(args=[validating_edit_ids])
+            redis_api.store_deadlines(next_deadlines)
+        except:
+            # Put the batch back so the next sweep retries it.
+            redis_api.store_deadlines(dict(deadlines))
+            raise
+        deadline_count += len(deadlines)
+
+
+@celery_app.task(name="edit.validate_batch")
+def validate_batch(edit_ids):
+    """
+    Validates several edits. Each rejected edit, and each group of
+    accepted edits to the same content part, is then stored by its
+    own apply_decision task, so that one failing edit only holds up
+    the edits it was merged with.
+
+    Args:
+        edit_ids: List of integers, the IDs of validating edits.
+    """
+    edits = redis_api.get_edits_by_id(edit_ids)
+    part_groups = {}
+    for edit_id in edit_ids:
+        if edit_id not in edits:
+            continue    # Already accepted or rejected
+        edit = Edit(validation_status="validating",
+                    edit_object=edits[edit_id])
+        decision, votes = edit._claim_decision()
+        if decision == "accept":
+            part_groups.setdefault(
+                (edit.content_id, edit.content_part, edit.part_id),
+                []).append(edit_id)
+        elif decision == "reject":
+            apply_decision.apply_async(args=["reject", [edit_id]])
+    for group_edit_ids in part_groups.values():
+        apply_decision.apply_async(args=["accept", group_edit_ids])
+
+
+@celery_app.task(name="edit.apply_decision")
+def apply_decision(decision, edit_ids):
+    """
+    Accepts, together through Edit.accept_batch, or rejects edits
+    claimed by validate_batch, in the task's own transaction. If that
+    fails, the claims are released so that the edits are validated
+    again by a later sweep.
+
+    Args:
+        decision: String, accepts 'accept' or 'reject'.
+        edit_ids: List of integers, the IDs of the claimed edits.
+    """
+    try:
+        edits = redis_api.get_edits_by_id(edit_ids)
+        edit_votes = [
+            (Edit(validation_status="validating", edit_object=edits[edit_id]),
+             author_vote.AuthorVote.bulk_retrieve(
+                 vote_status="in-progress", edit_id=edit_id))
+            for edit_id in edit_ids if edit_id in edits]
+        if decision == "accept":
+            if edit_votes:
+                Edit.accept_batch(edit_votes)
+        else:
+            for edit, votes in edit_votes:
+                edit._reject(votes)
+    except:
+        redis_api.release_claims(edit_ids)
+        raise
+
+
 def is_ip_address(string):
     result = re.fullmatch(r"(^(?:[0-9]{1,3}\.){3}[0-9]{1,3})|"
                           r"^(?:[A-F0-9]{1,4}:){7}[A-F0-9]{1,4}$", string)
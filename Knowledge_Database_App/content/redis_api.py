@@ -2,21 +2,26 @@
 Storage for edits and votes active in the validation process.
 Uses redis.
 
-Classes:
-
-    CustomStrictRedis
-
 Functions:
 
-    store_edit, store_vote, store_confirm, get_confirm_info,
-    expire_confirm, store_report, get_reports, get_admin_assignments, 
-    delete_report, get_edits, get_votes, get_validation_data, 
-    delete_validation_data
+    decode_hash, decode_ids, pack_edit, decode_edit, store_edit,
+    store_vote, store_confirm, get_confirm_info, expire_confirm,
+    store_report, get_reports, get_admin_assignments, delete_report,
+    get_edits, get_edits_by_id, count_edits, get_votes, get_tallies,
+    claim_edit, release_claims, store_deadlines, pop_deadlines, mark_index_dirty,
+    pop_index_outbox, get_index_lag, get_author_count,
+    store_author_count, expire_author_count, get_search_generation,
+    bump_search_generation, get_cached_search, store_cached_search,
+    store_search_cache_stats, get_search_cache_stats,
+    get_validation_data, delete_validation_data
 """
 
+import zlib
+import struct
+from datetime import datetime, timedelta
+
 import dateutil.parser as dateparse
 from redis import StrictRedis, WatchError
-from redis.client import BasePipeline
 
 from Knowledge_Database_App.storage.exceptions import InputError
 from .exceptions import DuplicateVoteError, MissingKeyError
@@ -54,47 +59,403 @@ def decode_response(response):
     return response
 
 
-class CustomStrictRedis(StrictRedis):
+def _decode_str(value):
+    return value.decode("utf-8")
+
+
+def _parse_timestamp(timestamp_string):
+    """
+    Args:
+        timestamp_string: String produced by str(datetime).
+    Returns:
+        Datetime.
+    """
+    if len(timestamp_string) == 19 or len(timestamp_string) == 26:
+        return datetime(
+            int(timestamp_string[0:4]), int(timestamp_string[5:7]),
+            int(timestamp_string[8:10]), int(timestamp_string[11:13]),
+            int(timestamp_string[14:16]), int(timestamp_string[17:19]),
+            int(timestamp_string[20:26]) if len(timestamp_string) == 26
+            else 0)
+    else:
+        return dateparse.parse(timestamp_string)
+
+
+def _decode_datetime(value):
+    return _parse_timestamp(value.decode("ascii"))
+
+
+def _decode_optional_int(value):
+    # _hash_fields stores None as the string 'None'.
+    return None if value == b"None" else int(value)
+
+
+# Field types of the hashes stored under each key family. Fields not
+# listed are decoded as strings.
+HASH_SCHEMAS = {
+    "edit": {
+        "edit_id": int,
+        "content_id": int,
+        "edit_text": _decode_str,
+        "edit_rationale": _decode_str,
+        "content_part": _decode_str,
+        "part_id": _decode_optional_int,
+        "timestamp": _decode_datetime,
+        "start_timestamp": _decode_datetime,
+        "author_type": _decode_str,
+        "user_id": int,
+    },
+    "report": {
+        "report_id": int,
+        "content_id": int,
+        "report_text": _decode_str,
+        "report_type": _decode_str,
+        "admin_id": int,
+        "timestamp": _decode_datetime,
+        "author_type": _decode_str,
+        "author_id": int,
+    },
+}
+
+# Field and value types of the hashes stored under each key family
+# whose fields are IDs or hashes rather than fixed names.
+MAP_SCHEMAS = {
+    "votes": (int, _decode_str),
+    "user_email": (_decode_str, _decode_datetime),
+}
+
+
+def decode_hash(key_family, response):
+    """
+    Args:
+        key_family: String, a key of HASH_SCHEMAS or MAP_SCHEMAS.
+        response: Dictionary of bytes to bytes, an HGETALL reply.
+    Returns:
+        Dictionary with its fields and values converted to the types
+        given by the schema of key_family.
+    """
+    if key_family in MAP_SCHEMAS:
+        decode_field, decode_value = MAP_SCHEMAS[key_family]
+        return {decode_field(field): decode_value(value)
+                for field, value in response.items()}
+    schema = HASH_SCHEMAS[key_family]
+    decoded = {}
+    for field, value in response.items():
+        field = field.decode("utf-8")
+        decoded[field] = schema.get(field, _decode_str)(value)
+    return decoded
+
+
+def decode_ids(response):
+    """
+    Args:
+        response: List of bytes, a reply listing IDs.
+    Returns:
+        List of Integers.
+    """
+    return [int(id_) for id_ in response]
+
+
+# Whether to store new edits packed into a single value rather than
+# as a hash of string fields. Edits stored either way can be read.
+PACK_EDITS = False
+
+# The minimum length, in bytes, of the edit text of a packed edit
+# for it to be compressed.
+COMPRESS_MIN_BYTES = 256
+
+_EPOCH = datetime(1970, 1, 1)
+
+# Version 1 packed edit layout: version, flags, content_id, part_id,
+# timestamp and start_timestamp (microseconds since the epoch), and
+# user_id, followed by the length-prefixed UTF-8 edit_text,
+# edit_rationale, content_part, and author_type.
+_PACKED_EDIT_V1 = struct.Struct("<BBqqqqq")
+_PACKED_STRING_LENGTH = struct.Struct("<I")
+_COMPRESSED_TEXT = 1
+_HAS_USER_ID = 2
+# Set for edits adding a content part, which have no part_id. Packed
+# edits stored before the flag existed all have one.
+_NO_PART_ID = 4
+
+
+def _microseconds(timestamp):
+    return (timestamp - _EPOCH) // timedelta(microseconds=1)
+
+
+def pack_edit(edit_dict):
     """
-    Customized StrictRedis superclass with type interpretation 
-    and decoding via a modified version of the parse_response method.
+    Args:
+        edit_dict: Dictionary of the fields of an edit, as stored by
+            store_edit, excluding edit_id.
+    Returns:
+        Bytes, the version 1 packed edit.
     """
+    flags = 0
+    edit_text = edit_dict["edit_text"].encode("utf-8")
+    if len(edit_text) >= COMPRESS_MIN_BYTES:
+        compressed_text = zlib.compress(edit_text)
+        if len(compressed_text) < len(edit_text):
+            edit_text = compressed_text
+            flags |= _COMPRESSED_TEXT
+    user_id = edit_dict.get("user_id")
+    if user_id is not None:
+        flags |= _HAS_USER_ID
+    part_id = edit_dict["part_id"]
+    if part_id is None:
+        flags |= _NO_PART_ID
+    packed = [_PACKED_EDIT_V1.pack(
+        1, flags, edit_dict["content_id"],
+        part_id if part_id is not None else 0,
+        _microseconds(edit_dict["timestamp"]),
+        _microseconds(edit_dict["start_timestamp"]),
+        user_id if user_id is not None else 0)]
+    for string in [edit_text, edit_dict["edit_rationale"].encode("utf-8"),
+                   edit_dict["content_part"].encode("utf-8"),
+                   edit_dict["author_type"].encode("utf-8")]:
+        packed.append(_PACKED_STRING_LENGTH.pack(len(string)))
+        packed.append(string)
+    return b"".join(packed)
+
+
+def _unpack_edit_v1(packed):
+    (version, flags, content_id, part_id, timestamp, start_timestamp,
+     user_id) = _PACKED_EDIT_V1.unpack_from(packed)
+    offset = _PACKED_EDIT_V1.size
+    strings = []
+    for i in range(4):
+        length, = _PACKED_STRING_LENGTH.unpack_from(packed, offset)
+        offset += _PACKED_STRING_LENGTH.size
+        strings.append(packed[offset:offset+length])
+        offset += length
+    edit_text, edit_rationale, content_part, author_type = strings
+    if flags & _COMPRESSED_TEXT:
+        edit_text = zlib.decompress(edit_text)
+    edit = {
+        "content_id": content_id,
+        "edit_text": edit_text.decode("utf-8"),
+        "edit_rationale": edit_rationale.decode("utf-8"),
+        "content_part": content_part.decode("utf-8"),
+        "part_id": None if flags & _NO_PART_ID else part_id,
+        "timestamp": _EPOCH + timedelta(microseconds=timestamp),
+        "start_timestamp": _EPOCH + timedelta(microseconds=start_timestamp),
+        "author_type": author_type.decode("utf-8"),
+    }
+    if flags & _HAS_USER_ID:
+        edit["user_id"] = user_id
+    return edit
 
-    def parse_response(self, connection, command_name, **options):
-        response = super().parse_response(connection, command_name, **options)
-        return decode_response(response)
 
-    def pipeline(self, transaction=True, shard_hint=None):
-        return CustomStrictPipeline(
-            self.connection_pool, 
-            self.response_callbacks, 
-            transaction, 
-            shard_hint
-        )
+# Packed edit decoders by format version, the first byte of the value.
+_EDIT_UNPACKERS = {
+    1: _unpack_edit_v1,
+}
 
 
-class CustomBasePipeline(BasePipeline):
+def decode_edit(response):
     """
-    Customized BasePipeline superclass with type interpretation 
-    and decoding.
+    Args:
+        response: Dictionary of bytes to bytes, an HGETALL reply for
+            an edit stored either as a hash of fields or packed.
+    Returns:
+        Dictionary of the fields of the edit, or an empty dictionary
+        if the edit does not exist.
     """
+    packed = response.get(b"packed")
+    if packed is None:
+        return decode_hash("edit", response)
+    try:
+        unpack = _EDIT_UNPACKERS[packed[0]]
+    except KeyError:
+        raise NotImplementedError(
+            "Unknown packed edit version: " + str(packed[0]))
+    edit = unpack(packed)
+    edit["edit_id"] = int(response[b"edit_id"])
+    return edit
+
+
+redis = StrictRedis()
+
+# How long, in seconds, a content piece's author count stays cached.
+# Bounds how long the count can be stale after author changes that
+# do not expire it, like a concurrent validation re-caching the old
+# count or a deleted user leaving the content's authors.
+AUTHOR_COUNT_EXPIRE_SECONDS = 3600
+
+
+# Edits are indexed by sorted sets scored by submission time (or
+# voting time, for the voter indexes) in seconds since the epoch.
+EDIT_INDEX_PREFIXES = ["content", "user", "voter", "text", "citation",
+                       "keyword", "name", "content_type"]
+
+# Each of the scripts below runs atomically on the server, so no
+# operation needs a WATCH transaction. Every key a script touches is
+# passed in KEYS, as Redis requires for scripts to be routed and
+# replicated correctly, so IDs are allocated with INCR beforehand.
+
+# KEYS[1]: hash to store, KEYS[2], ...: index lists to push its ID
+# onto. ARGV[1]: ID, ARGV[2]: name of the ID field, ARGV[3], ...: the
+# remaining fields and values of the hash.
+_store_hash_script = redis.register_script("""
+redis.call("HMSET", KEYS[1], ARGV[2], ARGV[1], unpack(ARGV, 3))
+for i = 2, #KEYS do
+    redis.call("LPUSH", KEYS[i], ARGV[1])
+end
+return ARGV[1]
+""")
+
+# KEYS[1]: edit hash, KEYS[2], ...: index sorted sets to add the edit
+# ID to. ARGV[1]: edit ID, ARGV[2]: score, ARGV[3], ...: the fields and
+# values of the edit.
+_store_edit_script = redis.register_script("""
+redis.call("HMSET", KEYS[1], "edit_id", ARGV[1], unpack(ARGV, 3))
+for i = 2, #KEYS do
+    redis.call("ZADD", KEYS[i], ARGV[2], ARGV[1])
+end
+return ARGV[1]
+""")
+
+# KEYS[1]: edit hash, KEYS[2]: votes hash, KEYS[3]: voter's edit index,
+# KEYS[4]: tally hash. ARGV[1]: edit ID, ARGV[2]: voter ID, ARGV[3]:
+# vote and time, ARGV[4]: score, ARGV[5]: tally field of the vote.
+# Returns -1 if the edit does not exist, 0 if the voter already voted,
+# and otherwise the updated for, against, and total tallies.
+_store_vote_script = redis.register_script("""
+if redis.call("EXISTS", KEYS[1]) == 0 then
+    return -1
+end
+if redis.call("HSETNX", KEYS[2], ARGV[2], ARGV[3]) == 0 then
+    return 0
+end
+redis.call("ZADD", KEYS[3], ARGV[4], ARGV[1])
+redis.call("HINCRBY", KEYS[4], ARGV[5], 1)
+redis.call("HINCRBY", KEYS[4], "total", 1)
+return redis.call("HMGET", KEYS[4], "for", "against", "total")
+""")
+
+# KEYS[1]: deadline sorted set. ARGV[1]: latest score to pop,
+# ARGV[2]: maximum number of deadlines to pop.
+# Returns the popped edit IDs and scores, interleaved.
+_pop_deadlines_script = redis.register_script("""
+local due = redis.call("ZRANGEBYSCORE", KEYS[1], "-inf", ARGV[1],
+                       "WITHSCORES", "LIMIT", 0, ARGV[2])
+for i = 1, #due, 2 do
+    redis.call("ZREM", KEYS[1], due[i])
+end
+return due
+""")
+
+# KEYS[1]: index outbox sorted set, KEYS[2]: the content piece's set
+# of dirty parts. ARGV[1]: content ID, ARGV[2]: score, ARGV[3], ...:
+# dirty parts. A piece already in the outbox keeps its original score.
+_mark_index_dirty_script = redis.register_script("""
+if redis.call("ZSCORE", KEYS[1], ARGV[1]) == false then
+    redis.call("ZADD", KEYS[1], ARGV[2], ARGV[1])
+end
+redis.call("SADD", KEYS[2], unpack(ARGV, 3))
+return 1
+""")
+
+# KEYS[1]: index outbox sorted set, KEYS[2], ...: the dirty part sets
+# of the content pieces to pop. ARGV[1], ...: their content IDs.
+# Pieces no longer in the outbox, popped by another flush since they
+# were read, are skipped.
+# Returns a list of {content ID, score, dirty parts} lists.
+_pop_index_outbox_script = redis.register_script("""
+local records = {}
+for i = 2, #KEYS do
+    local content_id = ARGV[i - 1]
+    local score = redis.call("ZSCORE", KEYS[1], content_id)
+    if score then
+        records[#records + 1] = {content_id, score,
+                                 redis.call("SMEMBERS", KEYS[i])}
+        redis.call("DEL", KEYS[i])
+        redis.call("ZREM", KEYS[1], content_id)
+    end
+end
+return records
+""")
+
+# KEYS[1]: edit hash, KEYS[2]: claim key. ARGV[1]: claim timeout in
+# seconds. Returns 1 if the edit exists and was not already claimed.
+_claim_edit_script = redis.register_script("""
+if redis.call("EXISTS", KEYS[1]) == 0 then
+    return 0
+end
+if redis.call("SET", KEYS[2], 1, "EX", ARGV[1], "NX") then
+    return 1
+end
+return 0
+""")
+
+# KEYS[1]: edit hash, KEYS[2]: votes hash, KEYS[3]: tally hash,
+# KEYS[4], ...: sorted sets to remove the edit ID from, including the
+# voter indexes of every voter on the edit. ARGV[1]: edit ID,
+# ARGV[2]: number of voters the votes hash was read with.
+# Returns -1, deleting nothing, if a vote was stored since the votes
+# hash was read, and otherwise the number of voters.
+_delete_validation_script = redis.register_script("""
+local voter_count = redis.call("HLEN", KEYS[2])
+if voter_count ~= tonumber(ARGV[2]) then
+    return -1
+end
+for i = 4, #KEYS do
+    redis.call("ZREM", KEYS[i], ARGV[1])
+end
+redis.call("DEL", KEYS[1], KEYS[2], KEYS[3])
+return voter_count
+""")
+
+# KEYS[1]: scratch key, KEYS[2], ...: index sorted sets to intersect.
+# ARGV[1]: maximum score, ARGV[2]: offset, ARGV[3]: count (-1 for all),
+# ARGV[4], ...: weight of each index.
+# Returns {number of edits in all indexes, IDs of the edits on the page}.
+_intersect_edits_script = redis.register_script("""
+local command = {"ZINTERSTORE", KEYS[1], #KEYS - 1}
+for i = 2, #KEYS do
+    table.insert(command, KEYS[i])
+end
+table.insert(command, "WEIGHTS")
+for i = 4, #ARGV do
+    table.insert(command, ARGV[i])
+end
+table.insert(command, "AGGREGATE")
+table.insert(command, "MAX")
+local edit_count = redis.call(unpack(command))
+local edit_ids = redis.call("ZREVRANGEBYSCORE", KEYS[1], ARGV[1], "-inf",
+                            "LIMIT", ARGV[2], ARGV[3])
+redis.call("DEL", KEYS[1])
+return {edit_count, edit_ids}
+""")
+
 
-    def parse_response(self, connection, command_name, **options):
-        result = CustomStrictRedis.parse_response(
-            self, connection, command_name, **options)
-        if command_name in self.UNWATCH_COMMANDS:
-            self.watching = False
-        elif command_name == 'WATCH':
-            self.watching = True
-        return result
+def _score(timestamp):
+    # Timestamps are naive UTC datetimes.
+    return (timestamp - datetime(1970, 1, 1)).total_seconds()
 
 
-class CustomStrictPipeline(CustomBasePipeline, CustomStrictRedis):
-    """Pipeline for the CustomStrictRedis class."""
-    pass
+def _hash_fields(hash_dict):
+    fields = []
+    for field, value in hash_dict.items():
+        fields.extend([field, str(value)])
+    return fields
 
 
-redis = CustomStrictRedis()
+def _part_key(content_part, part_id):
+    if content_part == "citation":
+        return "citation:" + str(part_id)
+    elif content_part == "text":
+        return "text:" + str(part_id)
+    elif content_part == "name" or content_part == "alternate_name":
+        return "name:" + str(part_id)
+    elif content_part == "keyword":
+        return "keyword:" + str(part_id)
+    elif content_part == "content_type":
+        return "content_type:" + str(part_id)
+    else:
+        raise InputError("Invalid argument(s) provided.",
+                         message="Invalid data provided.",
+                         inputs={"content_part": content_part})
 
 
 def _setup_id_base():
@@ -126,54 +487,29 @@ def store_edit(content_id, edit_text, edit_rationale, content_part, part_id,
     Returns:
         An integer, the id of the edit in Redis.
     """
-    with redis.pipeline() as pipe:
-        # Get a unique edit id and increment it for the next edit
-        while True:
-            try:
-                pipe.watch("next_edit_id")
-                edit_id = int(pipe.get("next_edit_id"))
-                next_edit_id = edit_id + 1
-                pipe.multi()
-                pipe.set("next_edit_id", next_edit_id).execute()
-            except WatchError:
-                continue
-            except:
-                raise
-            else:
-                break
-
-        # Now store the edit with the edit id
-        if user_id is not None:
-            pipe.lpush("user:" + str(user_id), edit_id)
-        if content_part == "citation":
-            pipe.lpush("citation:" + str(part_id), edit_id)
-        elif content_part == "text":
-            pipe.lpush("text:" + str(part_id), edit_id)
-        elif content_part == "name" or content_part == "alternate_name":
-            pipe.lpush("name:" + str(part_id), edit_id)
-        elif content_part == "keyword":
-            pipe.lpush("keyword:" + str(part_id), edit_id)
-        elif content_part == "content_type":
-            pipe.lpush("content_type:" + str(part_id), edit_id)
-        else:
-            raise InputError("Invalid argument(s) provided.",
-                             message="Invalid data provided.",
-                             inputs={"content_part": content_part})
-        pipe.lpush("content:" + str(content_id), edit_id)
-        pipe.hmset("edit:" + str(edit_id), {
-            "edit_id": edit_id,
-            "content_id": content_id,
-            "edit_text": edit_text,
-            "edit_rationale": edit_rationale if edit_rationale else "",
-            "content_part": content_part,
-            "part_id": part_id,
-            "timestamp": timestamp,
-            "start_timestamp": start_timestamp,
-            "author_type": author_type,
-        })
-        if user_id is not None:
-            pipe.hset("edit:" + str(edit_id), "user_id", user_id)
-        pipe.execute()
+    index_keys = [_part_key(content_part, part_id),
+                  "content:" + str(content_id)]
+    edit_dict = {
+        "content_id": content_id,
+        "edit_text": edit_text,
+        "edit_rationale": edit_rationale if edit_rationale else "",
+        "content_part": content_part,
+        "part_id": part_id,
+        "timestamp": timestamp,
+        "start_timestamp": start_timestamp,
+        "author_type": author_type,
+    }
+    if user_id is not None:
+        index_keys.append("user:" + str(user_id))
+        edit_dict["user_id"] = user_id
+    if PACK_EDITS:
+        fields = ["packed", pack_edit(edit_dict)]
+    else:
+        fields = _hash_fields(edit_dict)
+    edit_id = redis.incr("next_edit_id") - 1
+    _store_edit_script(
+        keys=["edit:" + str(edit_id)] + index_keys,
+        args=[edit_id, _score(timestamp)] + fields)
 
     return edit_id
 
@@ -183,28 +519,29 @@ def store_vote(edit_id, voter_id, vote_and_time):
     Args:
         edit_id: Integer.
         voter_id: Integer.
-        vote_and_time: String.
+        vote_and_time: String of the form 'vote; timestamp'.
+    Raises:
+        MissingKeyError: if the edit is not in Redis.
+        DuplicateVoteError: if voter_id already voted on the edit.
+    Returns:
+        Tuple of integers of the form
+        (for vote count, against vote count, total vote count),
+        the tallies of the edit including this vote.
     """
-    with redis.pipeline() as pipe:
-        pipe.exists("edit:" + str(edit_id))
-        pipe.lrange("voter:" + str(), 0, -1)
-        exists, user_votes = pipe.execute()
-    if not exists:
+    response = _store_vote_script(
+        keys=["edit:" + str(edit_id), "votes:" + str(edit_id),
+              "voter:" + str(voter_id), "tally:" + str(edit_id)],
+        args=[edit_id, voter_id, vote_and_time,
+              _score(_parse_timestamp(vote_and_time[3:])),
+              "for" if vote_and_time.startswith("Y") else "against"])
+    if response == -1:
         raise MissingKeyError(key=edit_id, message="Edit " + str(edit_id)
                               + " not found. Either this edit does not exist "
                               "or it has already been accepted.")
-    if edit_id in user_votes:
+    elif response == 0:
         raise DuplicateVoteError(message="You have already voted on this edit. "
                                  "You may only vote once.")
-    else:
-        with redis.pipeline() as pipe:
-            pipe.hsetnx("votes:" + str(edit_id),
-                        voter_id, vote_and_time)
-            pipe.lpush("voter:" + str(voter_id), edit_id)
-            response_list = pipe.execute()
-        if response_list[0] == 0:
-            raise DuplicateVoteError(message="You have already voted on "
-                                     "this edit. You may only vote once.")
+    return tuple(int(tally) if tally is not None else 0 for tally in response)
 
 
 def store_confirm(email, confirmation_id_hash, expire_timestamp):
@@ -214,7 +551,7 @@ def store_confirm(email, confirmation_id_hash, expire_timestamp):
 
 def get_confirm_info(email):
     confirmation_dict = redis.hgetall("user_email:" + str(email))
-    return confirmation_dict
+    return decode_hash("user_email", confirmation_dict)
 
 
 def expire_confirm(email):
@@ -235,38 +572,23 @@ def store_report(content_id, report_text, report_type, admin_id,
     Returns:
         Report ID integer.
     """
-    with redis.pipeline() as pipe:
-        # Get a unique report id and increment it for the next report
-        while True:
-            try:
-                pipe.watch("next_report_id")
-                report_id = int(pipe.get("next_report_id"))
-                next_report_id = report_id + 1
-                pipe.multi()
-                pipe.set("next_report_id", next_report_id).execute()
-            except WatchError:
-                continue
-            except:
-                raise
-            else:
-                break
-        # Now store the report with the report id
-        if author_id is not None:
-            pipe.lpush("user_reports:" + str(author_id), report_id)
-        pipe.lpush("admin_reports:" + str(admin_id), report_id)
-        pipe.lpush("content_reports:" + str(content_id), report_id)
-        pipe.hmset("report:" + str(report_id), {
-            "report_id": report_id,
-            "content_id": content_id,
-            "report_text": report_text,
-            "report_type": report_type,
-            "admin_id": admin_id,
-            "timestamp": timestamp,
-            "author_type": author_type,
-        })
-        if author_id is not None:
-            pipe.hset("report:" + str(report_id), "author_id", author_id)
-        pipe.execute()
+    index_keys = ["admin_reports:" + str(admin_id),
+                  "content_reports:" + str(content_id)]
+    report_dict = {
+        "content_id": content_id,
+        "report_text": report_text,
+        "report_type": report_type,
+        "admin_id": admin_id,
+        "timestamp": timestamp,
+        "author_type": author_type,
+    }
+    if author_id is not None:
+        index_keys.append("user_reports:" + str(author_id))
+        report_dict["author_id"] = author_id
+    report_id = redis.incr("next_report_id") - 1
+    _store_hash_script(
+        keys=["report:" + str(report_id)] + index_keys,
+        args=[report_id, "report_id"] + _hash_fields(report_dict))
 
     return report_id
 
@@ -294,7 +616,7 @@ def get_reports(report_id=None, content_id=None, user_id=None, admin_id=None):
     args = locals()
     if report_id is not None:
         report_dict = redis.hgetall("report:" + str(report_id))
-        return report_dict
+        return decode_hash("report", report_dict)
     elif content_id is not None:
         report_ids = redis.lrange("content_reports:" + str(content_id), 0, -1)
     elif user_id is not None:
@@ -305,12 +627,14 @@ def get_reports(report_id=None, content_id=None, user_id=None, admin_id=None):
         raise InputError("No arguments provided.",
                          message="No data provided.",
                          inputs=args)
+    report_ids = decode_ids(report_ids)
     with redis.pipeline() as pipe:
             for report_id in report_ids:
                 pipe.hgetall("report:" + str(report_id))
             report_dicts = pipe.execute()
 
-    return report_dicts
+    return [decode_hash("report", report_dict)
+            for report_dict in report_dicts]
 
 
 def get_admin_assignments(admin_ids):
@@ -321,7 +645,8 @@ def get_admin_assignments(admin_ids):
         if len(admin_ids) != len(admin_assignments):
             raise RuntimeError      # If this raises on testing will need to recode
 
-    return {admin_ids[i]: admin_assignments[i] for i in range(len(admin_ids))}
+    return {admin_ids[i]: decode_ids(admin_assignments[i])
+            for i in range(len(admin_ids))}
 
 
 def delete_report(report_id):
@@ -339,65 +664,118 @@ def delete_report(report_id):
         pipe.execute()
 
 
+def _edit_index_keys(content_id=None, user_id=None, voter_id=None,
+                     text_id=None, citation_id=None, keyword_id=None,
+                     name_id=None, content_type_id=None):
+    return [prefix + ":" + str(index_id) for prefix, index_id in [
+        ("content", content_id), ("user", user_id), ("voter", voter_id),
+        ("text", text_id), ("citation", citation_id),
+        ("keyword", keyword_id), ("name", name_id),
+        ("content_type", content_type_id)] if index_id is not None]
+
+
+def _max_score(before):
+    return "(" + str(_score(before)) if before is not None else "+inf"
+
+
+def _edit_ids(pipe, key, offset, count, before):
+    if offset or count is not None:
+        return pipe.zrevrangebyscore(key, _max_score(before), "-inf",
+                                     start=offset,
+                                     num=count if count is not None else -1)
+    else:
+        return pipe.zrevrangebyscore(key, _max_score(before), "-inf")
+
+
+def _intersect_edit_ids(keys, offset=0, count=None, before=None):
+    """
+    Args:
+        keys: List of at least two edit index keys.
+        offset: Integer. Defaults to 0.
+        count: Integer. Defaults to None.
+        before: Datetime. Defaults to None.
+    Returns:
+        Tuple of the form (edit count, list of edit IDs), where edit
+        count is the number of edits in every index.
+    """
+    # The voter indexes are scored by voting time, so they are left
+    # out of the scores of the intersection.
+    weights = [0 if key.startswith("voter:") else 1 for key in keys]
+    edit_count, edit_ids = _intersect_edits_script(
+        keys=["edit_intersection"] + keys,
+        args=[_max_score(before), offset, count if count is not None else -1]
+             + weights)
+    return edit_count, decode_ids(edit_ids)
+
+
 def get_edits(content_id=None, content_ids=None, user_id=None, voter_id=None,
               text_id=None, citation_id=None, keyword_id=None, name_id=None,
-              content_type_id=None, only_ids=False):
+              content_type_id=None, only_ids=False, offset=0, count=None,
+              before=None):
     """
     Args:
         content_id: Integer. Defaults to None.
+        content_ids: List of Integers. Defaults to None.
         user_id: Integer. Defaults to None.
         voter_id: Integer. Defaults to None.
         text_id: Integer. Defaults to None.
         citation_id: Integer. Defaults to None.
         keyword_id: Integer. Defaults to None.
-        user_id: Integer. Defaults to None.
+        name_id: Integer. Defaults to None.
         content_type_id: Integer. Defaults to None.
         only_ids: Boolean. Defaults to False. Determines whether to
             return edits or only edit ids.
+        offset: Integer, the number of most recent edits to skip.
+            Defaults to 0.
+        count: Integer, the maximum number of edits to return (for
+            each content piece, if content_ids is provided). Defaults
+            to None, meaning all of them.
+        before: Datetime, only return edits submitted (or voted on,
+            for voter_id alone) before this time. Defaults to None.
     Returns:
-        If only_ids is False and content_ids is None:
+        If only_ids is False:
             Dictionary of the form
             {edit_id1: edit_dict1, edit_id2: edit_dict2, ...}.
         If only_ids is True and content_ids is None:
-            List of integers.
+            List of integers, ordered from most to least recent.
         If only_ids is True and content_ids is not None:
             Dictionary of the form
             {content_id1: List of edit IDs,
              content_id2: List of edit IDS, ...}
+
+    When several of the arguments other than content_ids are provided,
+    only the edits matching all of them are returned. The matching is
+    done in Redis, so only the matching edits are transferred.
     """
     args = locals()
-    if content_id is not None:
-        edit_ids = redis.lrange("content:" + str(content_id), 0, -1)
-    elif content_ids is not None:
+    if content_id is None and content_ids is not None:
         with redis.pipeline() as pipe:
             for content_id in content_ids:
-                pipe.lrange("content:" + str(content_id), 0, -1)
+                _edit_ids(pipe, "content:" + str(content_id),
+                          offset, count, before)
             edit_id_lists = pipe.execute()
+            edit_id_lists = [decode_ids(edit_ids)
+                             for edit_ids in edit_id_lists]
             if only_ids:
                 return {content_id: edit_ids for content_id, edit_ids
                         in zip(content_ids, edit_id_lists)}
             else:
-                raise InputError("Invalid argument(s) provided.",
-                                 message="Invalid data provided.",
-                                 inputs=args)
-    elif user_id is not None:
-        edit_ids = redis.lrange("user:" + str(user_id), 0, -1)
-    elif voter_id is not None:
-        edit_ids = redis.lrange("voter:" + str(voter_id), 0, -1)
-    elif text_id is not None:
-        edit_ids = redis.lrange("text:" + str(text_id), 0, -1)
-    elif citation_id is not None:
-        edit_ids = redis.lrange("citation:" + str(citation_id), 0, -1)
-    elif keyword_id is not None:
-        edit_ids = redis.lrange("keyword:" + str(keyword_id), 0, -1)
-    elif name_id is not None:
-        edit_ids = redis.lrange("name:" + str(name_id), 0, -1)
-    elif content_type_id is not None:
-        edit_ids = redis.lrange("content_type:" + str(content_type_id), 0, -1)
+                edit_ids = [edit_id for edit_ids in edit_id_lists
+                            for edit_id in edit_ids]
     else:
-        raise InputError("No arguments provided.",
-                         message="No data provided.",
-                         inputs=args)
+        keys = _edit_index_keys(content_id, user_id, voter_id, text_id,
+                                citation_id, keyword_id, name_id,
+                                content_type_id)
+        if not keys:
+            raise InputError("No arguments provided.",
+                             message="No data provided.",
+                             inputs=args)
+        elif len(keys) == 1:
+            edit_ids = decode_ids(
+                _edit_ids(redis, keys[0], offset, count, before))
+        else:
+            edit_count, edit_ids = _intersect_edit_ids(
+                keys, offset=offset, count=count, before=before)
     if only_ids:
         return edit_ids
     else:
@@ -406,7 +784,54 @@ def get_edits(content_id=None, content_ids=None, user_id=None, voter_id=None,
                 pipe.hgetall("edit:" + str(edit_id))
             edits = pipe.execute()
 
-        return {edit_id:edit for edit_id, edit in zip(edit_ids, edits)}
+        return {edit_id: decode_edit(edit)
+                for edit_id, edit in zip(edit_ids, edits)}
+
+
+def get_edits_by_id(edit_ids):
+    """
+    Args:
+        edit_ids: List of integers.
+    Returns:
+        Dictionary of the form {edit_id1: edit_dict1, ...}, omitting
+        the edits no longer in Redis.
+    """
+    with redis.pipeline() as pipe:
+        for edit_id in edit_ids:
+            pipe.hgetall("edit:" + str(edit_id))
+        edits = pipe.execute()
+
+    return {edit_id: decode_edit(edit)
+            for edit_id, edit in zip(edit_ids, edits) if edit}
+
+
+def count_edits(content_id=None, user_id=None, voter_id=None, text_id=None,
+                citation_id=None, keyword_id=None, name_id=None,
+                content_type_id=None):
+    """
+    Args:
+        content_id: Integer. Defaults to None.
+        user_id: Integer. Defaults to None.
+        voter_id: Integer. Defaults to None.
+        text_id: Integer. Defaults to None.
+        citation_id: Integer. Defaults to None.
+        keyword_id: Integer. Defaults to None.
+        name_id: Integer. Defaults to None.
+        content_type_id: Integer. Defaults to None.
+    Returns:
+        Integer, the number of validating edits matching all of the
+        arguments provided.
+    """
+    args = locals()
+    keys = _edit_index_keys(**args)
+    if not keys:
+        raise InputError("No arguments provided.",
+                         message="No data provided.",
+                         inputs=args)
+    elif len(keys) == 1:
+        return redis.zcard(keys[0])
+    else:
+        return _intersect_edit_ids(keys, count=0)[0]
 
 
 def get_votes(content_id):
@@ -417,13 +842,235 @@ def get_votes(content_id):
         Dictionary of the form
         {edit_id1: vote_dict1, edit_id2: vote_dict2, ...}.
     """
-    edits_ids = redis.lrange("content:" + str(content_id), 0, -1)
+    edits_ids = decode_ids(redis.zrevrange("content:" + str(content_id),
+                                           0, -1))
     with redis.pipeline() as pipe:
         for edit_id in edits_ids:
             pipe.hgetall("votes:" + str(edit_id))
         votes = pipe.execute()
 
-    return {edit_id:vote for edit_id, vote in zip(edits_ids, votes)}
+    return {edit_id: decode_hash("votes", vote)
+            for edit_id, vote in zip(edits_ids, votes)}
+
+
+def get_tallies(edit_id):
+    """
+    Args:
+        edit_id: Integer.
+    Returns:
+        Tuple of integers of the form
+        (for vote count, against vote count, total vote count).
+    """
+    tallies = redis.hmget("tally:" + str(edit_id), "for", "against", "total")
+    return tuple(int(tally) if tally is not None else 0 for tally in tallies)
+
+
+def claim_edit(edit_id, timeout=600):
+    """
+    Claims a validating edit for accepting or rejecting, so that only
+    one validation of the edit goes ahead at a time.
+
+    Args:
+        edit_id: Integer.
+        timeout: Integer, the number of seconds after which the claim
+            lapses. Defaults to 600.
+    Returns:
+        True if the edit is still validating and was claimed,
+        otherwise False.
+    """
+    return _claim_edit_script(
+        keys=["edit:" + str(edit_id), "claim:" + str(edit_id)],
+        args=[timeout]) == 1
+
+
+def release_claims(edit_ids):
+    """
+    Releases the claims on edits whose validation failed, so that
+    they can be validated again without waiting for the claims to
+    lapse.
+
+    Args:
+        edit_ids: List of integers.
+    """
+    if edit_ids:
+        redis.delete(*["claim:" + str(edit_id) for edit_id in edit_ids])
+
+
+def store_deadlines(deadlines):
+    """
+    Sets the next deadlines of validating edits, at which they are
+    revisited by the validation sweeper.
+
+    Args:
+        deadlines: Dictionary of the form
+            {edit_id1: datetime1, edit_id2: datetime2, ...}.
+    """
+    if deadlines:
+        members = []
+        for edit_id, deadline in deadlines.items():
+            members.extend([_score(deadline), edit_id])
+        redis.execute_command("ZADD", "deadlines", *members)
+
+
+def pop_deadlines(until, count):
+    """
+    Atomically removes and returns the earliest deadlines due by
+    until, so concurrent sweepers never receive the same deadline.
+
+    Args:
+        until: Datetime.
+        count: Integer, the maximum number of deadlines to pop.
+    Returns:
+        List of tuples of the form (edit_id, deadline), in ascending
+        order by deadline.
+    """
+    due = _pop_deadlines_script(keys=["deadlines"],
+                                args=[_score(until), count])
+    return [(int(edit_id), _EPOCH + timedelta(seconds=float(score)))
+            for edit_id, score in zip(due[::2], due[1::2])]
+
+
+def mark_index_dirty(content_id, content_parts, timestamp):
+    """
+    Records in the index outbox that parts of a content piece have
+    changed since it was last written to the search index.
+
+    Args:
+        content_id: Integer.
+        content_parts: List of strings.
+        timestamp: Datetime, when the parts changed.
+    """
+    _mark_index_dirty_script(
+        keys=["index_outbox", "index_dirty:" + str(content_id)],
+        args=[content_id, _score(timestamp)] + list(content_parts))
+
+
+def pop_index_outbox(until, count):
+    """
+    Atomically removes and returns the oldest index outbox records
+    made by until.
+
+    Args:
+        until: Datetime.
+        count: Integer, the maximum number of records to pop.
+    Returns:
+        List of tuples of the form (content_id, timestamp, parts),
+        where timestamp is when the content piece was first marked
+        dirty and parts is a set of strings.
+    """
+    due = decode_ids(redis.zrangebyscore("index_outbox", "-inf",
+                                         _score(until), start=0, num=count))
+    if not due:
+        return []
+    records = _pop_index_outbox_script(
+        keys=["index_outbox"] + ["index_dirty:" + str(content_id)
+                                 for content_id in due],
+        args=due)
+    return [(int(content_id), _EPOCH + timedelta(seconds=float(score)),
+             {_decode_str(part) for part in parts})
+            for content_id, score, parts in records]
+
+
+def get_index_lag(now):
+    """
+    Args:
+        now: Datetime.
+    Returns:
+        Float, the number of seconds the oldest index outbox record
+        has waited, or 0 if the outbox is empty.
+    """
+    oldest = redis.zrange("index_outbox", 0, 0, withscores=True)
+    if not oldest:
+        return 0.0
+    return max(_score(now) - oldest[0][1], 0.0)
+
+
+def get_author_count(content_id):
+    """
+    Args:
+        content_id: Integer.
+    Returns:
+        Integer, the cached number of authors of the content piece, or
+        None if it is not cached.
+    """
+    author_count = redis.get("author_count:" + str(content_id))
+    return int(author_count) if author_count is not None else None
+
+
+def store_author_count(content_id, author_count,
+                       expire_seconds=AUTHOR_COUNT_EXPIRE_SECONDS):
+    redis.set("author_count:" + str(content_id), author_count,
+              ex=expire_seconds)
+
+
+def expire_author_count(content_id):
+    redis.delete("author_count:" + str(content_id))
+
+
+def get_search_generation():
+    """
+    Returns:
+        Tuple of the form (generation, settling), where generation is
+        the integer generation of the search index and settling is a
+        boolean indicating whether it was bumped so recently that the
+        index may not show the write that bumped it yet.
+    """
+    generation, settling = redis.mget("search_generation",
+                                      "search_generation_settling")
+    return (int(generation) if generation is not None else 0,
+            settling is not None)
+
+
+def bump_search_generation(settle_seconds):
+    """
+    Args:
+        settle_seconds: Integer, how long the new generation is
+            reported as settling.
+    Returns:
+        Integer, the new generation.
+    """
+    with redis.pipeline() as pipe:
+        pipe.incr("search_generation")
+        pipe.set("search_generation_settling", 1, ex=settle_seconds)
+        generation, _ = pipe.execute()
+    return generation
+
+
+def get_cached_search(generation, key):
+    """
+    Args:
+        generation: Integer.
+        key: String.
+    Returns:
+        Bytes, the cached search result, or None if it is not cached.
+    """
+    return redis.get("search_cache:" + str(generation) + ":" + key)
+
+
+def store_cached_search(generation, key, result, expire_seconds):
+    redis.set("search_cache:" + str(generation) + ":" + key, result,
+              ex=expire_seconds)
+
+
+def store_search_cache_stats(counts):
+    """
+    Args:
+        counts: Dictionary of the form {counter name: integer, ...},
+            added to the counters shared by all processes.
+    """
+    with redis.pipeline() as pipe:
+        for name, count in counts.items():
+            pipe.hincrby("search_cache_stats", name, count)
+        pipe.execute()
+
+
+def get_search_cache_stats():
+    """
+    Returns:
+        Dictionary of the form {counter name: integer, ...}.
+    """
+    return {_decode_str(name): int(count) for name, count
+            in redis.hgetall("search_cache_stats").items()}
 
 
 def get_validation_data(edit_id):
@@ -438,7 +1085,8 @@ def get_validation_data(edit_id):
         pipe.hgetall("votes:" + str(edit_id))
         edit, votes = pipe.execute()
 
-    return {"edit": edit, "votes": votes}
+    return {"edit": decode_edit(edit),
+            "votes": decode_hash("votes", votes)}
 
 
 def delete_validation_data(content_id, edit_id, user_id,
@@ -452,27 +1100,122 @@ def delete_validation_data(content_id, edit_id, user_id,
         content_part: String, expects 'text', 'citation', 'keyword',
             'name', 'alternate_name', or 'content_type'.
     """
-    voters = get_validation_data(edit_id)["votes"]
-    with redis.pipeline() as pipe:
-        pipe.lrem("user:" + str(user_id), 0, edit_id)
-        pipe.lrem("voter:" + str(user_id), 0, edit_id)
-        if content_part == "text":
-            pipe.lrem("text:" + str(part_id), 0, edit_id)
-        elif content_part == "citation":
-            pipe.lrem("citation:" + str(part_id), 0, edit_id)
-        elif content_part == "name" or content_part == "alternate_name":
-            pipe.lrem("name:" + str(part_id), 0, edit_id)
-        elif content_part == "keyword":
-            pipe.lrem("keyword:" + str(part_id), 0, edit_id)
-        elif content_part == "content_type":
-            pipe.lrem("content_type:" + str(part_id), 0, edit_id)
-        else:
-            raise InputError("Invalid argument(s) provided.",
-                             message="Invalid data provided.",
-                             inputs={"content_part": content_part})
-        pipe.lrem("content:" + str(content_id), 0, edit_id)
-        pipe.delete("edit:" + str(edit_id))
-        pipe.delete("votes:" + str(edit_id))
-        for voter_id in voters:
-            pipe.lrem("voter:" + str(voter_id), 0, edit_id)
-        pipe.execute()
+    index_keys = [_part_key(content_part, part_id),
+                  "content:" + str(content_id)]
+    if user_id is not None:
+        index_keys.append("user:" + str(user_id))
+    while True:
+        # The voters are read first so that their indexes can be passed
+        # as keys; the script rejects the read if a vote came in since.
+        voter_ids = decode_ids(redis.hkeys("votes:" + str(edit_id)))
+        voter_count = _delete_validation_script(
+            keys=["edit:" + str(edit_id), "votes:" + str(edit_id),
+                  "tally:" + str(edit_id), "deadlines"] + index_keys +
+                 ["voter:" + str(voter_id) for voter_id in voter_ids],
+            args=[edit_id, len(voter_ids)])
+        if voter_count != -1:
+            break
+
+
+def _migrate_list_indexes(scan_count=1000):
+    """
+    Converts the edit indexes stored as lists, before they became
+    sorted sets, in place. Only needs to be called once.
+
+    Requires downtime: stop the application, run this, then start the
+    version that reads sorted sets. Code from before the change reads
+    the indexes as lists and code after it as sorted sets, so either
+    one hits WRONGTYPE errors on the indexes in the other format. Each
+    index is still swapped in a WATCH transaction, retried if the index
+    changes, so a straggling write cannot be lost.
+
+    Args:
+        scan_count: Integer, the number of keys to scan per SCAN call.
+            Defaults to 1000.
+    Returns:
+        Integer, the number of indexes converted.
+    """
+    converted_count = 0
+    for prefix in EDIT_INDEX_PREFIXES:
+        for key in redis.scan_iter(match=prefix + ":*", count=scan_count):
+            if isinstance(key, bytes):
+                key = key.decode("utf-8")
+            with redis.pipeline() as pipe:
+                while True:
+                    try:
+                        pipe.watch(key)
+                        if pipe.type(key) != b"list":
+                            break
+                        edit_ids = decode_ids(pipe.lrange(key, 0, -1))
+                        with redis.pipeline(transaction=False) as reader:
+                            for edit_id in edit_ids:
+                                if prefix == "voter":
+                                    reader.hget("votes:" + str(edit_id),
+                                                key.split(":", 1)[1])
+                                else:
+                                    reader.hget("edit:" + str(edit_id),
+                                                "timestamp")
+                            timestamps = reader.execute()
+                        members = []
+                        for edit_id, timestamp in zip(edit_ids, timestamps):
+                            if timestamp is None:
+                                continue    # Edit no longer validating
+                            if prefix == "voter":
+                                timestamp = _decode_datetime(timestamp[3:])
+                            else:
+                                timestamp = _decode_datetime(timestamp)
+                            members.extend([_score(timestamp), edit_id])
+                        pipe.multi()
+                        pipe.delete(key)
+                        if members:
+                            pipe.execute_command("ZADD", key, *members)
+                        pipe.execute()
+                    except WatchError:
+                        continue
+                    else:
+                        converted_count += 1
+                        break
+    return converted_count
+
+
+def _migrate_vote_tallies(scan_count=1000):
+    """
+    Builds the vote tallies of the edits voted on before votes were
+    tallied as they were stored. Each tally is written in a
+    transaction that is retried if a vote arrives meanwhile, so it can
+    be run while the application is serving. Only needs to be called
+    once.
+
+    Args:
+        scan_count: Integer, the number of keys to scan per SCAN call.
+            Defaults to 1000.
+    Returns:
+        Integer, the number of tallies written.
+    """
+    tally_count = 0
+    for key in redis.scan_iter(match="votes:*", count=scan_count):
+        if isinstance(key, bytes):
+            key = key.decode("utf-8")
+        tally_key = "tally:" + key.split(":", 1)[1]
+        with redis.pipeline() as pipe:
+            while True:
+                try:
+                    pipe.watch(key, tally_key)
+                    votes = pipe.hvals(key)
+                    if not votes:
+                        break
+                    for_count = len([True for vote in votes
+                                     if vote.startswith(b"Y")])
+                    pipe.multi()
+                    pipe.hmset(tally_key, {
+                        "for": for_count,
+                        "against": len(votes) - for_count,
+                        "total": len(votes),
+                    })
+                    pipe.execute()
+                except WatchError:
+                    continue
+                else:
+                    tally_count += 1
+                    break
+    return tally_count
@@ -37,7 +37,8 @@ class AuthorVote:
 
     Class Methods:
         unpack_vote_summary, _retrieve_from_storage,
-        _retrieve_from_redis, bulk_retrieve, get_vote_summary
+        _retrieve_from_redis, _closed_votes, closed_tallies,
+        bulk_retrieve, get_vote_summary
     """
 
     storage_handler = orm.StorageHandler()
@@ -136,6 +137,73 @@ class AuthorVote:
         else:
             return vote_dict
 
+    @classmethod
+    def _closed_votes(cls, vote_objects, validation_status):
+        """
+        Args:
+            vote_objects: List of Votes.
+            validation_status: String, expects 'accepted' or 'rejected'.
+        Returns:
+            Dictionary of the form
+            {edit_id1: list1 of AuthorVotes,
+             edit_id2: list2 of AuthorVotes,
+             ...}
+        """
+        rows = cls.storage_handler.call(
+            select.get_voter_votes,
+            [vote_object.vote_id for vote_object in vote_objects
+             if vote_object.for_count is not None])
+        voter_votes = {}
+        for vote_id, voter_id, vote, timestamp in rows:
+            voter_votes.setdefault(vote_id, []).append(
+                (voter_id, vote, timestamp))
+        votes = {}
+        for vote_object in vote_objects:
+            if validation_status == "accepted":
+                edit_id = vote_object.accepted_edit_id
+            else:
+                edit_id = vote_object.rejected_edit_id
+            if vote_object.for_count is None:
+                # Closed before individual votes were stored.
+                voter_votes[vote_object.vote_id] = [
+                    (key, value[0], dateparse.parse(value[3:]))
+                    for key, value in cls.unpack_vote_summary(
+                        vote_object.vote).items()]
+            votes[edit_id] = [
+                AuthorVote("ended", edit_id, vote, voter_id,
+                           timestamp=timestamp,
+                           close_timestamp=vote_object.close_timestamp)
+                for voter_id, vote, timestamp
+                in voter_votes.get(vote_object.vote_id, [])]
+        return votes
+
+    @classmethod
+    def closed_tallies(cls, validation_status, content_id=None,
+                       edit_ids=None):
+        """
+        Args:
+            validation_status: String, expects 'accepted' or 'rejected'.
+            content_id: Integer. Defaults to None.
+            edit_ids: List of Integers. Defaults to None.
+        Returns:
+            Dictionary of the form
+            {edit_id1: {"for_count": integer, "against_count": integer,
+                        "close_timestamp": datetime},
+             ...}
+        """
+        try:
+            tallies = cls.storage_handler.call(
+                select.get_vote_tallies, validation_status,
+                content_id=content_id, edit_ids=edit_ids)
+        except:
+            raise
+        else:
+            return {edit_id: {"for_count": for_count,
+                              "against_count": against_count,
+                              "close_timestamp": close_timestamp}
+                    for edit_id, for_count, against_count, close_timestamp
+                    in tallies}
+
     @classmethod
     def bulk_retrieve(cls, vote_status, edit_id=None, vote_id=None,
                       content_id=None, validation_status=None):
@@ -185,50 +253,20 @@ class AuthorVote:
                 if validation_status == "accepted":
                     vote_objects = cls.storage_handler.call(
                         select.get_accepted_votes, content_id=content_id)
-                    votes = {}
-                    for vote_object in vote_objects:
-                        edit_id = vote_object.accepted_edit_id
-                        vote_dict = cls.unpack_vote_summary(vote_object.vote)
-                        vote_list = [AuthorVote(vote_status, edit_id, value[0],
-                                     key, timestamp=dateparse.parse(value[3:]),
-                                     close_timestamp=vote_object.close_timestamp)
-                                     for key, value in vote_dict.items()]
-                        votes[edit_id] = vote_list
                 elif validation_status == "rejected":
                     vote_objects = cls.storage_handler.call(
                         select.get_rejected_votes, content_id=content_id)
-                    votes = {}
-                    for vote_object in vote_objects:
-                        edit_id = vote_object.rejected_edit_id
-                        vote_dict = cls.unpack_vote_summary(vote_object.vote)
-                        vote_list = [AuthorVote(vote_status, edit_id, value[0],
-                                     key, timestamp=dateparse.parse(value[3:]),
-                                     close_timestamp=vote_object.close_timestamp)
-                                     for key, value in vote_dict.items()]
-                        votes[edit_id] = vote_list
                 else:
                     raise InputError("Invalid argument(s) provided.",
                         message="Invalid data provided.",
                         inputs={"validation_status": validation_status})
-                return votes
+                return cls._closed_votes(vote_objects, validation_status)
             else:
                 raise InputError("Invalid argument(s) provided.",
                                  message="Invalid data provided.",
                                  inputs=args)
-            vote_dict = cls.unpack_vote_summary(vote_object.vote)
-            if edit_id is None:
-                if validation_status == "accepted":
-                    edit_id = vote_object.accepted_edit_id
-                elif validation_status == "rejected":
-                    edit_id = vote_object.rejected_edit_id
-                else:
-                    raise InputError("Invalid argument(s) provided.",
-                        message="Invalid data provided.",
-                        inputs={"validation_status": validation_status})
-            votes = [AuthorVote(vote_status, edit_id, value[0],
-                                key, timestamp=dateparse.parse(value[3:]),
-                                close_timestamp=vote_object.close_timestamp)
-                     for key, value in vote_dict.items()]
+            votes = list(cls._closed_votes(
+                [vote_object], validation_status).values())[0]
         else:
             raise InputError("Invalid argument(s) provided.",
                              message="Invalid data provided.",
@@ -236,8 +274,11 @@ class AuthorVote:
 
         return votes
 
-    def check_vote_order(self):
+    def check_vote_order(self, edit=None):
         """
+        Args:
+            edit: The validating Edit voted on, if already retrieved.
+                Defaults to None, in which case it is read from Redis.
         Returns:
             Tuple of the form (bool, integer), where bool is True if
             and only if this vote is the earliest (chronologically)
@@ -248,8 +289,9 @@ class AuthorVote:
             to keep logic within method.
         """
         from . import edit as edit_api  # Here to resolve circular imports
-        edit = edit_api.Edit(edit_id=self.edit_id,
-                             validation_status="validating")
+        if edit is None:
+            edit = edit_api.Edit(edit_id=self.edit_id,
+                                 validation_status="validating")
         if (edit.content_part == "name" or
                 edit.content_part == "alternate_name"):
             edit_ids = edit_api.Edit.bulk_retrieve(
@@ -280,19 +322,26 @@ class AuthorVote:
     def save(self):
         if self.vote_status != "in-progress":
             raise NotImplementedError
-        valid_vote, edit_to_vote_on = self.check_vote_order()
+        from . import edit as edit_api  # Here to resolve circular imports
+        edit = edit_api.Edit(edit_id=self.edit_id,
+                             validation_status="validating")
+        valid_vote, edit_to_vote_on = self.check_vote_order(edit=edit)
         if not valid_vote:
             return edit_to_vote_on
         else:
             try:
-                redis_api.store_vote(self.edit_id, self.author.user_id,
-                                     self.vote + "; " + str(self.timestamp))
+                tallies = redis_api.store_vote(
+                    self.edit_id, self.author.user_id,
+                    self.vote + "; " + str(self.timestamp))
             except DuplicateVoteError:
                 raise
             except MissingKeyError as e:
                 raise VoteStatusError(exception=e, message=e.message)
             except:
                 raise
+            # Only validate once this vote lets the edit be decided.
+            if edit.decision_possible(tallies):
+                edit.validate.apply_async()
 
     @classmethod
     def votes_needed(cls, user_id, content_ids=None):
@@ -0,0 +1,190 @@
+"""
+Search Result Cache
+
+Caches the results of the search query functions in two levels, a
+per-process LRU cache in front of Redis. Cached results are keyed by
+the generation of the index, which the index write functions bump, so
+a result is never served once a write may have changed it.
+
+Functions:
+
+    cached, normalize_query, bump_generation, get_cache_stats,
+    clear_local_cache
+"""
+
+import json
+import hashlib
+import inspect
+import threading
+from collections import OrderedDict
+from functools import wraps
+
+from Knowledge_Database_App.content import redis_api
+
+
+# The maximum number of results held by each process.
+LOCAL_CACHE_SIZE = 1024
+
+# How long, in seconds, Redis holds a cached result.
+CACHE_EXPIRE_SECONDS = 300
+
+# How long, in seconds, after a bump results are left uncached, as the
+# index only shows a write once it is refreshed, every second.
+SETTLE_SECONDS = 2
+
+# The number of lookups counted by a process before its counts are
+# added to the counters shared by all processes.
+STATS_FLUSH_INTERVAL = 1000
+
+_STAT_NAMES = ["local_hits", "redis_hits", "misses"]
+
+_lock = threading.Lock()
+_local_cache = OrderedDict()
+_local_stats = dict.fromkeys(_STAT_NAMES, 0)
+_unflushed_stats = dict.fromkeys(_STAT_NAMES, 0)
+
+
+def normalize_query(query_string):
+    """
+    Args:
+        query_string: String.
+    Returns:
+        The query string lowercased, with runs of whitespace collapsed,
+        which the analyzers of the index treat the same way.
+    """
+    return " ".join(query_string.lower().split())
+
+
+def bump_generation():
+    """
+    Called after each write to the index, so that results cached
+    before it are no longer served.
+
+    Returns:
+        Integer, the new generation.
+    """
+    return redis_api.bump_search_generation(SETTLE_SECONDS)
+
+
+def _jsonable(value):
+    # Converts the AttrDicts and AttrLists of elasticsearch_dsl hits.
+    if hasattr(value, "to_dict"):
+        return value.to_dict()
+    return list(value)
+
+
+def _count(stat_name):
+    with _lock:
+        _local_stats[stat_name] += 1
+        _unflushed_stats[stat_name] += 1
+        if sum(_unflushed_stats.values()) < STATS_FLUSH_INTERVAL:
+            return
+        counts = dict(_unflushed_stats)
+        for name in _STAT_NAMES:
+            _unflushed_stats[name] = 0
+    redis_api.store_search_cache_stats(counts)
+
+
+def _local_get(cache_key):
+    with _lock:
+        try:
+            result = _local_cache[cache_key]
+        except KeyError:
+            return None
+        _local_cache.move_to_end(cache_key)
+        return result
+
+
+def _local_set(cache_key, result):
+    with _lock:
+        _local_cache[cache_key] = result
+        _local_cache.move_to_end(cache_key)
+        while len(_local_cache) > LOCAL_CACHE_SIZE:
+            _local_cache.popitem(last=False)
+
+
+def cached(normalize=None):
+    """
+    Decorator caching the results of a search query function.
+
+    Args:
+        normalize: Dictionary of the form {argument name: function},
+            the functions normalizing the values of the arguments
+            before they key the cache and are passed on. Defaults to
+            None.
+    Returns:
+        The decorator.
+    """
+    if normalize is None:
+        normalize = {}
+
+    def decorator(function):
+        signature = inspect.signature(function)
+
+        @wraps(function)
+        def wrapper(*args, **kwargs):
+            arguments = signature.bind(*args, **kwargs)
+            arguments.apply_defaults()
+            for name, normalizer in normalize.items():
+                arguments.arguments[name] = normalizer(
+                    arguments.arguments[name])
+            key = hashlib.sha1(json.dumps(
+                [function.__name__, list(arguments.arguments.items())]
+            ).encode("utf-8")).hexdigest()
+            generation, settling = redis_api.get_search_generation()
+            cache_key = (generation, key)
+            result = _local_get(cache_key)
+            if result is not None:
+                _count("local_hits")
+                return json.loads(result)
+            result = redis_api.get_cached_search(generation, key)
+            if result is not None:
+                result = result.decode("utf-8")
+                _local_set(cache_key, result)
+                _count("redis_hits")
+                return json.loads(result)
+            result = json.dumps(
+                function(*arguments.args, **arguments.kwargs),
+                default=_jsonable)
+            _count("misses")
+            if not settling:
+                redis_api.store_cached_search(generation, key, result,
+                                              CACHE_EXPIRE_SECONDS)
+                _local_set(cache_key, result)
+            return json.loads(result)
+
+        return wrapper
+
+    return decorator
+
+
+def get_cache_stats(shared=False):
+    """
+    Args:
+        shared: Boolean, return the counts of all processes, as last
+            flushed, rather than this process's. Defaults to False.
+    Returns:
+        Dictionary of the form
+
+        {
+            "local_hits": int,
+            "redis_hits": int,
+            "misses": int,
+            "hit_ratio": float or None
+        }
+    """
+    if shared:
+        stats = dict.fromkeys(_STAT_NAMES, 0)
+        stats.update(redis_api.get_search_cache_stats())
+    else:
+        with _lock:
+            stats = dict(_local_stats)
+    lookups = sum(stats[name] for name in _STAT_NAMES)
+    stats["hit_ratio"] = ((stats["local_hits"] + stats["redis_hits"]) /
+                          lookups if lookups else None)
+    return stats
+
+
+def clear_local_cache():
+    with _lock:
+        _local_cache.clear()
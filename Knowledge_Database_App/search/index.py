@@ -14,29 +14,70 @@ Exceptions:
 
 Functions:
 
-    index_content_piece, update_content_piece, remove_content_piece
+    index_content_piece, remove_content_piece, queue_update,
+    flush_outbox, get_outbox_lag
 """
 
+from datetime import datetime, timedelta
+
 from elasticsearch import NotFoundError
-from elasticsearch_dsl import (DocType, String, Completion,
+from elasticsearch.helpers import bulk
+from elasticsearch_dsl import (DocType, String, Integer, Completion,
                                Index, analyzer, token_filter)
 from elasticsearch_dsl.connections import connections
 
+from Knowledge_Database_App.storage import (orm_core as orm,
+                                            select_queries as select)
 from Knowledge_Database_App.storage.exceptions import InputError
+from Knowledge_Database_App.content import redis_api
+from Knowledge_Database_App.content.celery_app import celery_app
 from Knowledge_Database_App.content.redis_api import decode_response
+from .cache import bump_generation
 
 
 KDB_cluster_url = "localhost:9200"
 connections.create_connection(hosts=[KDB_cluster_url])
+# The alias searched and written through. It points at a versioned
+# index, so that search.reindex can move it to a rebuilt one.
 content = Index("content")
 
+# How long, in seconds, the outbox holds a content piece's changes
+# before writing them to the index, so that bursts of changes to one
+# piece are written together.
+OUTBOX_COALESCE_SECONDS = 2
+
+# The maximum number of content pieces written per bulk request.
+OUTBOX_BATCH_SIZE = 500
+
+# How many times a partial update is retried when it conflicts with a
+# concurrent write to the same document.
+RETRY_ON_CONFLICT = 3
+
+storage_handler = orm.StorageHandler()
+
+
+def versioned_index_name(timestamp):
+    """
+    Args:
+        timestamp: Datetime.
+    Returns:
+        String, the name of the index behind the alias built at
+        timestamp.
+    """
+    return content._name + "_" + timestamp.strftime("%Y%m%d%H%M%S")
+
 
 def _create_index():
-    content.create()
+    versioned_index = content.clone(versioned_index_name(datetime.utcnow()))
+    versioned_index.aliases(**{content._name: {}})
+    versioned_index.create()
 
 
 def _delete_index():
-    content.delete(ignore=404)
+    client = connections.get_connection()
+    client.indices.delete(index=content._name + "_*", ignore=404)
+    # An index built before aliases were used holds the name itself.
+    client.indices.delete(index=content._name, ignore=404)
 
 
 bigram_analyzer = analyzer(
@@ -55,6 +96,8 @@ bigram_analyzer = analyzer(
 class SearchableContentPiece(DocType):
     """
     Attributes:
+        content_id: Integer, the document's ID, also stored as a field
+            so that results can be sorted by it.
         name: String.
         alternate_names: List of strings.
         text: String.
@@ -62,6 +105,7 @@ class SearchableContentPiece(DocType):
         keywords: List of strings.
         citations: List of strings.
     """
+    content_id = Integer()
     name = String(
         fields={"raw": String(index="not_analyzed")}
     )
@@ -120,7 +164,8 @@ def index_content_piece(content_id, name_string, alternate_name_strings,
         keyword_strings: List of strings.
         citation_strings: List of strings.
     """
-    content_piece = SearchableContentPiece(name=name_string,
+    content_piece = SearchableContentPiece(content_id=content_id,
+        name=name_string,
         alternate_names=alternate_name_strings, text=text_string,
         content_type=content_type_string, keywords=keyword_strings,
         citations=citation_strings)
@@ -136,89 +181,194 @@ def index_content_piece(content_id, name_string, alternate_name_strings,
     content_piece.citations_suggest = {"input": citation_strings}
     content_piece.meta.id = content_id
     content_piece.save()
+    bump_generation()
 
 
-def add_to_content_piece(content_id, content_part, part_string):
+def _part_fields(content_id, content_part, part):
     """
     Args:
         content_id: Integer.
-        content_part: String, accepts 'alternate_name', 'keyword',
-            or 'citation'.
-        part_string: String.
+        content_part: String, accepts 'name', 'alternate_name', 'text',
+            'content_type', 'keyword', or 'citation'.
+        part: String, or list of strings for 'alternate_name',
+            'keyword', and 'citation'.
+    Returns:
+        Dictionary of the document fields holding the content part.
     """
-    try:
-        content_piece = SearchableContentPiece.get(id=content_id)
-    except NotFoundError as e:
-        raise IndexAccessError(str(e))
+    if content_part == "name":
+        return {
+            "name": part,
+            "name_suggest": {
+                "input": part,
+                "payload": {"content_id": content_id},
+            },
+        }
+    elif content_part == "alternate_name":
+        return {
+            "alternate_names": part,
+            "alternate_names_suggest": {
+                "input": part,
+                "payload": {"content_id": content_id},
+            },
+        }
+    elif content_part == "text":
+        return {"text": part}
+    elif content_part == "content_type":
+        return {"content_type": part}
+    elif content_part == "keyword":
+        return {"keywords": part, "keywords_suggest": {"input": part}}
+    elif content_part == "citation":
+        return {"citations": part, "citations_suggest": {"input": part}}
     else:
-        if content_part == "alternate_name":
-            content_piece.alternate_names.append(part_string)
-            content_piece.alternate_names_suggest["input"].append(part_string)
-        elif content_part == "keyword":
-            content_piece.keywords.append(part_string)
-            content_piece.keywords_suggest["input"].append(part_string)
-        elif content_part == "citation":
-            content_piece.citations.append(part_string)
-            content_piece.citations_suggest["input"].append(part_string)
-        else:
-            raise InputError("Invalid argument(s) provided.",
-                             message="Invalid data provided.",
-                             inputs={"content_part": content_part})
-        content_piece.save()
-
-
-def update_content_piece(content_id, content_part, part_string=None,
-                         part_strings=None):
+        raise InputError("Invalid argument(s) provided.",
+                         message="Invalid data provided.",
+                         inputs={"content_part": content_part})
+
+
+def remove_content_piece(content_id):
     """
     Args:
         content_id: Integer.
-        content_part: String, accepts 'name', 'alternate_name', 'text',
-            'content_type', 'keyword', or 'citation'.
-        part_string: String.
-        part_strings: List of strings.
     """
     try:
-        content_piece = SearchableContentPiece.get(id=content_id)
+        connections.get_connection().delete(
+            index=content._name, doc_type=SearchableContentPiece._doc_type.name,
+            id=content_id)
     except NotFoundError as e:
         raise IndexAccessError(str(e))
-    else:
-        if content_part == "name":
-            content_piece.name = part_string
-            content_piece.name_suggest = {
-                "input": part_string,
-                "payload": {"content_id": content_id}
-            }
-        elif content_part == "alternate_name":
-            content_piece.alternate_names = part_strings
-            content_piece.alternate_names_suggest = {
-                "input": part_strings,
-                "payload": {"content_id": content_id}
-            }
-        elif content_part == "text":
-            content_piece.text = part_string
-        elif content_part == "content_type":
-            content_piece.content_type = part_string
-        elif content_part == "keyword":
-            content_piece.keywords = part_strings
-            content_piece.keywords_suggest = {"input": part_strings}
-        elif content_part == "citation":
-            content_piece.citations = part_strings
-            content_piece.citations_suggest = {"input": part_strings}
-        else:
-            raise InputError("Invalid argument(s) provided.",
-                             message="Invalid data provided.",
-                             inputs={"content_part": content_part})
-        content_piece.save()
+    bump_generation()
 
 
-def remove_content_piece(content_id):
+# The keys of the dictionaries returned by select.get_searchable_parts
+# holding each content part.
+_SEARCHABLE_PARTS = {
+    "name": "name",
+    "alternate_name": "alternate_names",
+    "text": "text",
+    "content_type": "content_type",
+    "keyword": "keywords",
+    "citation": "citations",
+}
+
+
+def _document(content_id, parts, content_parts=None):
     """
     Args:
         content_id: Integer.
+        parts: Dictionary, as returned for the content piece by
+            select.get_searchable_parts.
+        content_parts: Iterable of strings, the content parts to
+            include. Defaults to None, in which case all are included.
+    Returns:
+        Dictionary of document fields.
     """
-    try:
-        content_piece = SearchableContentPiece.get(id=content_id)
-    except NotFoundError as e:
-        raise IndexAccessError(str(e))
+    if content_parts is None:
+        content_parts = _SEARCHABLE_PARTS
+    document = {"content_id": content_id}
+    for content_part in content_parts:
+        document.update(_part_fields(content_id, content_part,
+                                     parts[_SEARCHABLE_PARTS[content_part]]))
+    return document
+
+
+def queue_update(content_id, content_parts):
+    """
+    Records changes to a content piece in the index outbox, to be
+    written to the index by flush_outbox, once the current unit of
+    work commits.
+
+    Args:
+        content_id: Integer.
+        content_parts: List of strings, the changed content parts, or
+            ['all'] for a new content piece or ['deleted'] for a
+            deleted one.
+    """
+    orm.on_commit(lambda: redis_api.mark_index_dirty(
+        content_id, content_parts, datetime.utcnow()))
+
+
+def _outbox_action(content_id, dirty_parts, parts):
+    action = {
+        "_index": content._name,
+        "_type": SearchableContentPiece._doc_type.name,
+        "_id": content_id,
+    }
+    if parts is None or parts["deleted_timestamp"] is not None:
+        action["_op_type"] = "delete"
+    elif "all" in dirty_parts:
+        action["_op_type"] = "index"
+        action["_source"] = _document(content_id, parts)
     else:
-        content_piece.delete()
+        action["_op_type"] = "update"
+        action["_retry_on_conflict"] = RETRY_ON_CONFLICT
+        action["doc"] = _document(content_id, parts, dirty_parts)
+    return action
+
+
+@celery_app.task(name="index.flush_outbox")
+def flush_outbox(coalesce_seconds=OUTBOX_COALESCE_SECONDS,
+                 batch_size=OUTBOX_BATCH_SIZE):
+    """
+    Run periodically by celery beat. Writes the content pieces changed
+    more than coalesce_seconds ago to the index with bulk requests,
+    each piece once with all of its changed parts, as read from
+    Postgres. Pieces that fail to be written are put back in the
+    outbox once the flush is done, to be retried by the next one.
+
+    Args:
+        coalesce_seconds: Integer. Defaults to OUTBOX_COALESCE_SECONDS.
+        batch_size: Integer. Defaults to OUTBOX_BATCH_SIZE.
+    Returns:
+        Dictionary of the form {'flushed': integer, 'lag': float},
+        where lag is the number of seconds the oldest change still in
+        the outbox has waited.
+    """
+    until = datetime.utcnow() - timedelta(seconds=coalesce_seconds)
+    flushed_count = 0
+    retries = []
+    while True:
+        records = redis_api.pop_index_outbox(until, batch_size)
+        if not records:
+            break
+        try:
+            parts = storage_handler.call(
+                select.get_searchable_parts,
+                [content_id for content_id, timestamp, dirty_parts in records])
+            dirty = {content_id: (timestamp, dirty_parts)
+                     for content_id, timestamp, dirty_parts in records}
+            actions = [_outbox_action(content_id, dirty_parts,
+                                      parts.get(content_id))
+                       for content_id, timestamp, dirty_parts in records]
+            flushed, errors = bulk(connections.get_connection(), actions,
+                                   raise_on_error=False)
+        except:
+            for content_id, timestamp, dirty_parts in records + retries:
+                redis_api.mark_index_dirty(content_id, dirty_parts, timestamp)
+            raise
+        for error in errors:
+            op_type, result = list(error.items())[0]
+            content_id = int(result["_id"])
+            timestamp, dirty_parts = dirty[content_id]
+            if result.get("status") == 404:
+                if op_type == "delete":
+                    continue    # Never indexed
+                # Not indexed yet, so index the whole content piece.
+                dirty_parts = {"all"}
+            # Put back only after the loop, as the timestamp is still
+            # before until and the piece would be popped again at once.
+            retries.append((content_id, timestamp, dirty_parts))
+        if flushed:
+            bump_generation()
+        flushed_count += flushed
+    for content_id, timestamp, dirty_parts in retries:
+        redis_api.mark_index_dirty(content_id, dirty_parts, timestamp)
+    return {"flushed": flushed_count, "lag": get_outbox_lag()}
+
+
+def get_outbox_lag():
+    """
+    Returns:
+        Float, the number of seconds the oldest change in the index
+        outbox has waited to be written to the index.
+    """
+    return redis_api.get_index_lag(datetime.utcnow())
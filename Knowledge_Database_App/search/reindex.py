@@ -0,0 +1,168 @@
+"""
+Search Reindexing
+
+Rebuilds the search index from Postgres without taking search down.
+Documents are written to a new index named with the time it was
+built, which the 'content' alias is then moved to in one step.
+Run with
+
+    python -m Knowledge_Database_App.search.reindex [processes]
+
+Functions:
+
+    reindex
+"""
+
+import sys
+from datetime import datetime
+from itertools import islice
+from multiprocessing import Pool
+from timeit import default_timer
+
+from elasticsearch.helpers import parallel_bulk
+from elasticsearch_dsl import Index
+from elasticsearch_dsl.connections import connections
+
+from Knowledge_Database_App.storage import (orm_core as orm,
+                                            select_queries as select)
+from Knowledge_Database_App.content import redis_api
+from . import index
+from .cache import bump_generation
+
+
+ALIAS = "content"
+
+# Index settings while the documents are loaded, and once they are.
+LOADING_SETTINGS = {"refresh_interval": "-1", "number_of_replicas": 0}
+SERVING_SETTINGS = {"refresh_interval": "1s", "number_of_replicas": 1}
+
+
+def _stream_parts(batch_size):
+    """
+    Yields dictionaries of the form {content_id: part_dict, ...},
+    holding up to batch_size content pieces each, as returned by
+    select.get_searchable_parts.
+    """
+    id_session = orm.start_session()
+    parts_session = orm.start_session()
+    try:
+        content_ids = select.stream_content_ids(batch_size=batch_size,
+                                                session=id_session)
+        while True:
+            batch_ids = list(islice(content_ids, batch_size))
+            if not batch_ids:
+                break
+            yield select.get_searchable_parts(batch_ids,
+                                              session=parts_session)
+    finally:
+        id_session.close()
+        parts_session.close()
+
+
+def _build_actions(index_and_parts):
+    """
+    Run in the worker processes.
+
+    Args:
+        index_and_parts: Tuple of the form (index name, parts), where
+            parts is a dictionary returned by select.get_searchable_parts.
+    Returns:
+        List of bulk index actions.
+    """
+    index_name, parts = index_and_parts
+    doc_type = index.SearchableContentPiece._doc_type.name
+    return [{"_op_type": "index", "_index": index_name, "_type": doc_type,
+             "_id": content_id,
+             "_source": index._document(content_id, piece_parts)}
+            for content_id, piece_parts in parts.items()]
+
+
+def _swap_alias(client, index_name):
+    """
+    Points the alias at index_name alone.
+
+    Returns:
+        List of the names of the indexes the alias pointed to before.
+    """
+    if client.indices.exists_alias(name=ALIAS):
+        old_index_names = list(client.indices.get_alias(name=ALIAS))
+    else:
+        old_index_names = []
+        if client.indices.exists(index=ALIAS):
+            # An index built before aliases were used holds the name,
+            # so search is briefly unavailable while it is replaced.
+            client.indices.delete(index=ALIAS)
+    actions = [{"remove": {"index": old_index_name, "alias": ALIAS}}
+               for old_index_name in old_index_names]
+    actions.append({"add": {"index": index_name, "alias": ALIAS}})
+    client.indices.update_aliases(body={"actions": actions})
+    return old_index_names
+
+
+def reindex(processes=None, batch_size=500, thread_count=4,
+            delete_old=False):
+    """
+    Indexes every content piece into a new index, moves the alias to
+    it, and queues the content pieces changed meanwhile to be written
+    again by the index outbox.
+
+    Args:
+        processes: Integer, the number of processes building
+            documents. Defaults to None, meaning one per CPU.
+        batch_size: Integer, the number of content pieces read from
+            Postgres, and sent to Elasticsearch, at a time.
+            Defaults to 500.
+        thread_count: Integer, the number of concurrent bulk requests.
+            Defaults to 4.
+        delete_old: Boolean, whether to delete the indexes the alias
+            pointed to before. Defaults to False.
+    Returns:
+        Dictionary of the form
+        {'index': string, 'documents': integer, 'seconds': float}.
+    """
+    client = connections.get_connection()
+    start_timestamp = datetime.utcnow()
+    index_name = index.versioned_index_name(start_timestamp)
+    new_index = Index(index_name)
+    new_index.doc_type(index.SearchableContentPiece)
+    new_index.settings(**LOADING_SETTINGS)
+    new_index.create()
+    start = default_timer()
+    document_count = 0
+    with Pool(processes) as pool:
+        batches = pool.imap(_build_actions,
+                            ((index_name, parts)
+                             for parts in _stream_parts(batch_size)))
+        actions = (action for batch in batches for action in batch)
+        for success, info in parallel_bulk(client, actions,
+                                           thread_count=thread_count,
+                                           chunk_size=batch_size):
+            document_count += 1
+    seconds = default_timer() - start
+    client.indices.put_settings(index=index_name, body=SERVING_SETTINGS)
+    client.indices.refresh(index=index_name)
+    old_index_names = _swap_alias(client, index_name)
+    bump_generation()
+    session = orm.start_session()
+    try:
+        for content_id in select.stream_content_ids(
+                changed_since=start_timestamp, session=session):
+            redis_api.mark_index_dirty(content_id, ["all"],
+                                       datetime.utcnow())
+    finally:
+        session.close()
+    if delete_old:
+        for old_index_name in old_index_names:
+            client.indices.delete(index=old_index_name)
+    return {"index": index_name, "documents": document_count,
+            "seconds": seconds}
+
+
+if __name__ == "__main__":
+    processes = int(sys.argv[1]) if len(sys.argv) > 1 else None
+    result = reindex(processes)
+    print("Indexed {} documents into {} in {:.1f} seconds "
+          "({:.0f} documents/s)".format(
+              result["documents"], result["index"], result["seconds"],
+              result["documents"] / result["seconds"]
+              if result["seconds"] else 0))
@@ -2,7 +2,7 @@
 Search Query API
 
 Contains functions used to query the Elasticsearch cluster.
-Uses elasticsearch-py-dsl.
+Uses elasticsearch-py-dsl. Results are cached, see search.cache.
 
 Functions:
 
@@ -13,13 +13,69 @@ from elasticsearch_dsl.query import MultiMatch, Q
 
 from Knowledge_Database_App.storage.exceptions import InputError
 from .index import SearchableContentPiece
+from .cache import cached, normalize_query
 
 
-def search(query_string, page_num=1):
+PAGE_SIZE = 10
+
+# Score ties are broken on content_id, so that the sort values of a
+# page's last hit identify exactly where the next page starts.
+_CURSOR_SORT = [{"_score": {"order": "desc"}},
+                {"content_id": {"order": "asc",
+                                "unmapped_type": "integer"}}]
+
+
+def _paginate(search, page_num, cursor, after):
+    """
+    Args:
+        search: elasticsearch_dsl Search object.
+        page_num: Positive integer.
+        cursor: Boolean.
+        after: List of sort values, or None.
+    Returns:
+        The search limited to the requested page, using search_after
+        instead of from/size when cursor is True.
+    """
+    if not cursor:
+        if page_num < 1:
+            raise InputError("Invalid argument(s) provided.",
+                             message="Invalid data provided.",
+                             inputs={"page_num": page_num})
+        return search[PAGE_SIZE*(page_num-1) : PAGE_SIZE*page_num]
+    search = search[:PAGE_SIZE].sort(*_CURSOR_SORT)
+    if after is not None:
+        if not isinstance(after, (list, tuple)) or len(after) != 2:
+            raise InputError("Invalid argument(s) provided.",
+                             message="Invalid page cursor provided.",
+                             inputs={"after": after})
+        search = search.extra(search_after=list(after))
+    return search
+
+
+def _next_after(response):
+    """
+    Args:
+        response: elasticsearch_dsl Response object of a cursor page.
+    Returns:
+        List of the sort values of the page's last hit, or None if
+        the page is the last one.
+    """
+    if len(response.hits) < PAGE_SIZE:
+        return None
+    return list(response.hits[-1].meta.sort)
+
+
+@cached(normalize={"query_string": normalize_query})
+def search(query_string, page_num=1, cursor=False, after=None):
     """
     Args:
         query_string: String.
-        page_num: Positive integer. Defaults to 1.
+        page_num: Positive integer, ignored if cursor is True.
+            Defaults to 1.
+        cursor: Boolean, page with search_after rather than from/size,
+            which stays cheap however deep the page. Defaults to False.
+        after: List of sort values returned as "after" by the previous
+            cursor page, or None for the first page. Defaults to None.
 
     Returns:
         A dictionary of the form
@@ -43,6 +99,10 @@ def search(query_string, page_num=1):
                 "text": list of strings
             }
         }
+
+        If cursor is True, the dictionary also holds an "after" key
+        with the sort values to pass as after for the next page, or
+        None if this is the last page.
     """
     # First apply two rounds of match queries.
     query = MultiMatch(
@@ -58,33 +118,35 @@ def search(query_string, page_num=1):
             }
         }
     )
+    phrase_queries = [
+        {"match_phrase": {"text": {"query": query_string, "slop": 50}}},
+        {"match_phrase": {"name": {"query": query_string, "slop": 10}}},
+        {"match_phrase": {
+            "alternate_names": {"query": query_string, "slop": 10}}}
+    ]
     content_search = SearchableContentPiece.search()
-    content_search = content_search[10*(page_num-1): 10*page_num]
-    content_search = content_search.query(query).query(bigram_query)
-
-    # Then rescore the top results with a fuzzy phrase match.
-    search_dict = content_search.to_dict()
-    search_dict["rescore"] = {
-        "window_size": 50,
-        "query": {
-            "rescore_query": {
-                "bool": {
-                    "should": [
-                        {"match_phrase": {
-                            "text": {"query": query_string, "slop": 50}}},
-                        {"match_phrase": {
-                            "name": {"query": query_string, "slop": 10}}},
-                        {"match_phrase": {
-                            "alternate_names": {
-                                "query": query_string, "slop": 10}}}
-                    ]
-                }
-            },
-            "query_weight": 2,
-            "rescore_query_weight": 1
+    content_search = _paginate(content_search, page_num, cursor, after)
+    if cursor:
+        # Elasticsearch refuses to rescore a sorted search, and a rescore
+        # window would rank deep pages differently from the first ones
+        # anyway, so score the fuzzy phrase matches in the query itself.
+        content_search = content_search.query(Q(
+            "bool", must=[query, bigram_query],
+            should=[Q(phrase_query) for phrase_query in phrase_queries]))
+    else:
+        content_search = content_search.query(query).query(bigram_query)
+
+        # Then rescore the top results with a fuzzy phrase match.
+        search_dict = content_search.to_dict()
+        search_dict["rescore"] = {
+            "window_size": 50,
+            "query": {
+                "rescore_query": {"bool": {"should": phrase_queries}},
+                "query_weight": 2,
+                "rescore_query_weight": 1
+            }
         }
-    }
-    content_search = Search.from_dict(search_dict)
+        content_search = Search.from_dict(search_dict)
 
     # Request highlighting, execute the search, and return the result.
     content_search = content_search.highlight_options(order="score")
@@ -116,17 +178,26 @@ def search(query_string, page_num=1):
             }
         }
         query_result["results"].append(body)
+    if cursor:
+        query_result["after"] = _next_after(response)
 
     return query_result
 
 
-def filter_by(content_part, part_string, page_num=1):
+@cached()
+def filter_by(content_part, part_string, page_num=1, cursor=False,
+              after=None):
     """
     Args:
         content_part: String, accepts 'keyword', 'content_type', 'name',
             or 'citation'.
         part_string: String.
-        page_num: Positive integer. Defaults to 1.
+        page_num: Positive integer, ignored if cursor is True.
+            Defaults to 1.
+        cursor: Boolean, page with search_after rather than from/size.
+            Defaults to False.
+        after: List of sort values returned as "after" by the previous
+            cursor page, or None for the first page. Defaults to None.
 
     Returns:
         A dictionary of the form
@@ -144,9 +215,12 @@ def filter_by(content_part, part_string, page_num=1):
             "alternate_names": list of strings,
             "text_fragment": 200 character string fragment,
         }
+
+        If cursor is True, the dictionary also holds an "after" key,
+        as for search.
     """
     search = SearchableContentPiece.search()
-    search = search[10*(page_num-1) : 10*page_num]
+    search = _paginate(search, page_num, cursor, after)
     if content_part == "keyword":
         query = Q("bool", filter=[Q("term", keywords=part_string)])
     elif content_part == "content_type":
@@ -172,10 +246,13 @@ def filter_by(content_part, part_string, page_num=1):
             "text_fragment": hit.text[:201],
         }
         results["results"].append(body)
+    if cursor:
+        results["after"] = _next_after(response)
 
     return results
 
 
+@cached(normalize={"query_string": normalize_query})
 def autocomplete(content_part, query_string):
     """
     Args:
@@ -6,8 +6,9 @@ on the Postgres database. Uses SQLAlchemy.
 
 Functions:
 
-    store_content_piece, delete_content_piece, update_content_type, 
-    store_content_part, remove_content_part, update_content_part, 
+    store_keywords, store_citations, store_content_piece,
+    delete_content_piece, update_content_type, store_content_part,
+    remove_content_part, update_content_part,
     store_accepted_edit, store_rejected_edit, store_new_user, update_user,
     change_user_type, delete_user, store_user_report
 
@@ -17,6 +18,7 @@ Functions:
 from sqlalchemy.orm.exc import (NoResultFound, ObjectDeletedError,
                                 StaleDataError)
 from sqlalchemy.exc import IntegrityError, InterfaceError
+from sqlalchemy.dialects.postgresql import insert
 
 from . import orm_core as orm
 from .select_queries import get_user, get_content_piece
@@ -26,6 +28,103 @@ from .exceptions import (ActionError, InputError,
 UNIQUE_CONSTRAINT_VIOLATION = "23505"
 
 
+def _store_unique_rows(row_class, column, strings, timestamp, session):
+    """
+    Inserts the strings not yet stored in a uniquely constrained
+    column, skipping any that already exist, then selects the rows
+    for all of the strings.
+
+    Args:
+        row_class: Mapped class, Keyword or Citation.
+        column: String, name of the uniquely constrained column.
+        strings: List of Strings.
+        timestamp: Datetime.
+        session: SQLAlchemy session.
+    Returns:
+        List of row_class objects in the order of their first
+        occurrence in strings.
+    """
+    unique_strings = sorted(set(strings))
+    if not unique_strings:
+        return []
+    # Inserting in sorted order keeps concurrent batches from
+    # deadlocking on each other's rows.
+    session.execute(insert(row_class.__table__).values(
+        [{column: string, "timestamp": timestamp}
+         for string in unique_strings]).on_conflict_do_nothing(
+        index_elements=[column]))
+    rows = session.query(row_class).filter(
+        getattr(row_class, column).in_(unique_strings)).all()
+    rows = {getattr(row, column): row for row in rows}
+    ordered_rows = []
+    for string in strings:
+        if rows.get(string) is not None:
+            ordered_rows.append(rows.pop(string))
+    return ordered_rows
+
+
+def store_keywords(keywords, timestamp, session=None):
+    """
+    Args:
+        keywords: List of Strings.
+        timestamp: Datetime, creation time of newly stored keywords.
+        session: SQLAlchemy session. Defaults to None.
+    Returns:
+        List of Keywords, one per distinct string in keywords and in
+        the same order, whether newly stored or already existing.
+    Raises:
+        ActionError: if session is provided and committing changes fails.
+    """
+    args = locals()
+    del args["session"]
+    try:
+        if session is None:
+            session = orm.start_session()
+        keywords = _store_unique_rows(orm.Keyword, "keyword", keywords,
+                                      timestamp, session)
+        session.flush()
+    except InterfaceError as e:
+        raise InputError("Invalid argument(s) provided.",
+                         exception=e,
+                         message="Invalid data provided.",
+                         inputs=args)
+    except Exception as e:
+        raise ActionError(str(e), exception=e)
+    else:
+        return keywords
+
+
+def store_citations(citations, timestamp, session=None):
+    """
+    Args:
+        citations: List of Strings.
+        timestamp: Datetime, creation time of newly stored citations.
+        session: SQLAlchemy session. Defaults to None.
+    Returns:
+        List of Citations, one per distinct string in citations and in
+        the same order, whether newly stored or already existing.
+    Raises:
+        ActionError: if session is provided and committing changes fails.
+    """
+    args = locals()
+    del args["session"]
+    try:
+        if session is None:
+            session = orm.start_session()
+        citations = _store_unique_rows(orm.Citation, "citation_text",
+                                       citations, timestamp, session)
+        session.flush()
+    except InterfaceError as e:
+        raise InputError("Invalid argument(s) provided.",
+                         exception=e,
+                         message="Invalid data provided.",
+                         inputs=args)
+    except Exception as e:
+        raise ActionError(str(e), exception=e)
+    else:
+        return citations
+
+
 def store_content_piece(user_id, name, text, content_type, keywords, timestamp,
                         citations=None, alternate_names=None, session=None):
     """
@@ -248,9 +347,52 @@ def update_content_part(part_id, content_part, part_text, session=None):
         raise ActionError(str(e), exception=e)
 
 
+def _store_voters(vote_id, votes, session):
+    """
+    Associates the voters with a vote, along with how and when each
+    voted, in a single statement, skipping any voter already
+    associated with it.
+
+    Args:
+        vote_id: Integer.
+        votes: List of tuples of the form (voter_id, vote, timestamp),
+            where vote is 'Y' or 'N'.
+        session: SQLAlchemy session.
+    """
+    if votes:
+        session.execute(insert(orm.user_votes).values(
+            [{"vote_id": vote_id, "user_id": voter_id,
+              "vote": vote, "timestamp": timestamp}
+             for voter_id, vote, timestamp in votes]).on_conflict_do_nothing())
+
+
+def _store_vote(votes, content_part, timestamp, close_timestamp, session):
+    """
+    Args:
+        votes: List of tuples of the form (voter_id, vote, timestamp),
+            where vote is 'Y' or 'N'.
+        content_part: String.
+        timestamp: Datetime.
+        close_timestamp: Datetime.
+        session: SQLAlchemy session.
+    Returns:
+        Vote.
+    """
+    for_count = len([True for voter_id, vote, vote_timestamp in votes
+                     if vote == "Y"])
+    vote = orm.Vote(for_count=for_count,
+                    against_count=len(votes)-for_count,
+                    content_part=content_part, timestamp=timestamp,
+                    close_timestamp=close_timestamp)
+    session.add(vote)
+    session.flush()     # To get vote.vote_id
+    _store_voters(vote.vote_id, votes, session)
+    return vote
+
+
 def store_accepted_edit(redis_edit_id, edit_text, applied_edit_text,
                         edit_rationale, content_part, part_id, content_id,
-                        vote_string, voter_ids, start_timestamp, timestamp,
+                        votes, start_timestamp, timestamp,
                         acc_timestamp, author_type, user_id=None, session=None):
     """
     Args:
@@ -262,8 +404,8 @@ def store_accepted_edit(redis_edit_id, edit_text, applied_edit_text,
             'keyword' or 'citation'.
         part_id: Integer.
         content_id: Integer.
-        vote_string: String.
-        voter_ids: list of Integers.
+        votes: List of tuples of the form (voter_id, vote, timestamp),
+            where vote is 'Y' or 'N'.
         start_timestamp: Datetime.
         timestamp: Datetime.
         acc_timestamp: Datetime.
@@ -280,22 +422,8 @@ def store_accepted_edit(redis_edit_id, edit_text, applied_edit_text,
     try:
         if session is None:
             session = orm.start_session()
-        vote = orm.Vote(vote=vote_string, content_part=content_part,
-                        timestamp=timestamp, close_timestamp=acc_timestamp)
-        session.add(vote)
-        session.flush()     # To get vote.vote_id
-        for user_id in voter_ids:
-            session.begin_nested()
-            try:
-                session.execute(orm.user_votes.insert(),
-                    params={"vote_id": vote.vote_id, "user_id": user_id})
-            except IntegrityError as e:
-                if e.orig.pgcode != UNIQUE_CONSTRAINT_VIOLATION:
-                    raise
-                else:
-                    session.rollback()
-            else:
-                session.commit()
+        vote = _store_vote(votes, content_part, timestamp,
+                           acc_timestamp, session)
         edit = orm.AcceptedEdit(redis_edit_id=redis_edit_id, edit_text=edit_text,
                                 applied_edit_text=applied_edit_text,
                                 edit_rationale=edit_rationale,
@@ -306,17 +434,8 @@ def store_accepted_edit(redis_edit_id, edit_text, applied_edit_text,
         edit.vote = vote
         if author_type == "U" and user_id is not None:
             edit.author_id = user_id
-            session.begin_nested()
-            try:
-                session.execute(orm.content_authors.insert(),
-                    params={"content_id": content_id, "user_id": user_id})
-            except IntegrityError as e:
-                if e.orig.pgcode != UNIQUE_CONSTRAINT_VIOLATION:
-                    raise
-                else:
-                    session.rollback()
-            else:
-                session.commit()
+            session.execute(insert(orm.content_authors).values(
+                content_id=content_id, user_id=user_id).on_conflict_do_nothing())
         if content_part == "name":
             session.query(orm.Name).filter(orm.Name.name_id == part_id).update(
                 {orm.Name.last_edited_timestamp: acc_timestamp}, 
@@ -353,7 +472,7 @@ def store_accepted_edit(redis_edit_id, edit_text, applied_edit_text,
 
 
 def store_rejected_edit(redis_edit_id, edit_text, edit_rationale, content_part,
-                        part_id, content_id, vote_string, voter_ids, timestamp,
+                        part_id, content_id, votes, timestamp,
                         rej_timestamp, author_type, user_id=None, session=None):
     """
     Args:
@@ -364,8 +483,8 @@ def store_rejected_edit(redis_edit_id, edit_text, edit_rationale, content_part,
             'keyword' or 'citation'.
         part_id: Integer.
         content_id: Integer.
-        vote_string: String.
-        voter_ids: list of Integers.
+        votes: List of tuples of the form (voter_id, vote, timestamp),
+            where vote is 'Y' or 'N'.
         timestamp: Datetime.
         rej_timestamp: Datetime.
         author_type: String, expects 'U' or an IP address.
@@ -381,22 +500,8 @@ def store_rejected_edit(redis_edit_id, edit_text, edit_rationale, content_part,
     try:
         if session is None:
             session = orm.start_session()
-        vote = orm.Vote(vote=vote_string, content_part=content_part,
-                        timestamp=timestamp, close_timestamp=rej_timestamp)
-        session.add(vote)
-        session.flush()     # To get vote.vote_id
-        for user_id in voter_ids:
-            session.begin_nested()
-            try:
-                session.execute(orm.user_votes.insert(),
-                    params={"vote_id": vote.vote_id, "user_id": user_id})
-            except IntegrityError as e:
-                if e.orig.pgcode != UNIQUE_CONSTRAINT_VIOLATION:
-                    raise
-                else:
-                    session.rollback()
-            else:
-                session.commit()
+        vote = _store_vote(votes, content_part, timestamp,
+                           rej_timestamp, session)
         edit = orm.RejectedEdit(redis_edit_id=redis_edit_id, edit_text=edit_text,
                                 edit_rationale=edit_rationale,
                                 content_part=content_part, timestamp=timestamp,
@@ -0,0 +1,87 @@
+"""
+Storage History Export
+
+Writes a whole edit or vote history table as newline-delimited JSON
+or CSV at constant memory, for analytics and backups. Usage:
+
+    python -m Knowledge_Database_App.storage.export TABLE
+        [--format {ndjson,csv}] [--output PATH] [--batch-size N]
+
+where TABLE is 'accepted_edit', 'rejected_edit', 'vote', or
+'user_votes', the individual votes of the voters on each vote.
+
+Functions:
+
+    export_history
+"""
+
+import csv
+import sys
+import json
+import argparse
+
+from . import orm_core as orm
+from .select_queries import stream_history
+
+
+def export_history(table, output, format="ndjson", batch_size=1000,
+                   session=None):
+    """
+    Args:
+        table: String, accepts 'accepted_edit', 'rejected_edit',
+            'vote', or 'user_votes'.
+        output: Writable text file object.
+        format: String, accepts 'ndjson' or 'csv'. Defaults to 'ndjson'.
+        batch_size: Integer. Defaults to 1000.
+        session: SQLAlchemy session. Defaults to None.
+    Returns:
+        Integer, the number of rows written.
+    Raises:
+        ValueError: if format is not 'ndjson' or 'csv'.
+    """
+    if format != "ndjson" and format != "csv":
+        raise ValueError("Unknown export format: " + str(format))
+    rows = stream_history(table, batch_size=batch_size, session=session)
+    row_count = 0
+    writer = None
+    for row in rows:
+        if format == "ndjson":
+            output.write(json.dumps(row, default=str) + "\n")
+        else:
+            if writer is None:
+                writer = csv.DictWriter(output, fieldnames=list(row.keys()))
+                writer.writeheader()
+            writer.writerow(row)
+        row_count += 1
+    return row_count
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        description="Export an edit or vote history table.")
+    parser.add_argument("table",
+                        choices=["accepted_edit", "rejected_edit", "vote",
+                                 "user_votes"])
+    parser.add_argument("--format", choices=["ndjson", "csv"],
+                        default="ndjson")
+    parser.add_argument("--output", default=None,
+                        help="File to write to. Defaults to stdout.")
+    parser.add_argument("--batch-size", type=int, default=1000)
+    args = parser.parse_args(argv)
+
+    session = orm.start_session()
+    output = (open(args.output, "w", newline="")
+              if args.output is not None else sys.stdout)
+    try:
+        row_count = export_history(args.table, output, format=args.format,
+                                   batch_size=args.batch_size,
+                                   session=session)
+    finally:
+        if args.output is not None:
+            output.close()
+        session.close()
+    print("Exported " + str(row_count) + " rows.", file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,169 @@
+"""
+Storage Migrations
+
+Contains functions for bringing an existing Postgres database up to
+date with the schema declared in orm_core. Each may safely be run
+more than once. Run all of them with
+
+    python -m Knowledge_Database_App.storage.migrations
+
+Functions:
+
+    add_missing_columns, create_indexes_concurrently,
+    migrate_vote_summaries
+"""
+
+import re
+
+import dateutil.parser as dateparse
+from sqlalchemy import bindparam
+from sqlalchemy.engine import reflection
+from sqlalchemy.schema import CreateIndex, CreateColumn
+from sqlalchemy.dialects.postgresql import insert
+
+from . import orm_core as orm
+
+
+def add_missing_columns(table_names=None):
+    """
+    Adds the nullable columns declared in orm_core that are missing
+    from the database.
+
+    Args:
+        table_names: List of Strings, the tables to add columns to.
+            Defaults to None, meaning all tables.
+    Returns:
+        List of the names, of the form 'table.column', of the
+        columns added.
+    """
+    inspector = reflection.Inspector.from_engine(orm.engine)
+    added_columns = []
+    with orm.engine.begin() as connection:
+        for table in orm.Base.metadata.sorted_tables:
+            if table_names is not None and table.name not in table_names:
+                continue
+            existing_columns = {column["name"] for column
+                                in inspector.get_columns(table.name)}
+            for column in table.columns:
+                if column.name in existing_columns:
+                    continue
+                connection.execute('ALTER TABLE "' + table.name + '" ADD ' +
+                    str(CreateColumn(column).compile(
+                        dialect=orm.engine.dialect)))
+                added_columns.append(table.name + "." + column.name)
+    return added_columns
+
+
+def create_indexes_concurrently(table_names=None):
+    """
+    Builds the indexes declared in orm_core that are missing from the
+    database using CREATE INDEX CONCURRENTLY, so that the tables stay
+    writable while the indexes are built.
+
+    Args:
+        table_names: List of Strings, the tables to build indexes for.
+            Defaults to None, meaning all tables.
+    Returns:
+        List of the names of the indexes built.
+    """
+    inspector = reflection.Inspector.from_engine(orm.engine)
+    built_indexes = []
+    # Concurrent builds cannot run inside a transaction block.
+    connection = orm.engine.connect().execution_options(
+        isolation_level="AUTOCOMMIT")
+    try:
+        for table in orm.Base.metadata.sorted_tables:
+            if table_names is not None and table.name not in table_names:
+                continue
+            existing_indexes = {index["name"] for index
+                                in inspector.get_indexes(table.name)}
+            for index in sorted(table.indexes, key=lambda index: index.name):
+                if index.name in existing_indexes:
+                    continue
+                statement = str(CreateIndex(index).compile(
+                    dialect=orm.engine.dialect))
+                statement = re.sub(r"^CREATE (UNIQUE )?INDEX",
+                                   r"CREATE \1INDEX CONCURRENTLY", statement)
+                connection.execute(statement)
+                built_indexes.append(index.name)
+    finally:
+        connection.close()
+    return built_indexes
+
+
+def _parse_vote_summary(vote_summary):
+    """
+    Args:
+        vote_summary: String of the form
+            "[close_timestamp ]<vote, voter_id, timestamp>, ...".
+    Returns:
+        List of tuples of the form (voter_id, vote, timestamp).
+    """
+    votes = []
+    for vote_string in vote_summary.split("<")[1:]:
+        vote, voter_id, timestamp = vote_string.split(">")[0].split(", ")
+        votes.append((int(voter_id), vote, dateparse.parse(timestamp)))
+    return votes
+
+
+def migrate_vote_summaries(batch_size=1000):
+    """
+    Moves the individual votes of closed votes stored as vote summary
+    strings into user_votes and fills in their vote counts, one batch
+    of votes per transaction. The summaries themselves are left in
+    place.
+
+    Args:
+        batch_size: Integer. Defaults to 1000.
+    Returns:
+        Integer, the number of votes migrated.
+    """
+    vote_table = orm.Vote.__table__
+    count_update = vote_table.update().where(
+        vote_table.c.vote_id == bindparam("b_vote_id")).values(
+        for_count=bindparam("b_for_count"),
+        against_count=bindparam("b_against_count"))
+    migrated_count = 0
+    last_vote_id = None
+    while True:
+        with orm.engine.begin() as connection:
+            batch = vote_table.select().with_only_columns(
+                [vote_table.c.vote_id, vote_table.c.vote]).where(
+                vote_table.c.for_count == None).where(
+                vote_table.c.vote != None)
+            if last_vote_id is not None:
+                batch = batch.where(vote_table.c.vote_id > last_vote_id)
+            rows = connection.execute(batch.order_by(
+                vote_table.c.vote_id).limit(batch_size)).fetchall()
+            if not rows:
+                break
+            voter_rows = []
+            counts = []
+            for vote_id, vote_summary in rows:
+                votes = _parse_vote_summary(vote_summary)
+                voter_rows.extend({"vote_id": vote_id, "user_id": voter_id,
+                                   "vote": vote, "timestamp": timestamp}
+                                  for voter_id, vote, timestamp in votes)
+                for_count = len([True for voter_id, vote, timestamp
+                                 in votes if vote == "Y"])
+                counts.append({"b_vote_id": vote_id,
+                               "b_for_count": for_count,
+                               "b_against_count": len(votes)-for_count})
+            if voter_rows:
+                voter_insert = insert(orm.user_votes).values(voter_rows)
+                connection.execute(voter_insert.on_conflict_do_update(
+                    index_elements=["vote_id", "user_id"],
+                    set_={"vote": voter_insert.excluded.vote,
+                          "timestamp": voter_insert.excluded.timestamp}))
+            connection.execute(count_update, counts)
+            migrated_count += len(rows)
+            last_vote_id = rows[-1][0]
+    return migrated_count
+
+
+if __name__ == "__main__":
+    for column_name in add_missing_columns():
+        print("Added column " + column_name)
+    for index_name in create_indexes_concurrently():
+        print("Built index " + index_name)
+    print("Migrated " + str(migrate_vote_summaries()) + " vote summaries")
@@ -6,26 +6,80 @@ database. Uses SQLAlchemy.
 
 Functions:
 
-    get_content_piece, get_content_pieces, get_part_string, get_names,
-    get_alternate_names, get_keyword, get_keywords, get_citation,
-    get_citations, get_content_type, get_content_types, get_accepted_edits,
-    get_rejected_edits, get_user_votes, get_accepted_votes,
-    get_rejected_votes, get_user_encrypt_info, get_author_count, get_user,
-    get_user_info, get_admin_ids, get_user_reports
+    encode_cursor, decode_cursor, get_content_piece, get_content_pieces,
+    get_searchable_parts, get_part_string, get_names, get_alternate_names,
+    get_keyword, get_keywords, get_citation, get_citations, get_content_type,
+    get_content_types, get_accepted_edits, get_rejected_edits,
+    get_edit_timeline, get_user_votes, get_accepted_votes,
+    get_rejected_votes, get_voter_votes, get_vote_tallies,
+    get_user_encrypt_info, get_author_count, get_user,
+    get_user_info, get_admin_ids, get_user_reports, stream_history,
+    stream_content_ids
 
     Note that all functions take a common 'session' keyword argument,
     which defaults to None.
 """
 
+import json
+from base64 import urlsafe_b64encode, urlsafe_b64decode
+from datetime import datetime
+
+import dateutil.parser as dateparse
+from sqlalchemy import bindparam
+from sqlalchemy.ext import baked
 from sqlalchemy.orm import subqueryload
 from sqlalchemy.exc import InterfaceError
 from sqlalchemy.orm.exc import MultipleResultsFound, NoResultFound
-from sqlalchemy.sql.expression import desc
+from sqlalchemy.sql.expression import desc, tuple_, literal, or_, union_all
 
 from . import orm_core as orm
 from .exceptions import InputError, SelectError, MultipleValuesFound
 
 
+# Caches the compiled SQL of the hot lookups below. Each chain of
+# lambdas is keyed by its code objects, so every argument shape of a
+# function gets its own cached statement, with the argument values
+# supplied through bound parameters.
+bakery = baked.bakery()
+
+
+def encode_cursor(values):
+    """
+    Args:
+        values: Tuple of the sort key values (Datetimes, Integers,
+            Floats, or Strings) of the last row of a page.
+    Returns:
+        An opaque, URL-safe string token identifying the position
+        after that row.
+    """
+    values = [{"datetime": str(value)} if isinstance(value, datetime)
+              else value for value in values]
+    return urlsafe_b64encode(
+        json.dumps(values).encode("utf-8")).decode("ascii")
+
+
+def decode_cursor(token):
+    """
+    Args:
+        token: String, a token produced by encode_cursor.
+    Returns:
+        Tuple of the sort key values encoded in the token.
+    Raises:
+        InputError: if token is not a valid cursor token.
+    """
+    try:
+        values = json.loads(urlsafe_b64decode(
+            token.encode("ascii")).decode("utf-8"))
+        return tuple(dateparse.parse(value["datetime"])
+                     if isinstance(value, dict) else value
+                     for value in values)
+    except (TypeError, ValueError, KeyError, AttributeError) as e:
+        raise InputError("Invalid argument(s) provided.",
+                         exception=e,
+                         message="Invalid page cursor provided.",
+                         inputs={"after": token})
+
+
 def get_content_piece(content_id=None, accepted_edit_id=None,
                       rejected_edit_id=None, session=None):
     """
@@ -46,39 +100,33 @@ def get_content_piece(content_id=None, accepted_edit_id=None,
     del args["session"]
     if session is None:
         session = orm.start_session()
+    baked_query = bakery(lambda session: session.query(orm.ContentPiece))
+    baked_query += lambda query: query.options(
+        subqueryload(orm.ContentPiece.first_author),
+        subqueryload(orm.ContentPiece.authors),
+        subqueryload(orm.ContentPiece.content_type),
+        subqueryload(orm.ContentPiece.name),
+        subqueryload(orm.ContentPiece.alternate_names),
+        subqueryload(orm.ContentPiece.text),
+        subqueryload(orm.ContentPiece.keywords))
     try:
         if content_id is not None:
-            content_piece = session.query(orm.ContentPiece).options(
-                subqueryload(orm.ContentPiece.first_author),
-                subqueryload(orm.ContentPiece.authors),
-                subqueryload(orm.ContentPiece.content_type),
-                subqueryload(orm.ContentPiece.name),
-                subqueryload(orm.ContentPiece.alternate_names),
-                subqueryload(orm.ContentPiece.text),
-                subqueryload(orm.ContentPiece.keywords)).filter(
-                orm.ContentPiece.content_id == content_id).one()
+            baked_query += lambda query: query.filter(
+                orm.ContentPiece.content_id == bindparam("content_id"))
+            content_piece = baked_query(session).params(
+                content_id=content_id).one()
         elif accepted_edit_id is not None:
-            content_piece = session.query(orm.ContentPiece).join(
-                orm.AcceptedEdit).options(
-                subqueryload(orm.ContentPiece.first_author),
-                subqueryload(orm.ContentPiece.authors),
-                subqueryload(orm.ContentPiece.content_type),
-                subqueryload(orm.ContentPiece.name),
-                subqueryload(orm.ContentPiece.alternate_names),
-                subqueryload(orm.ContentPiece.text),
-                subqueryload(orm.ContentPiece.keywords)).filter(
-                orm.AcceptedEdit.edit_id == accepted_edit_id).one()
+            baked_query += lambda query: query.join(
+                orm.AcceptedEdit).filter(
+                orm.AcceptedEdit.edit_id == bindparam("edit_id"))
+            content_piece = baked_query(session).params(
+                edit_id=accepted_edit_id).one()
         elif rejected_edit_id is not None:
-            content_piece = session.query(orm.ContentPiece).join(
-                orm.RejectedEdit).options(
-                subqueryload(orm.ContentPiece.first_author),
-                subqueryload(orm.ContentPiece.authors),
-                subqueryload(orm.ContentPiece.content_type),
-                subqueryload(orm.ContentPiece.name),
-                subqueryload(orm.ContentPiece.alternate_names),
-                subqueryload(orm.ContentPiece.text),
-                subqueryload(orm.ContentPiece.keywords)).filter(
-                orm.RejectedEdit.edit_id == rejected_edit_id).one()
+            baked_query += lambda query: query.join(
+                orm.RejectedEdit).filter(
+                orm.RejectedEdit.edit_id == bindparam("edit_id"))
+            content_piece = baked_query(session).params(
+                edit_id=rejected_edit_id).one()
         else:
             raise InputError("No arguments provided.",
                              message="No data provided.",
@@ -95,7 +143,7 @@ def get_content_piece(content_id=None, accepted_edit_id=None,
 
 
 def get_content_pieces(sort="created_at", content_part=None, user_id=None,
-                       page_num=None, per_page=10, session=None):
+                       page_num=None, per_page=10, after=None, session=None):
     """
     Args:
         sort: String, accepts 'created_at' or 'last_edited_at'.
@@ -105,9 +153,14 @@ def get_content_pieces(sort="created_at", content_part=None, user_id=None,
         user_id: Integer. Defaults to None.
         page_num: Integer. Defaults to None.
         per_page: Integer. Defaults to 10.
+        after: Tuple of the form (timestamp, content_id) holding the sort
+            key of the last content piece of the previous page. If given,
+            the page is selected by seeking past this key instead of by
+            page_num. Defaults to None.
         session: SQLAlchemy session. Defaults to None.
     Returns:
-        list of ContentPieces that user_id has authored.
+        list of ContentPieces that have not been deleted, restricted
+        to those user_id has authored if it is provided.
     """
     args = locals()
     del args["session"]
@@ -144,16 +197,25 @@ def get_content_pieces(sort="created_at", content_part=None, user_id=None,
             subqueryload("*"))
 
     if sort == "created_at":
-        content_pieces = content_pieces.order_by(orm.ContentPiece.timestamp).offset(
-            (page_num-1)*per_page).limit(per_page)
+        sort_column = orm.ContentPiece.timestamp
     elif sort == "last_edited_at":
-        content_pieces = content_pieces.order_by(
-            orm.ContentPiece.last_edited_timestamp).offset(
-            (page_num-1)*per_page).limit(per_page)
+        sort_column = orm.ContentPiece.last_edited_timestamp
     else:
         raise InputError("Invalid argument(s) provided.",
                          message="Invalid data provided.",
                          inputs={"sort": sort})
+    # Order on the content id as well, so that the sort key is unique
+    # and can be used to seek directly to the next page.
+    content_pieces = content_pieces.filter(
+        orm.ContentPiece.deleted_timestamp.is_(None)).order_by(
+        sort_column, orm.ContentPiece.content_id)
+    if after is not None:
+        content_pieces = content_pieces.filter(
+            tuple_(sort_column, orm.ContentPiece.content_id)
+            > tuple_(*after)).limit(per_page)
+    elif page_num is not None:
+        content_pieces = content_pieces.offset(
+            (page_num-1)*per_page).limit(per_page)
     try:
         return content_pieces.all()
     except InterfaceError as e:
@@ -163,6 +225,80 @@ def get_content_pieces(sort="created_at", content_part=None, user_id=None,
                          inputs=args)
 
 
+def get_searchable_parts(content_ids, session=None):
+    """
+    Loads the parts of many content pieces that are indexed for search,
+    as plain values, in one query per part.
+
+    Args:
+        content_ids: List of integers.
+        session: SQLAlchemy session. Defaults to None.
+    Returns:
+        Dictionary of the form {content_id1: part_dict1, ...}, where
+        each part_dict has keys 'name', 'alternate_names', 'text',
+        'content_type', 'keywords', 'citations', and
+        'deleted_timestamp', and list values are in insertion order.
+        Content IDs with no matching content piece are omitted.
+    """
+    args = locals()
+    del args["session"]
+    if session is None:
+        session = orm.start_session()
+    content_ids = list(content_ids)
+    if not content_ids:
+        return {}
+    try:
+        pieces = session.query(
+            orm.ContentPiece.content_id, orm.ContentPiece.deleted_timestamp,
+            orm.Name.name, orm.Text.text, orm.ContentType.content_type).join(
+            orm.Name, orm.ContentPiece.name).join(
+            orm.Text, orm.ContentPiece.text).join(
+            orm.ContentType, orm.ContentPiece.content_type).filter(
+            orm.ContentPiece.content_id.in_(content_ids)).all()
+        parts = {
+            content_id: {
+                "name": name,
+                "alternate_names": [],
+                "text": text,
+                "content_type": content_type,
+                "keywords": [],
+                "citations": [],
+                "deleted_timestamp": deleted_timestamp,
+            } for content_id, deleted_timestamp, name, text, content_type
+            in pieces
+        }
+        alternate_names = session.query(
+            orm.Name.content_id, orm.Name.name).filter(
+            orm.Name.content_id.in_(content_ids)).order_by(orm.Name.name_id)
+        keywords = session.query(
+            orm.content_keywords.c.content_id, orm.Keyword.keyword).join(
+            orm.Keyword, orm.Keyword.keyword_id ==
+            orm.content_keywords.c.keyword_id).filter(
+            orm.content_keywords.c.content_id.in_(content_ids)).order_by(
+            orm.Keyword.keyword_id)
+        citations = session.query(
+            orm.ContentPieceCitation.content_id,
+            orm.Citation.citation_text).join(
+            orm.Citation, orm.ContentPieceCitation.citation).filter(
+            orm.ContentPieceCitation.content_id.in_(content_ids)).order_by(
+            orm.ContentPieceCitation.id)
+        for part_name, rows in [("alternate_names", alternate_names),
+                                ("keywords", keywords),
+                                ("citations", citations)]:
+            for content_id, part_string in rows:
+                if content_id in parts:
+                    parts[content_id][part_name].append(part_string)
+    except InterfaceError as e:
+        raise InputError("Invalid argument(s) provided.",
+                         exception=e,
+                         message="Invalid data provided.",
+                         inputs=args)
+    except Exception as e:
+        raise SelectError(str(e), exception=e)
+    else:
+        return parts
+
+
 def get_part_string(part_id, content_part, session=None):
     """
     Args:
@@ -223,19 +359,24 @@ def get_names(content_id=None, content_ids=None, session=None):
     if session is None:
         session = orm.start_session()
     try:
+        baked_query = bakery(lambda session: session.query(orm.Name).join(
+            orm.ContentPiece, orm.Name.piece_))
         if content_id is not None:
+            baked_query += lambda query: query.filter(
+                orm.ContentPiece.content_id == bindparam("content_id"))
             try:
-                name = session.query(orm.Name).join(
-                    orm.ContentPiece, orm.Name.piece_).filter(
-                    orm.ContentPiece.content_id == content_id).one()
+                name = baked_query(session).params(
+                    content_id=content_id).one()
             except (NoResultFound, MultipleResultsFound) as e:
                 raise SelectError(str(e))
             return name
         elif content_ids is not None:
             if content_ids:
-                names = session.query(orm.Name).join(
-                    orm.ContentPiece, orm.Name.piece_).filter(
-                    orm.ContentPiece.content_id.in_(content_ids)).all()
+                baked_query += lambda query: query.filter(
+                    orm.ContentPiece.content_id.in_(
+                        bindparam("content_ids", expanding=True)))
+                names = baked_query(session).params(
+                    content_ids=list(content_ids)).all()
             else:
                 names = []
             return names
@@ -456,10 +597,47 @@ def get_content_types(session=None):
     return content_types.all()
 
 
+def _order_and_page_edits(edits, timestamp_column, id_column, order_by=None,
+                          page_num=None, per_page=None, after=None):
+    """
+    Args:
+        edits: SQLAlchemy Query of accepted or rejected edits.
+        timestamp_column: Column holding the validation timestamp.
+        id_column: Column holding the edit id.
+        order_by: String, accepts 'validated_at'. Defaults to None.
+        page_num: Integer. Defaults to None.
+        per_page: Integer. Defaults to None.
+        after: Tuple of the form (validated timestamp, edit_id).
+            Defaults to None.
+    Returns:
+        SQLAlchemy Query.
+    """
+    if order_by == "validated_at":
+        edits = edits.order_by(desc(timestamp_column), desc(id_column))
+    elif order_by is not None:
+        raise InputError("Invalid argument(s) provided.",
+                         message="Invalid data provided.",
+                         inputs={"order_by": order_by})
+    if after is not None:
+        if order_by != "validated_at":
+            raise InputError("Invalid argument(s) provided.",
+                             message="Invalid data provided.",
+                             inputs={"order_by": order_by, "after": after})
+        edits = edits.filter(
+            tuple_(timestamp_column, id_column) < tuple_(*after))
+    elif page_num is not None and per_page is not None:
+        edits = edits.offset((page_num-1)*per_page)
+    if per_page is not None:
+        edits = edits.limit(per_page)
+    return edits
+
+
 def get_accepted_edits(content_id=None, edit_id=None, redis_edit_id=None,
                        user_id=None, text_id=None, name_id=None,
                        citation_id=None, keyword_id=None, content_type_id=None,
-                       content_ids=None, ip_address=None, session=None):
+                       content_ids=None, ip_address=None, order_by=None,
+                       page_num=None, per_page=None, after=None,
+                       count_only=False, session=None):
     """
     Args:
         content_id: Integer. Defaults to None.
@@ -473,9 +651,19 @@ def get_accepted_edits(content_id=None, edit_id=None, redis_edit_id=None,
         content_type_id: Integer. Defaults to None.
         content_ids: List of Integers. Defaults to None.
         ip_address: String. Defaults to None.
+        order_by: String, accepts 'validated_at', which orders the edits
+            from most to least recently validated. Defaults to None.
+        page_num: Integer. Defaults to None.
+        per_page: Integer. Defaults to None.
+        after: Tuple of the form (validated timestamp, edit_id) holding
+            the sort key of the last edit of the previous page. Requires
+            order_by to be 'validated_at'. Defaults to None.
+        count_only: Boolean, return only the number of matching edits.
+            Defaults to False.
         session: SQLAlchemy session. Defaults to None.
     Returns:
-        AcceptedEdit or list of AcceptedEdits.
+        AcceptedEdit, list of AcceptedEdits, or, if count_only is True,
+        Integer.
     Raises:
         SelectError: if edit_id does not match any row in the
             Accepted_Edit table.
@@ -532,7 +720,7 @@ def get_accepted_edits(content_id=None, edit_id=None, redis_edit_id=None,
                 orm.ContentPiece).filter(
                 orm.ContentPiece.content_id.in_(content_ids))
         else:
-            accepted_edits = []
+            return 0 if count_only else []
     elif edit_id is not None:
         try:
             accepted_edit = session.query(orm.AcceptedEdit).options(
@@ -565,21 +753,31 @@ def get_accepted_edits(content_id=None, edit_id=None, redis_edit_id=None,
         raise InputError("No arguments provided.",
                          message="No data provided.",
                          inputs=args)
+    if not count_only:
+        accepted_edits = _order_and_page_edits(
+            accepted_edits, orm.AcceptedEdit.acc_timestamp,
+            orm.AcceptedEdit.edit_id, order_by=order_by, page_num=page_num,
+            per_page=per_page, after=after)
     try:
-        return accepted_edits.all()
+        if count_only:
+            return accepted_edits.count()
+        else:
+            return accepted_edits.all()
     except InterfaceError as e:
         raise InputError("Invalid argument(s) provided.",
                          exception=e,
                          message="Invalid data provided.",
                          inputs=args)
     except:
-        return []
+        return 0 if count_only else []
 
 
 def get_rejected_edits(content_id=None, edit_id=None, redis_edit_id=None,
                        user_id=None, text_id=None, name_id=None,
                        citation_id=None, keyword_id=None, content_type_id=None,
-                       content_ids=None, ip_address=None, session=None):
+                       content_ids=None, ip_address=None, order_by=None,
+                       page_num=None, per_page=None, after=None,
+                       count_only=False, session=None):
     """
     Args:
         content_id: Integer. Defaults to None.
@@ -593,9 +791,19 @@ def get_rejected_edits(content_id=None, edit_id=None, redis_edit_id=None,
         content_type_id: Integer. Defaults to None.
         content_ids: List of Integers. Defaults to None.
         ip_address: String. Defaults to None.
+        order_by: String, accepts 'validated_at', which orders the edits
+            from most to least recently validated. Defaults to None.
+        page_num: Integer. Defaults to None.
+        per_page: Integer. Defaults to None.
+        after: Tuple of the form (validated timestamp, edit_id) holding
+            the sort key of the last edit of the previous page. Requires
+            order_by to be 'validated_at'. Defaults to None.
+        count_only: Boolean, return only the number of matching edits.
+            Defaults to False.
         session: SQLAlchemy session. Defaults to None.
     Returns:
-        RejectedEdit or list of RejectedEdits.
+        RejectedEdit, list of RejectedEdits, or, if count_only is True,
+        Integer.
     Raises:
         SelectError: if edit_id does not match any row in the
             Rejected_Edit table.
@@ -653,7 +861,7 @@ def get_rejected_edits(content_id=None, edit_id=None, redis_edit_id=None,
                 orm.ContentPiece).filter(
                 orm.ContentPiece.content_id.in_(content_ids))
         else:
-            rejected_edits = []
+            return 0 if count_only else []
     elif edit_id is not None:
         try:
             rejected_edit = session.query(orm.RejectedEdit).options(
@@ -686,15 +894,92 @@ def get_rejected_edits(content_id=None, edit_id=None, redis_edit_id=None,
         raise InputError("No arguments provided.",
                          message="No data provided.",
                          inputs=args)
+    if not count_only:
+        rejected_edits = _order_and_page_edits(
+            rejected_edits, orm.RejectedEdit.rej_timestamp,
+            orm.RejectedEdit.edit_id, order_by=order_by, page_num=page_num,
+            per_page=per_page, after=after)
     try:
-        return rejected_edits.all()
+        if count_only:
+            return rejected_edits.count()
+        else:
+            return rejected_edits.all()
     except InterfaceError as e:
         raise InputError("Invalid argument(s) provided.",
                          exception=e,
                          message="Invalid data provided.",
                          inputs=args)
     except:
-        return []
+        return 0 if count_only else []
+
+
+def get_edit_timeline(content_ids=None, user_id=None, limit=None,
+                      session=None):
+    """
+    Args:
+        content_ids: List of Integers. Defaults to None.
+        user_id: Integer. Defaults to None.
+        limit: Integer. Defaults to None.
+        session: SQLAlchemy session. Defaults to None.
+    Returns:
+        List of rows with the attributes validation_status, edit_id,
+        content_id, content_part, author_type, author_id, timestamp,
+        and validated_timestamp, covering the accepted and rejected
+        edits of the content pieces with ids in content_ids along with
+        the rejected edits authored by user_id, ordered from most to
+        least recently validated.
+    Raises:
+        InputError: if content_ids is empty or None and user_id is None.
+    """
+    args = locals()
+    del args["session"]
+    if session is None:
+        session = orm.start_session()
+    if not content_ids and user_id is None:
+        raise InputError("No arguments provided.",
+                         message="No data provided.",
+                         inputs=args)
+    selects = []
+    if content_ids:
+        selects.append(session.query(
+            literal("accepted").label("validation_status"),
+            orm.AcceptedEdit.edit_id,
+            orm.AcceptedEdit.content_id,
+            orm.AcceptedEdit.content_part,
+            orm.AcceptedEdit.author_type,
+            orm.AcceptedEdit.author_id,
+            orm.AcceptedEdit.timestamp,
+            orm.AcceptedEdit.acc_timestamp.label("validated_timestamp")
+        ).filter(orm.AcceptedEdit.content_id.in_(content_ids)).statement)
+    if content_ids and user_id is not None:
+        rejected_filter = or_(orm.RejectedEdit.content_id.in_(content_ids),
+                              orm.RejectedEdit.author_id == user_id)
+    elif content_ids:
+        rejected_filter = orm.RejectedEdit.content_id.in_(content_ids)
+    else:
+        rejected_filter = orm.RejectedEdit.author_id == user_id
+    selects.append(session.query(
+        literal("rejected").label("validation_status"),
+        orm.RejectedEdit.edit_id,
+        orm.RejectedEdit.content_id,
+        orm.RejectedEdit.content_part,
+        orm.RejectedEdit.author_type,
+        orm.RejectedEdit.author_id,
+        orm.RejectedEdit.timestamp,
+        orm.RejectedEdit.rej_timestamp.label("validated_timestamp")
+    ).filter(rejected_filter).statement)
+    timeline = union_all(*selects).alias("timeline")
+    edits = session.query(timeline).order_by(
+        desc(timeline.c.validated_timestamp), desc(timeline.c.edit_id))
+    if limit is not None:
+        edits = edits.limit(limit)
+    try:
+        return edits.all()
+    except InterfaceError as e:
+        raise InputError("Invalid argument(s) provided.",
+                         exception=e,
+                         message="Invalid data provided.",
+                         inputs=args)
 
 
 def get_user_votes(user_id, session=None):
@@ -862,6 +1147,95 @@ def get_rejected_votes(content_id=None, edit_id=None, vote_id=None,
                          inputs=args)
 
 
+def get_voter_votes(vote_ids, session=None):
+    """
+    Args:
+        vote_ids: List of Integers.
+        session: SQLAlchemy session. Defaults to None.
+    Returns:
+        List of tuples of the form (vote_id, voter_id, vote, timestamp),
+        ordered by vote_id and then timestamp.
+    """
+    args = locals()
+    del args["session"]
+    if session is None:
+        session = orm.start_session()
+    if not vote_ids:
+        return []
+    try:
+        return session.query(orm.user_votes.c.vote_id,
+                             orm.user_votes.c.user_id,
+                             orm.user_votes.c.vote,
+                             orm.user_votes.c.timestamp).filter(
+            orm.user_votes.c.vote_id.in_(vote_ids)).order_by(
+            orm.user_votes.c.vote_id, orm.user_votes.c.timestamp).all()
+    except InterfaceError as e:
+        raise InputError("Invalid argument(s) provided.",
+                         exception=e,
+                         message="Invalid data provided.",
+                         inputs=args)
+
+
+def get_vote_tallies(validation_status, content_id=None, edit_ids=None,
+                     session=None):
+    """
+    Args:
+        validation_status: String, accepts 'accepted' or 'rejected'.
+        content_id: Integer. Defaults to None.
+        edit_ids: List of Integers. Defaults to None.
+        session: SQLAlchemy session. Defaults to None.
+    Returns:
+        List of tuples of the form
+        (edit_id, for_count, against_count, close_timestamp).
+    Raises:
+        InputError: if validation_status is not 'accepted' or
+            'rejected', or content_id and edit_ids are both None.
+        SelectError: if a vote has no counts, as votes closed before
+            the counts were added must first be migrated with
+            migrations.migrate_vote_summaries.
+    """
+    args = locals()
+    del args["session"]
+    if session is None:
+        session = orm.start_session()
+    if validation_status == "accepted":
+        edit_class = orm.AcceptedEdit
+        edit_id_column = orm.Vote.accepted_edit_id
+    elif validation_status == "rejected":
+        edit_class = orm.RejectedEdit
+        edit_id_column = orm.Vote.rejected_edit_id
+    else:
+        raise InputError("Invalid argument(s) provided.",
+                         message="Invalid data provided.",
+                         inputs=args)
+    tallies = session.query(edit_id_column, orm.Vote.for_count,
+                            orm.Vote.against_count, orm.Vote.close_timestamp)
+    if edit_ids is not None:
+        if not edit_ids:
+            return []
+        tallies = tallies.filter(edit_id_column.in_(edit_ids))
+    elif content_id is not None:
+        tallies = tallies.join(edit_class).filter(
+            edit_class.content_id == content_id)
+    else:
+        raise InputError("No arguments provided.",
+                         message="No data provided.",
+                         inputs=args)
+    try:
+        tallies = tallies.all()
+    except InterfaceError as e:
+        raise InputError("Invalid argument(s) provided.",
+                         exception=e,
+                         message="Invalid data provided.",
+                         inputs=args)
+    for edit_id, for_count, against_count, close_timestamp in tallies:
+        if for_count is None or against_count is None:
+            raise SelectError("Vote counts missing for edit " +
+                              str(edit_id) + "; run " +
+                              "migrations.migrate_vote_summaries first.")
+    return tallies
+
+
 def get_user_encrypt_info(email=None, remember_id=None, session=None):
     """
     Args:
@@ -916,8 +1290,11 @@ def get_author_count(content_id, session=None):
     if session is None:
         session = orm.start_session()
     try:
-        author_count = session.query(orm.ContentPiece.authors).filter(
-            orm.ContentPiece.content_id == content_id).count()
+        baked_query = bakery(lambda session: session.query(
+            orm.ContentPiece.authors).filter(
+            orm.ContentPiece.content_id == bindparam("content_id")))
+        author_count = baked_query(session).params(
+            content_id=content_id).count()
     except Exception as e:
         raise SelectError(str(e), exception=e)
     except InterfaceError as e:
@@ -951,27 +1328,32 @@ def get_user(user_id=None, email=None, remember_id=None, session=None):
     del args["session"]
     if session is None:
         session = orm.start_session()
+    baked_query = bakery(lambda session: session.query(orm.User))
     try:
         if email is not None:
+            baked_query += lambda query: query.filter(
+                orm.User.email == bindparam("email"))
             try:
-                user = session.query(orm.User).filter(
-                    orm.User.email == email).one()
+                user = baked_query(session).params(email=email).one()
             except MultipleResultsFound as e:
                 raise SelectError(str(e), exception=e)
             except NoResultFound:
                 return None
         elif remember_id is not None:
+            baked_query += lambda query: query.filter(
+                orm.User.remember_id == bindparam("remember_id"))
             try:
-                user = session.query(orm.User).filter(
-                    orm.User.remember_id == remember_id).one()
+                user = baked_query(session).params(
+                    remember_id=remember_id).one()
             except MultipleResultsFound as e:
                 raise SelectError(str(e), exception=e)
             except NoResultFound:
                 return None
         elif user_id is not None:
+            baked_query += lambda query: query.filter(
+                orm.User.user_id == bindparam("user_id"))
             try:
-                user = session.query(orm.User).filter(
-                    orm.User.user_id == user_id).one()
+                user = baked_query(session).params(user_id=user_id).one()
             except (NoResultFound, MultipleResultsFound) as e:
                 raise SelectError(str(e), exception=e)
         else:
@@ -1010,46 +1392,53 @@ def get_user_info(content_id=None, user_id=None, accepted_edit_id=None,
     del args["session"]
     if session is None:
         session = orm.start_session()
+    baked_query = bakery(lambda session: session.query(
+        orm.User.user_id, orm.User.user_name, orm.User.email))
     try:
         if content_id is not None:
-            info_tuples = session.query(orm.User.user_id,
-                orm.User.user_name, orm.User.email).join(
+            baked_query += lambda query: query.join(
                 orm.ContentPiece, orm.User.pieces).filter(
-                orm.ContentPiece.content_id == content_id).all()
+                orm.ContentPiece.content_id == bindparam("content_id"))
+            info_tuples = baked_query(session).params(
+                content_id=content_id).all()
             return info_tuples
         elif user_ids is not None:
             if user_ids:
-                info_tuples = session.query(orm.User.user_id,
-                    orm.User.user_name, orm.User.email).filter(
-                    orm.User.user_id.in_(user_ids)).all()
+                baked_query += lambda query: query.filter(
+                    orm.User.user_id.in_(
+                        bindparam("user_ids", expanding=True)))
+                info_tuples = baked_query(session).params(
+                    user_ids=list(user_ids)).all()
             else:
                 info_tuples = []
             return info_tuples
         elif user_id is not None:
+            baked_query += lambda query: query.filter(
+                orm.User.user_id == bindparam("user_id"))
             try:
-                info = session.query(orm.User.user_id,
-                    orm.User.user_name, orm.User.email).filter(
-                    orm.User.user_id == user_id).one()
+                info = baked_query(session).params(user_id=user_id).one()
             except (NoResultFound, MultipleResultsFound) as e:
                 raise SelectError(str(e), exception=e)
             else:
                 return info
         elif accepted_edit_id is not None:
+            baked_query += lambda query: query.join(
+                orm.AcceptedEdit).filter(
+                orm.AcceptedEdit.edit_id == bindparam("edit_id"))
             try:
-                info = session.query(orm.User.user_id,
-                    orm.User.user_name, orm.User.email).join(
-                    orm.AcceptedEdit).filter(orm.AcceptedEdit.edit_id
-                                             == accepted_edit_id).one()
+                info = baked_query(session).params(
+                    edit_id=accepted_edit_id).one()
             except (NoResultFound, MultipleResultsFound) as e:
                 raise SelectError(str(e), exception=e)
             else:
                 return info
         elif rejected_edit_id is not None:
+            baked_query += lambda query: query.join(
+                orm.RejectedEdit).filter(
+                orm.RejectedEdit.edit_id == bindparam("edit_id"))
             try:
-                info = session.query(orm.User.user_id,
-                    orm.User.user_name, orm.User.email).join(
-                    orm.RejectedEdit).filter(orm.RejectedEdit.edit_id
-                                             == rejected_edit_id).one()
+                info = baked_query(session).params(
+                    edit_id=rejected_edit_id).one()
             except (NoResultFound, MultipleResultsFound) as e:
                 raise SelectError(str(e), exception=e)
             else:
@@ -1147,3 +1536,98 @@ def get_user_reports(content_id=None, report_id=None, user_id=None,
                          exception=e,
                          message="Invalid data provided.",
                          inputs=args)
+
+
+def stream_history(table, batch_size=1000, session=None):
+    """
+    Walks a whole history table at constant memory, fetching rows in
+    batches through a server-side cursor. The session should not be
+    committed or used for other queries until the generator is
+    exhausted or closed.
+
+    Args:
+        table: String, accepts 'accepted_edit', 'rejected_edit',
+            'vote', or 'user_votes', the individual votes of voters.
+        batch_size: Integer, rows fetched per round trip.
+            Defaults to 1000.
+        session: SQLAlchemy session. Defaults to None.
+    Yields:
+        Dictionaries mapping column names to values, one per row,
+        in primary key order, or (vote_id, user_id) order for
+        'user_votes'.
+    Raises:
+        InputError: if table is not one of the accepted values.
+    """
+    args = locals()
+    del args["session"]
+    if table == "accepted_edit":
+        history_table = orm.AcceptedEdit.__table__
+    elif table == "rejected_edit":
+        history_table = orm.RejectedEdit.__table__
+    elif table == "vote":
+        history_table = orm.Vote.__table__
+    elif table == "user_votes":
+        history_table = orm.user_votes
+    else:
+        raise InputError("Invalid argument(s) provided.",
+                         message="Invalid data provided.",
+                         inputs=args)
+    key_columns = list(history_table.primary_key.columns)
+    if not key_columns:
+        # user_votes has no primary key, but one row per voter and vote.
+        key_columns = [history_table.c.vote_id, history_table.c.user_id]
+    if session is None:
+        session = orm.start_session()
+    # Plain columns rather than mapped objects, so nothing is added to
+    # the identity map and no relationships are loaded.
+    rows = session.query(*history_table.columns).order_by(
+        *key_columns).yield_per(batch_size)
+    try:
+        for row in rows:
+            yield row._asdict()
+    except InterfaceError as e:
+        raise InputError("Invalid argument(s) provided.",
+                         exception=e,
+                         message="Invalid data provided.",
+                         inputs=args)
+
+
+def stream_content_ids(changed_since=None, batch_size=1000, session=None):
+    """
+    Walks the IDs of the content pieces through a server-side cursor,
+    fetching them in batches. The session should not be committed or
+    used for other queries until the generator is exhausted or closed.
+
+    Args:
+        changed_since: Datetime. Defaults to None, meaning all content
+            pieces not deleted; otherwise, only the content pieces
+            created, edited, or deleted at or after changed_since.
+        batch_size: Integer, IDs fetched per round trip.
+            Defaults to 1000.
+        session: SQLAlchemy session. Defaults to None.
+    Yields:
+        Integers, in ascending order.
+    """
+    args = locals()
+    del args["session"]
+    if session is None:
+        session = orm.start_session()
+    content_ids = session.query(orm.ContentPiece.content_id)
+    if changed_since is None:
+        content_ids = content_ids.filter(
+            orm.ContentPiece.deleted_timestamp == None)
+    else:
+        content_ids = content_ids.filter(or_(
+            orm.ContentPiece.timestamp >= changed_since,
+            orm.ContentPiece.last_edited_timestamp >= changed_since,
+            orm.ContentPiece.deleted_timestamp >= changed_since))
+    content_ids = content_ids.order_by(
+        orm.ContentPiece.content_id).yield_per(batch_size)
+    try:
+        for content_id, in content_ids:
+            yield content_id
+    except InterfaceError as e:
+        raise InputError("Invalid argument(s) provided.",
+                         exception=e,
+                         message="Invalid data provided.",
+                         inputs=args)
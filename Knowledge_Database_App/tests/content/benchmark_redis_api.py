@@ -0,0 +1,133 @@
+"""
+Redis API Contention Benchmark
+
+Runs 64 concurrent writers storing edits through the WATCH/MULTI
+retry loop store_edit used to allocate edit IDs with, and then through
+the scripted store_edit, reporting the throughput of each and the
+number of retries the loop needed. The edits stored are deleted
+afterwards, though the edit ID counter is left advanced:
+
+    python -m Knowledge_Database_App.tests.content.benchmark_redis_api
+"""
+
+import sys
+import threading
+from datetime import datetime
+from timeit import default_timer
+
+from redis import WatchError
+
+from Knowledge_Database_App.content import redis_api
+
+
+WRITERS = 64
+EDITS_PER_WRITER = 100
+CONTENT_ID = -64064
+PART_ID = -64064
+
+
+def store_edit_with_watch(content_id, edit_text, edit_rationale,
+                          content_part, part_id, timestamp,
+                          start_timestamp, author_type):
+    """
+    The ID allocation loop and follow-up pipeline that store_edit
+    replaced. Returns a tuple of the form (edit_id, retries).
+    """
+    retries = 0
+    with redis_api.redis.pipeline() as pipe:
+        while True:
+            try:
+                pipe.watch("next_edit_id")
+                edit_id = int(pipe.get("next_edit_id"))
+                pipe.multi()
+                pipe.set("next_edit_id", edit_id + 1).execute()
+            except WatchError:
+                retries += 1
+                continue
+            else:
+                break
+        pipe.lpush("text:" + str(part_id), edit_id)
+        pipe.lpush("content:" + str(content_id), edit_id)
+        pipe.hmset("edit:" + str(edit_id), {
+            "edit_id": edit_id,
+            "content_id": content_id,
+            "edit_text": edit_text,
+            "edit_rationale": edit_rationale,
+            "content_part": content_part,
+            "part_id": part_id,
+            "timestamp": str(timestamp),
+            "start_timestamp": str(start_timestamp),
+            "author_type": author_type,
+        })
+        pipe.execute()
+    return edit_id, retries
+
+
+def store_edit_scripted(*args):
+    return redis_api.store_edit(*args), 0
+
+
+def run_writers(store_edit, writers, edits_per_writer):
+    results = []
+    lock = threading.Lock()
+
+    def write():
+        timestamp = datetime.utcnow()
+        writer_results = [
+            store_edit(CONTENT_ID, "Benchmark edit.", "Benchmark.", "text",
+                       PART_ID, timestamp, timestamp, "127.0.0.1")
+            for i in range(edits_per_writer)]
+        with lock:
+            results.extend(writer_results)
+
+    threads = [threading.Thread(target=write) for i in range(writers)]
+    start = default_timer()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    seconds = default_timer() - start
+    edit_ids = [edit_id for edit_id, retries in results]
+    retries = sum(retries for edit_id, retries in results)
+    return edit_ids, seconds, retries
+
+
+def cleanup(edit_ids):
+    with redis_api.redis.pipeline() as pipe:
+        for edit_id in edit_ids:
+            pipe.delete("edit:" + str(edit_id))
+        pipe.delete("text:" + str(PART_ID), "content:" + str(CONTENT_ID))
+        pipe.execute()
+
+
+def run(writers=WRITERS, edits_per_writer=EDITS_PER_WRITER):
+    """
+    Args:
+        writers: Integer. Defaults to WRITERS.
+        edits_per_writer: Integer. Defaults to EDITS_PER_WRITER.
+    Returns:
+        Dictionary of the form
+        {path: (edits stored, seconds, retries, duplicate IDs), ...}.
+    """
+    results = {}
+    for name, store_edit in [("watch", store_edit_with_watch),
+                             ("script", store_edit_scripted)]:
+        edit_ids, seconds, retries = run_writers(
+            store_edit, writers, edits_per_writer)
+        try:
+            results[name] = (len(edit_ids), seconds, retries,
+                             len(edit_ids) - len(set(edit_ids)))
+        finally:
+            cleanup(edit_ids)
+    return results
+
+
+if __name__ == "__main__":
+    edits_per_writer = (int(sys.argv[1]) if len(sys.argv) > 1
+                        else EDITS_PER_WRITER)
+    print("{:>8} {:>8} {:>10} {:>10} {:>10} {:>10}".format(
+        "path", "edits", "seconds", "edits/s", "retries", "duplicates"))
+    for name, (edits, seconds, retries, duplicates) in sorted(
+            run(edits_per_writer=edits_per_writer).items()):
+        print("{:>8} {:>8} {:>10.2f} {:>10.0f} {:>10} {:>10}".format(
+            name, edits, seconds, edits / seconds, retries, duplicates))
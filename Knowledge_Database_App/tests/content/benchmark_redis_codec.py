@@ -0,0 +1,88 @@
+"""
+Redis Codec Benchmark
+
+Stores 10,000 validating edits under one content piece and times
+get_edits reading them back, decoding the replies with the typed
+schemas in redis_api against the decode_response heuristics every
+reply used to go through. The edits stored are deleted afterwards:
+
+    python -m Knowledge_Database_App.tests.content.benchmark_redis_codec [EDITS]
+"""
+
+import sys
+from datetime import datetime
+from timeit import default_timer
+
+from Knowledge_Database_App.content import redis_api
+
+
+EDIT_COUNT = 10000
+REPEATS = 5
+CONTENT_ID = -10010
+PART_ID = -10010
+
+
+def get_edits_heuristic(content_id):
+    """get_edits(content_id=content_id) decoded as it used to be."""
+    edit_ids = redis_api.decode_response(redis_api.redis.zrevrangebyscore(
+        "content:" + str(content_id), "+inf", "-inf"))
+    with redis_api.redis.pipeline() as pipe:
+        for edit_id in edit_ids:
+            pipe.hgetall("edit:" + str(edit_id))
+        edits = [redis_api.decode_response(edit) for edit in pipe.execute()]
+    return {edit_id: edit for edit_id, edit in zip(edit_ids, edits)}
+
+
+def get_edits_typed(content_id):
+    return redis_api.get_edits(content_id=content_id)
+
+
+def store_edits(edit_count):
+    timestamp = datetime.utcnow()
+    return [redis_api.store_edit(
+                CONTENT_ID, "Benchmark edit number " + str(i) + ".",
+                "Benchmark.", "text", PART_ID, timestamp, timestamp, "U",
+                user_id=-i-1)
+            for i in range(edit_count)]
+
+
+def cleanup(edit_ids):
+    with redis_api.redis.pipeline() as pipe:
+        for i, edit_id in enumerate(edit_ids):
+            pipe.delete("edit:" + str(edit_id), "user:" + str(-i-1))
+        pipe.delete("text:" + str(PART_ID), "content:" + str(CONTENT_ID))
+        pipe.execute()
+
+
+def run(edit_count=EDIT_COUNT, repeats=REPEATS):
+    """
+    Args:
+        edit_count: Integer. Defaults to EDIT_COUNT.
+        repeats: Integer. Defaults to REPEATS.
+    Returns:
+        Dictionary of the form {decoder: best seconds per get_edits}.
+    """
+    edit_ids = store_edits(edit_count)
+    results = {}
+    try:
+        for name, get_edits in [("heuristic", get_edits_heuristic),
+                                ("typed", get_edits_typed)]:
+            times = []
+            for i in range(repeats):
+                start = default_timer()
+                get_edits(CONTENT_ID)
+                times.append(default_timer() - start)
+            results[name] = min(times)
+    finally:
+        cleanup(edit_ids)
+    return results
+
+
+if __name__ == "__main__":
+    edit_count = int(sys.argv[1]) if len(sys.argv) > 1 else EDIT_COUNT
+    results = run(edit_count)
+    print("{:>10} {:>10} {:>14}".format("decoder", "seconds", "edits/s"))
+    for name, seconds in sorted(results.items()):
+        print("{:>10} {:>10.3f} {:>14.0f}".format(
+            name, seconds, edit_count / seconds))
+    print("speedup: {:.1f}x".format(results["heuristic"] / results["typed"]))
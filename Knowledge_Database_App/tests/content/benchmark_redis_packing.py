@@ -0,0 +1,82 @@
+"""
+Redis Edit Packing Benchmark
+
+Stores the same validating edits as hashes of string fields and then
+packed, reporting the memory Redis uses for the edit keys (MEMORY
+USAGE, so Redis 4.0 or later is required) and the time get_edits takes
+to read them all back in each format. The edits stored are deleted
+afterwards, though the edit ID counter is left advanced:
+
+    python -m Knowledge_Database_App.tests.content.benchmark_redis_packing
+"""
+
+import sys
+from datetime import datetime
+from timeit import default_timer
+
+from Knowledge_Database_App.content import redis_api
+
+
+EDITS = 10000
+CONTENT_ID = -64065
+PART_ID = -64065
+EDIT_TEXT = ("Lorem ipsum dolor sit amet, consectetur adipiscing elit, "
+             "sed do eiusmod tempor incididunt ut labore et dolore. ") * 8
+
+
+def store_edits(edits, packed):
+    redis_api.PACK_EDITS = packed
+    try:
+        timestamp = datetime.utcnow()
+        return [redis_api.store_edit(
+                    CONTENT_ID, EDIT_TEXT, "Benchmark.", "text", PART_ID,
+                    timestamp, timestamp, "U", user_id=1)
+                for i in range(edits)]
+    finally:
+        redis_api.PACK_EDITS = False
+
+
+def memory_usage(edit_ids):
+    with redis_api.redis.pipeline() as pipe:
+        for edit_id in edit_ids:
+            pipe.execute_command("MEMORY", "USAGE", "edit:" + str(edit_id))
+        return sum(pipe.execute())
+
+
+def cleanup(edit_ids):
+    with redis_api.redis.pipeline() as pipe:
+        for edit_id in edit_ids:
+            pipe.delete("edit:" + str(edit_id))
+        pipe.delete(*redis_api._edit_index_keys(
+            content_id=CONTENT_ID, user_id=1, text_id=PART_ID))
+        pipe.execute()
+
+
+def run(edits=EDITS):
+    """
+    Args:
+        edits: Integer. Defaults to EDITS.
+    Returns:
+        Dictionary of the form
+        {format: (bytes used, seconds to read), ...}.
+    """
+    results = {}
+    for name, packed in [("hash", False), ("packed", True)]:
+        edit_ids = store_edits(edits, packed)
+        try:
+            start = default_timer()
+            redis_api.get_edits(text_id=PART_ID)
+            seconds = default_timer() - start
+            results[name] = (memory_usage(edit_ids), seconds)
+        finally:
+            cleanup(edit_ids)
+    return results
+
+
+if __name__ == "__main__":
+    edits = int(sys.argv[1]) if len(sys.argv) > 1 else EDITS
+    print("{:>8} {:>14} {:>14} {:>10}".format(
+        "format", "bytes", "bytes/edit", "read (s)"))
+    for name, (usage, seconds) in sorted(run(edits).items()):
+        print("{:>8} {:>14} {:>14.0f} {:>10.3f}".format(
+            name, usage, usage / edits, seconds))
@@ -17,6 +17,7 @@ from Knowledge_Database_App.tests.storage import PostgresTest
 from Knowledge_Database_App.tests.content.test_redis import RedisTest
 from Knowledge_Database_App.tests.search import ElasticsearchTest
 from Knowledge_Database_App.content.content import Content
+from Knowledge_Database_App.search import index
 from Knowledge_Database_App.search.index import SearchableContentPiece
 from Knowledge_Database_App.storage import orm_core as orm
 
@@ -100,6 +101,8 @@ class ContentPieceTest(PostgresTest, RedisTest, ElasticsearchTest):
     def test_02_store(self):
         try:
             self.__class__.piece.store()
+            # Indexing is asynchronous, so write the new piece now.
+            index.flush_outbox(coalesce_seconds=0)
             elastic_engine.indices.refresh()
         except Exception as e:
             self.failure = True
@@ -342,6 +345,32 @@ class ContentPieceTest(PostgresTest, RedisTest, ElasticsearchTest):
                     self.failure = True
                     self.fail(str(e))
 
+    @skipIf(failure, "Previous test failed!")
+    def test_08_search_cursor(self):
+        try:
+            page, page_after = Content.search(
+                "the force awakens", page_num=2, return_cursor=True)
+            first, first_after = Content.search(
+                "the force awakens", return_cursor=True, cursor=True)
+        except Exception as e:
+            self.failure = True
+            self.fail(str(e))
+        else:
+            # Pages fetched by number stay numbered, without a cursor.
+            self.assertEqual(page, Content.search("the force awakens",
+                                                  page_num=2))
+            self.assertIsNone(page_after)
+            if first["count"] > 10:
+                self.assertIsInstance(first_after, str)
+                second, second_after = Content.search(
+                    "the force awakens", after=first_after,
+                    return_cursor=True)
+                self.assertFalse(
+                    {result["content_id"] for result in first["results"]} &
+                    {result["content_id"] for result in second["results"]})
+            else:
+                self.assertIsNone(first_after)
+
     @skipIf(failure, "Previous test failed!")
     def test_09_autocomplete(self):
         try:
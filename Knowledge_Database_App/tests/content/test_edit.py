@@ -8,16 +8,19 @@ Note: Tests are numbered to force a desired execution order.
 """
 
 import warnings
-from datetime import datetime
+from datetime import datetime, timedelta
 from math import ceil
-from unittest import TestCase, skipIf
+from unittest import TestCase, skipIf, mock
 
 from Knowledge_Database_App.tests import skipIfTrue
 from Knowledge_Database_App.tests.storage import PostgresTest
 from Knowledge_Database_App.tests.content.test_redis import RedisTest
 from Knowledge_Database_App.tests.search import ElasticsearchTest
-from Knowledge_Database_App.content.edit_diff import restore
+from Knowledge_Database_App.storage import orm_core as orm
+from Knowledge_Database_App.content import redis_api
+from Knowledge_Database_App.content.edit_diff import restore, compute_diff
 from Knowledge_Database_App.content.content import Content
+from Knowledge_Database_App.content import edit as edit_module
 from Knowledge_Database_App.content.edit import Edit
 
 
@@ -399,3 +402,175 @@ class ContentEditTest(PostgresTest, RedisTest, ElasticsearchTest):
             except AssertionError:
                 self.__class__.failure = True
                 raise
+
+    @skipIf(failure, "Previous test failed!")
+    @ignore_warnings
+    def test_09_accept_batch(self):
+        base_text = Content(content_id=self.__class__.content_id).text.text
+        first_text = base_text.replace("dark side Force user",
+                                       "dark Force user")
+        second_text = base_text.replace("Han Solo", "General Han Solo")
+        start_timestamp = datetime.utcnow()
+        edits = []
+        for edit_text in [first_text, second_text]:
+            edit = Edit(
+                content_id=self.__class__.content_id,
+                edit_text=edit_text,
+                edit_rationale=self.__class__.edit_rationale,
+                content_part=self.__class__.content_part,
+                part_id=self.__class__.part_id,
+                original_part_text=base_text,
+                author_type="U",
+                author_id=self.__class__.first_author_id,
+                start_timestamp=start_timestamp,
+            )
+            edit.save()
+            edits.append(edit)
+        redis_edit_ids = [edit.edit_id for edit in edits]
+        committed_counts = []
+        delete_validation_data = redis_api.delete_validation_data
+
+        def count_committed(content_id, edit_id, *args):
+            # A separate session only sees the edit once it is committed.
+            session = orm.start_session()
+            try:
+                committed_counts.append(session.query(
+                    orm.AcceptedEdit).filter_by(redis_edit_id=edit_id).count())
+            finally:
+                session.close()
+            return delete_validation_data(content_id, edit_id, *args)
+
+        try:
+            with mock.patch.object(Edit, "_notify"), \
+                    mock.patch.object(redis_api, "delete_validation_data",
+                                      side_effect=count_committed):
+                Edit.accept_batch([(edit, []) for edit in edits])
+        except Exception as e:
+            self.__class__.failure = True
+            self.fail(str(e))
+        else:
+            part_text = Content(
+                content_id=self.__class__.content_id).text.text
+            accepted_edit_ids = [edit.edit_id for edit in Edit.bulk_retrieve(
+                "accepted", text_id=self.__class__.part_id)]
+            try:
+                self.assertEqual(part_text, base_text.replace(
+                    "dark side Force user", "dark Force user").replace(
+                    "Han Solo", "General Han Solo"))
+                for edit in edits:
+                    self.assertEqual(edit.validation_status, "accepted")
+                    self.assertIn(edit.edit_id, accepted_edit_ids)
+                self.assertEqual(committed_counts, [1, 1])
+                for redis_edit_id in redis_edit_ids:
+                    self.assertFalse(
+                        redis_api.get_validation_data(redis_edit_id))
+            except AssertionError:
+                self.__class__.failure = True
+                raise
+
+
+class EditDecisionTest(TestCase):
+
+    # (author_count, for_vote_count, vote_count, days_since_creation,
+    #  decision)
+    decisions = [
+        (0, 0, 0, 0, "accept"),
+        (3, 0, 0, 9, None),
+        (3, 0, 0, 10, "accept"),
+        (4, 2, 4, 0, "accept"),
+        (4, 2, 2, 0, "accept"),
+        (4, 2, 3, 0, None),
+        (4, 2, 3, 5, "accept"),
+        (6, 1, 2, 5, None),
+        (4, 1, 2, 10, "accept"),
+        (4, 0, 2, 0, "reject"),
+        (6, 1, 3, 10, "reject"),
+        (4, 1, 1, 0, None),
+    ]
+
+    def test_decide(self):
+        for (author_count, for_vote_count, vote_count, days_since_creation,
+                decision) in self.decisions:
+            with self.subTest(author_count=author_count,
+                              for_vote_count=for_vote_count,
+                              vote_count=vote_count,
+                              days_since_creation=days_since_creation):
+                self.assertEqual(Edit._decide(author_count, for_vote_count,
+                                              vote_count, days_since_creation),
+                                 decision)
+
+    def test_decision_possible(self):
+        timestamp = datetime.utcnow()
+        edit = Edit(validation_status="validating", edit_object={
+            "edit_id": 1,
+            "content_id": -1013,
+            "edit_text": compute_diff("Kylo Ren is a Sith.",
+                                      "Kylo Ren is a Jedi."),
+            "edit_rationale": "Unlimited power!",
+            "content_part": "text",
+            "part_id": -100,
+            "timestamp": timestamp,
+            "start_timestamp": timestamp,
+            "author_type": "127.0.0.1",
+        })
+        with mock.patch.object(Edit, "_author_count", return_value=4):
+            self.assertFalse(edit.decision_possible((1, 0, 1)))
+            self.assertTrue(edit.decision_possible((2, 0, 2)))
+
+
+class SweepDeadlinesTest(RedisTest):
+
+    def setUp(self):
+        redis_api._reset_db()
+
+    def tearDown(self):
+        redis_api._reset_db()
+
+    def store_edit(self, days_ago):
+        timestamp = datetime.utcnow() - timedelta(days=days_ago)
+        edit_id = redis_api.store_edit(
+            -1013, compute_diff("Kylo Ren is a Sith.", "Kylo Ren is a Jedi."),
+            "Unlimited power!", "text", -100, timestamp, timestamp,
+            "127.0.0.1", None)
+        return edit_id, timestamp
+
+    def assertDeadline(self, edit_id, deadline):
+        self.assertAlmostEqual(
+            float(redis_api.redis.zscore("deadlines", edit_id)),
+            redis_api._score(deadline), delta=0.001)
+
+    def test_sweep_deadlines(self):
+        reminder_id, reminder_timestamp = self.store_edit(4.5)
+        validate_id, validate_timestamp = self.store_edit(5.5)
+        # Past the final validation, as when that validation failed.
+        retry_id, retry_timestamp = self.store_edit(11.5)
+        redis_api.store_deadlines({
+            reminder_id: reminder_timestamp + timedelta(days=4),
+            validate_id: validate_timestamp + timedelta(days=5),
+            retry_id: retry_timestamp + timedelta(days=11),
+        })
+        author_info = [{"user_id": 1, "email": "kylo@ren.com"}]
+        before_sweep = datetime.utcnow()
+        with mock.patch.object(edit_module.validate_batch,
+                               "apply_async") as validate_batch, \
+                mock.patch.object(Edit, "_notify") as notify, \
+                mock.patch.object(Edit.storage_handler, "call",
+                                  return_value=author_info):
+            deadline_count = edit_module.sweep_deadlines()
+        after_sweep = datetime.utcnow()
+        self.assertEqual(deadline_count, 3)
+        self.assertEqual(validate_batch.call_count, 1)
+        self.assertEqual(sorted(validate_batch.call_args[1]["args"][0]),
+                         sorted([validate_id, retry_id]))
+        notify.apply_async.assert_called_once_with(
+            args=["vote_reminder"],
+            kwargs={"author_info": author_info, "days_remaining": 6})
+        self.assertDeadline(reminder_id,
+                            reminder_timestamp + timedelta(days=5))
+        self.assertDeadline(validate_id,
+                            validate_timestamp + timedelta(days=8))
+        retry_score = float(redis_api.redis.zscore("deadlines", retry_id))
+        self.assertGreaterEqual(retry_score, redis_api._score(
+            before_sweep + edit_module.VALIDATION_RETRY_INTERVAL))
+        self.assertLessEqual(retry_score, redis_api._score(
+            after_sweep + edit_module.VALIDATION_RETRY_INTERVAL))
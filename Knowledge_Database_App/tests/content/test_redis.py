@@ -7,11 +7,12 @@ functions, not exceptional cases.
 Note: Tests are numbered to force a desired execution order.
 """
 
-from datetime import datetime
+from datetime import datetime, timedelta
 from unittest import TestCase, skipIf
 
 from Knowledge_Database_App.tests import skipIfTrue
 from Knowledge_Database_App.content import redis_api
+from Knowledge_Database_App.content.exceptions import DuplicateVoteError
 
 
 class RedisTest(TestCase):
@@ -93,8 +94,23 @@ class RedisAPITest(RedisTest):
                                  self.__class__.test_data["start_timestamp"])
                 self.assertEqual(edit["author_type"], 
                                  self.__class__.test_data["author_type"])
-                self.assertEqual(edit["user_id"], 
+                self.assertEqual(edit["user_id"],
                                  self.__class__.test_data["user_id"])
+                self.assertEqual(redis_api.count_edits(
+                    content_id=self.__class__.test_data["content_id"]), 1)
+                self.assertEqual(redis_api.get_edits(
+                    text_id=self.__class__.test_data["part_id"],
+                    only_ids=True, count=1), [self.__class__.edit_id])
+                self.assertEqual(redis_api.get_edits(
+                    text_id=self.__class__.test_data["part_id"],
+                    only_ids=True, offset=1), [])
+                self.assertEqual(redis_api.get_edits(
+                    content_id=self.__class__.test_data["content_id"],
+                    text_id=self.__class__.test_data["part_id"],
+                    only_ids=True), [self.__class__.edit_id])
+                self.assertEqual(redis_api.count_edits(
+                    content_id=self.__class__.test_data["content_id"],
+                    user_id=self.__class__.test_data["user_id"] - 1), 0)
             except AssertionError:
                 self.__class__.failure = True
                 raise
@@ -105,7 +121,7 @@ class RedisAPITest(RedisTest):
     @skipIf(failure, "Previous test failed!")
     def test_02_store_vote(self):
         try:
-            redis_api.store_vote(self.__class__.edit_id, 
+            tallies = redis_api.store_vote(self.__class__.edit_id, 
                                  self.__class__.test_data["voter_id"], 
                                  self.__class__.test_data["vote_and_time"])
         except Exception as e:
@@ -121,6 +137,14 @@ class RedisAPITest(RedisTest):
                 self.assertEqual(votes[self.__class__.test_data["voter_id"]], 
                                  self.__class__.test_data["vote_and_time"])
                 self.assertIn(self.__class__.edit_id, voted_edit_ids)
+                with self.assertRaises(DuplicateVoteError):
+                    redis_api.store_vote(
+                        self.__class__.edit_id,
+                        self.__class__.test_data["voter_id"],
+                        self.__class__.test_data["vote_and_time"])
+                self.assertEqual(tallies, (1, 0, 1))
+                self.assertEqual(
+                    redis_api.get_tallies(self.__class__.edit_id), (1, 0, 1))
             except AssertionError:
                 self.__class__.failure = True
                 raise
@@ -437,9 +461,107 @@ class RedisAPITest(RedisTest):
                 validation_data = redis_api.get_validation_data(self.__class__.edit_id)
                 self.assertFalse(validation_data["edit"])
                 self.assertFalse(validation_data["votes"])
+                self.assertEqual(
+                    redis_api.get_tallies(self.__class__.edit_id), (0, 0, 0))
+                self.assertFalse(redis_api.claim_edit(self.__class__.edit_id))
             except AssertionError:
                 self.__class__.failure = True
                 raise
             except Exception as e:
                 self.__class__.failure = True
                 self.fail(str(e))
+
+    @skipIf(failure, "Previous test failed!")
+    def test_14_deadlines(self):
+        timestamp = datetime(2016, 1, 31, 2, 33, 58)
+        try:
+            redis_api.store_deadlines({-1: timestamp,
+                                       -2: timestamp + timedelta(days=1)})
+            due = redis_api.pop_deadlines(timestamp, 10)
+            popped_again = redis_api.pop_deadlines(timestamp, 10)
+            later = redis_api.pop_deadlines(
+                timestamp + timedelta(days=2), 10)
+        except Exception as e:
+            self.__class__.failure = True
+            self.fail(str(e))
+        else:
+            self.assertEqual(due, [(-1, timestamp)])
+            self.assertEqual(popped_again, [])
+            self.assertEqual(later, [(-2, timestamp + timedelta(days=1))])
+
+    @skipIf(failure, "Previous test failed!")
+    def test_15_author_count(self):
+        try:
+            redis_api.store_author_count(-1, 3)
+            author_count = redis_api.get_author_count(-1)
+            ttl = redis_api.redis.ttl("author_count:-1")
+            redis_api.expire_author_count(-1)
+            expired_count = redis_api.get_author_count(-1)
+        except Exception as e:
+            self.__class__.failure = True
+            self.fail(str(e))
+        else:
+            self.assertEqual(author_count, 3)
+            self.assertGreater(ttl, 0)
+            self.assertLessEqual(ttl, redis_api.AUTHOR_COUNT_EXPIRE_SECONDS)
+            self.assertIsNone(expired_count)
+
+
+class RedisCodecTest(TestCase):
+
+    def test_decode_hash(self):
+        timestamp = datetime(2016, 1, 31, 2, 33, 58, 60915)
+        edit = redis_api.decode_hash("edit", {
+            b"edit_id": b"12",
+            b"edit_text": b"1999",
+            b"timestamp": str(timestamp).encode("ascii"),
+            b"start_timestamp": str(timestamp.replace(
+                microsecond=0)).encode("ascii"),
+        })
+        votes = redis_api.decode_hash("votes", {b"-42": b"Y; 2016-01-31"})
+        self.assertEqual(edit["edit_id"], 12)
+        # Numeric looking text stays a string.
+        self.assertEqual(edit["edit_text"], "1999")
+        self.assertEqual(edit["timestamp"], timestamp)
+        self.assertEqual(edit["start_timestamp"],
+                         timestamp.replace(microsecond=0))
+        self.assertEqual(votes, {-42: "Y; 2016-01-31"})
+        self.assertEqual(redis_api.decode_ids([b"3", b"1"]), [3, 1])
+        # Edits adding a content part have no part ID.
+        add_edit = redis_api.decode_hash("edit", {
+            b"part_id": b"None", b"content_part": b"keyword"})
+        self.assertIsNone(add_edit["part_id"])
+        self.assertEqual(redis_api.decode_hash(
+            "edit", {b"part_id": b"7"})["part_id"], 7)
+
+    def test_decode_packed_edit(self):
+        timestamp = datetime(2016, 1, 31, 2, 33, 58, 60915)
+        edit = {
+            "content_id": 5,
+            "edit_text": "Some long edit text. " * 50,
+            "edit_rationale": "Fixed a typo.",
+            "content_part": "text",
+            "part_id": 7,
+            "timestamp": timestamp,
+            "start_timestamp": timestamp.replace(microsecond=0),
+            "author_type": "U",
+            "user_id": 9,
+        }
+        packed = redis_api.pack_edit(edit)
+        self.assertLess(len(packed), len(edit["edit_text"]))
+        self.assertEqual(
+            redis_api.decode_edit({b"edit_id": b"12", b"packed": packed}),
+            dict(edit, edit_id=12))
+        del edit["user_id"]
+        edit["author_type"] = "127.0.0.1"
+        self.assertEqual(
+            redis_api.decode_edit({b"edit_id": b"12",
+                                   b"packed": redis_api.pack_edit(edit)}),
+            dict(edit, edit_id=12))
+        # Edits adding a content part have no part ID.
+        edit["part_id"] = None
+        edit["content_part"] = "keyword"
+        self.assertEqual(
+            redis_api.decode_edit({b"edit_id": b"12",
+                                   b"packed": redis_api.pack_edit(edit)}),
+            dict(edit, edit_id=12))
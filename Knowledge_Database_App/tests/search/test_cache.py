@@ -0,0 +1,66 @@
+"""
+Search Result Cache Unit Tests
+"""
+
+from unittest import TestCase
+
+from Knowledge_Database_App.content import redis_api
+from Knowledge_Database_App.search import cache
+
+
+class CacheTest(TestCase):
+
+    def setUp(self):
+        redis_api._reset_db()
+        cache.clear_local_cache()
+        self.calls = []
+
+        @cache.cached(normalize={"query_string": cache.normalize_query})
+        def find(query_string, page_num=1):
+            self.calls.append((query_string, page_num))
+            return {"count": 1, "results": [{"query": query_string,
+                                             "page_num": page_num}]}
+        self.find = find
+
+    def tearDown(self):
+        redis_api._reset_db()
+        cache.clear_local_cache()
+
+    def test_cached(self):
+        first = self.find("The  Force")
+        second = self.find("the force", page_num=1)
+        self.assertEqual(first, second)
+        self.assertEqual(self.calls, [("the force", 1)])
+        cache.clear_local_cache()
+        self.assertEqual(self.find("the force"), first)
+        self.assertEqual(len(self.calls), 1)
+        self.find("the force", page_num=2)
+        self.assertEqual(len(self.calls), 2)
+
+    def test_mutated_result(self):
+        del self.find("kylo")["results"][0]["query"]
+        self.assertEqual(self.find("kylo")["results"][0]["query"], "kylo")
+
+    def test_bump_generation(self):
+        self.find("kylo")
+        cache.bump_generation()
+        # Results are not cached until the index shows the write.
+        self.find("kylo")
+        self.find("kylo")
+        self.assertEqual(len(self.calls), 3)
+        redis_api.redis.delete("search_generation_settling")
+        self.find("kylo")
+        self.find("kylo")
+        self.assertEqual(len(self.calls), 4)
+
+    def test_get_cache_stats(self):
+        before = cache.get_cache_stats()
+        self.find("rey")
+        self.find("rey")
+        cache.clear_local_cache()
+        self.find("rey")
+        after = cache.get_cache_stats()
+        self.assertEqual(after["misses"] - before["misses"], 1)
+        self.assertEqual(after["local_hits"] - before["local_hits"], 1)
+        self.assertEqual(after["redis_hits"] - before["redis_hits"], 1)
+        self.assertIsInstance(after["hit_ratio"], float)
@@ -49,69 +49,6 @@ class SearchIndexTest(ElasticsearchTest):
                 self.__class__.failure = True
                 self.fail(str(e))
 
-    @skipIf(failure, "Previous test failed!")
-    def test_02_add_to_content_piece(self):
-        try:
-            index.add_to_content_piece(121, "alternate_name", "Jedi Killer")
-            index.add_to_content_piece(121, "keyword", "Knights of Ren")
-            index.add_to_content_piece(121, "citation", 
-                "Lucas, George. Star Wars: Return of the Jedi. 1983.")
-        except Exception as e:
-            self.__class__.failure = True
-            self.fail(str(e))
-        else:
-            try:
-                content_piece = index.SearchableContentPiece.get(id=121, ignore=404)
-                if content_piece is not None:
-                    self.assertIn("Jedi Killer", content_piece.alternate_names)
-                    self.assertIn("Knights of Ren", content_piece.keywords)
-                    self.assertIn(
-                        "Lucas, George. Star Wars: Return of the Jedi. 1983.",
-                        content_piece.citations)
-            except AssertionError:
-                self.__class__.failure = True
-                raise
-            except Exception as e:
-                self.__class__.failure = True
-                self.fail(str(e))
-
-    @skipIf(failure, "Previous test failed!")
-    def test_02_update_content_piece(self):
-        try:
-            index.update_content_piece(121, "name", part_string="Ben Solo")
-            index.update_content_piece(121, "alternate_name", 
-                part_strings=["Kylo Ren"])
-            index.update_content_piece(121, "text", 
-                part_string="Ben Solo is the brother of Rey.")
-            index.update_content_piece(121, "content_type", 
-                part_string="conjecture")
-            index.update_content_piece(121, "keyword", 
-                part_strings=["star wars", "jedi"])
-            index.update_content_piece(121, "citation",
-                part_strings=["Abrams, J.J. Star Wars: Episode VII. 2015"])
-        except Exception as e:
-            self.__class__.failure = True
-            self.fail(str(e))
-        else:
-            try:
-                content_piece = index.SearchableContentPiece.get(id=121, ignore=404)
-                if content_piece is not None:
-                    self.assertEqual(int(content_piece.meta.id), 121)
-                    self.assertEqual(content_piece.name, "Ben Solo")
-                    self.assertEqual(content_piece.alternate_names, ["Kylo Ren"])
-                    self.assertEqual(content_piece.text,
-                                     "Ben Solo is the brother of Rey.")
-                    self.assertEqual(content_piece.content_type, "conjecture")
-                    self.assertEqual(content_piece.keywords, ["star wars", "jedi"])
-                    self.assertEqual(content_piece.citations,
-                                     ["Abrams, J.J. Star Wars: Episode VII. 2015"])
-            except AssertionError:
-                self.__class__.failure = True
-                raise
-            except Exception as e:
-                self.__class__.failure = True
-                self.fail(str(e))
-
     @skipIf(failure, "Previous test failed!")
     def test_03_remove_content_piece(self):
         try:
@@ -130,3 +67,29 @@ class SearchIndexTest(ElasticsearchTest):
             except Exception as e:
                 self.__class__.failure = True
                 self.fail(str(e))
+
+    @skipIf(failure, "Previous test failed!")
+    def test_04_outbox_action(self):
+        parts = {
+            "name": "Kylo Ren",
+            "alternate_names": ["Ben Solo"],
+            "text": "Kylo Ren is a member of the Knights of Ren.",
+            "content_type": "definition",
+            "keywords": ["jedi"],
+            "citations": [],
+            "deleted_timestamp": None,
+        }
+        update = index._outbox_action(121, {"keyword", "name"}, parts)
+        self.assertEqual(update["_op_type"], "update")
+        self.assertEqual(update["_retry_on_conflict"],
+                         index.RETRY_ON_CONFLICT)
+        self.assertEqual(set(update["doc"]), {"content_id", "keywords",
+                                              "keywords_suggest",
+                                              "name", "name_suggest"})
+        self.assertEqual(update["doc"]["keywords"], ["jedi"])
+        self.assertEqual(update["doc"]["name"], "Kylo Ren")
+        full = index._outbox_action(121, {"all", "keyword"}, parts)
+        self.assertEqual(full["_op_type"], "index")
+        self.assertEqual(full["_source"]["text"], parts["text"])
+        self.assertEqual(index._outbox_action(121, {"text"}, None)["_op_type"],
+                         "delete")
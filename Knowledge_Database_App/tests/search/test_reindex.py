@@ -0,0 +1,32 @@
+"""
+Search Reindexing Unit Tests
+"""
+
+from unittest import TestCase
+
+from Knowledge_Database_App.search import reindex
+
+
+class BuildActionsTest(TestCase):
+
+    def test_build_actions(self):
+        parts = {
+            121: {
+                "name": "Kylo Ren",
+                "alternate_names": ["Ben Solo"],
+                "text": "Kylo Ren is a member of the Knights of Ren.",
+                "content_type": "definition",
+                "keywords": ["jedi"],
+                "citations": ["Abrams, J.J. The Force Awakens. 2015."],
+                "deleted_timestamp": None,
+            },
+        }
+        actions = reindex._build_actions(("content_20160131023358", parts))
+        self.assertEqual(len(actions), 1)
+        self.assertEqual(actions[0]["_index"], "content_20160131023358")
+        self.assertEqual(actions[0]["_id"], 121)
+        self.assertEqual(actions[0]["_source"]["name"], "Kylo Ren")
+        self.assertEqual(actions[0]["_source"]["alternate_names_suggest"],
+                         {"input": ["Ben Solo"],
+                          "payload": {"content_id": 121}})
+        self.assertEqual(actions[0]["_source"]["keywords"], ["jedi"])
@@ -45,6 +45,26 @@ class SearchQueryTest(ElasticsearchTest):
             else:
                 self.assertEqual(response["count"], 0)
 
+    def test_search_cursor(self):
+        try:
+            pages = [search_api.search("the", cursor=True)]
+            while pages[-1]["after"] is not None and len(pages) < 5:
+                pages.append(search_api.search(
+                    "the", cursor=True, after=pages[-1]["after"]))
+        except Exception as e:
+            self.fail(str(e))
+        else:
+            content_ids = [result["content_id"] for page in pages
+                           for result in page["results"]]
+            self.assertEqual(len(content_ids), len(set(content_ids)))
+            for page in pages[:-1]:
+                self.assertEqual(len(page["results"]), 10)
+                self.assertEqual(len(page["after"]), 2)
+                self.assertEqual(page["after"][1],
+                                 page["results"][-1]["content_id"])
+            if pages[-1]["after"] is None:
+                self.assertLess(len(pages[-1]["results"]), 10)
+
     def test_filter_by(self):
         try:
             name_response = search_api.filter_by("name", "lem", page_num=1)
@@ -120,10 +120,10 @@ class StorageTest(orm.StorageHandler):
             "edit_text": "This is an edit.",
             "applied_edit_text": "This is an edit.",
             "edit_rationale": "Unlimited power.",
-            "vote_string": "This is a vote.",
-            "voter_ids": self.session.query(orm.User.user_id).join(
-                orm.User.pieces).filter(
-                orm.ContentPiece.content_id == content_id).all(),
+            "votes": [(voter_id, "Y", datetime.utcnow()) for voter_id,
+                      in self.session.query(orm.User.user_id).join(
+                          orm.User.pieces).filter(
+                          orm.ContentPiece.content_id == content_id).all()],
             "user_name": "Vader",
             "email": "vader@empire.gov",
             "pass_hash": "12345",
@@ -0,0 +1,105 @@
+"""
+Storage Action Query Benchmarks
+
+Compares associating the voters of a closed edit with its vote through
+one savepoint per voter against the single multi-row insert used by
+store_accepted_edit and store_rejected_edit. All rows written are
+rolled back afterwards, so it can be run against the test database:
+
+    python -m Knowledge_Database_App.tests.storage.benchmark_action_queries
+"""
+
+from datetime import datetime
+from timeit import default_timer
+
+from sqlalchemy.exc import IntegrityError
+
+from Knowledge_Database_App.storage import action_queries as action
+from Knowledge_Database_App.storage import orm_core as orm
+
+
+VOTER_COUNTS = [1, 50, 500]
+REPEATS = 5
+
+
+def store_voters_with_savepoints(vote_id, votes, session):
+    """The per-voter savepoint path the edit storing functions replaced."""
+    for voter_id, vote, timestamp in votes:
+        session.begin_nested()
+        try:
+            session.execute(orm.user_votes.insert(),
+                params={"vote_id": vote_id, "user_id": voter_id,
+                        "vote": vote, "timestamp": timestamp})
+        except IntegrityError as e:
+            if e.orig.pgcode != action.UNIQUE_CONSTRAINT_VIOLATION:
+                raise
+            else:
+                session.rollback()
+        else:
+            session.commit()
+
+
+def create_voters(voter_count, session):
+    timestamp = datetime.utcnow()
+    voters = [orm.User(user_type="standard", user_name="Voter " + str(i),
+                       email="voter" + str(i) + "@benchmark.kdb",
+                       pass_hash="none", pass_hash_type="none",
+                       pass_salt="none", remember_id=-100000-i,
+                       timestamp=timestamp)
+              for i in range(voter_count)]
+    session.add_all(voters)
+    session.flush()
+    return [voter.user_id for voter in voters]
+
+
+def time_store_voters(store_voters, voter_ids, session):
+    timestamp = datetime.utcnow()
+    vote = orm.Vote(for_count=len(voter_ids), against_count=0,
+                    content_part="text", timestamp=timestamp,
+                    close_timestamp=timestamp)
+    session.add(vote)
+    session.flush()
+    votes = [(voter_id, "Y", timestamp) for voter_id in voter_ids]
+    start = default_timer()
+    store_voters(vote.vote_id, votes, session)
+    session.flush()
+    return default_timer() - start
+
+
+def run(voter_counts=VOTER_COUNTS, repeats=REPEATS):
+    """
+    Args:
+        voter_counts: List of Integers. Defaults to VOTER_COUNTS.
+        repeats: Integer. Defaults to REPEATS.
+    Returns:
+        Dictionary of the form
+        {voter_count: (savepoint seconds, multi-row insert seconds), ...},
+        holding the best time of each path over all repeats.
+    """
+    session = orm.start_session()
+    results = {}
+    try:
+        voter_ids = create_voters(max(voter_counts), session)
+        for voter_count in voter_counts:
+            savepoint_times = []
+            insert_times = []
+            for i in range(repeats):
+                savepoint_times.append(time_store_voters(
+                    store_voters_with_savepoints,
+                    voter_ids[:voter_count], session))
+                insert_times.append(time_store_voters(
+                    action._store_voters, voter_ids[:voter_count], session))
+            results[voter_count] = (min(savepoint_times), min(insert_times))
+    finally:
+        session.rollback()
+        session.close()
+    return results
+
+
+if __name__ == "__main__":
+    print("{:>8} {:>14} {:>14} {:>8}".format(
+        "voters", "savepoints (s)", "insert (s)", "speedup"))
+    for voter_count, (savepoint_time, insert_time) in sorted(run().items()):
+        print("{:>8} {:>14.5f} {:>14.5f} {:>7.1f}x".format(
+            voter_count, savepoint_time, insert_time,
+            savepoint_time / insert_time))
@@ -0,0 +1,72 @@
+"""
+Storage History Export Benchmark
+
+Fills Accepted_Edit with generated rows (10 million by default), then
+times exporting them as NDJSON and CSV and reports the peak memory of
+the process, which should not grow with the row count. The generated
+rows are rolled back afterwards, so it can be run against the test
+database:
+
+    python -m Knowledge_Database_App.tests.storage.benchmark_export [ROWS]
+"""
+
+import os
+import sys
+import resource
+from timeit import default_timer
+
+from Knowledge_Database_App.storage import orm_core as orm
+from Knowledge_Database_App.storage.export import export_history
+
+
+ROW_COUNT = 10000000
+
+
+def fill_accepted_edits(row_count, session):
+    session.execute(
+        'INSERT INTO "Accepted_Edit" (redis_edit_id, edit_text, '
+        'applied_edit_text, edit_rationale, content_part, timestamp, '
+        'acc_timestamp, author_type) '
+        "SELECT -n, 'Edit text ' || n, 'Applied edit text ' || n, "
+        "'Rationale', 'text', now(), now(), '127.0.0.1' "
+        "FROM generate_series(1, :row_count) AS n",
+        params={"row_count": row_count})
+
+
+def peak_memory_mb():
+    # ru_maxrss is in kilobytes on Linux.
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+def run(row_count=ROW_COUNT):
+    """
+    Args:
+        row_count: Integer. Defaults to ROW_COUNT.
+    Returns:
+        Dictionary of the form
+        {format: (rows exported, seconds, peak memory in MB), ...}.
+    """
+    session = orm.start_session()
+    results = {}
+    try:
+        fill_accepted_edits(row_count, session)
+        with open(os.devnull, "w") as output:
+            for format in ["ndjson", "csv"]:
+                start = default_timer()
+                exported = export_history("accepted_edit", output,
+                                          format=format, session=session)
+                results[format] = (exported, default_timer() - start,
+                                   peak_memory_mb())
+    finally:
+        session.rollback()
+        session.close()
+    return results
+
+
+if __name__ == "__main__":
+    row_count = int(sys.argv[1]) if len(sys.argv) > 1 else ROW_COUNT
+    print("{:>8} {:>12} {:>10} {:>12} {:>10}".format(
+        "format", "rows", "seconds", "rows/s", "peak MB"))
+    for format, (exported, seconds, memory) in sorted(run(row_count).items()):
+        print("{:>8} {:>12} {:>10.1f} {:>12.0f} {:>10.1f}".format(
+            format, exported, seconds, exported / seconds, memory))
@@ -0,0 +1,113 @@
+"""
+Storage Select Query Benchmarks
+
+Compares the per-call time of the baked lookups in select_queries
+against building and compiling the same Query objects on every call,
+as those functions did before. Looks up the first content piece and
+user in the database, so run it against a populated test database:
+
+    python -m Knowledge_Database_App.tests.storage.benchmark_select_queries
+"""
+
+import sys
+from timeit import default_timer
+
+from sqlalchemy.orm import subqueryload
+
+from Knowledge_Database_App.storage import select_queries as select
+from Knowledge_Database_App.storage import orm_core as orm
+
+
+CALLS = 1000
+
+
+def get_content_piece_unbaked(content_id, session):
+    return session.query(orm.ContentPiece).options(
+        subqueryload(orm.ContentPiece.first_author),
+        subqueryload(orm.ContentPiece.authors),
+        subqueryload(orm.ContentPiece.content_type),
+        subqueryload(orm.ContentPiece.name),
+        subqueryload(orm.ContentPiece.alternate_names),
+        subqueryload(orm.ContentPiece.text),
+        subqueryload(orm.ContentPiece.keywords)).filter(
+        orm.ContentPiece.content_id == content_id).one()
+
+
+def get_names_unbaked(content_id, session):
+    return session.query(orm.Name).join(
+        orm.ContentPiece, orm.Name.piece_).filter(
+        orm.ContentPiece.content_id == content_id).one()
+
+
+def get_author_count_unbaked(content_id, session):
+    return session.query(orm.ContentPiece.authors).filter(
+        orm.ContentPiece.content_id == content_id).count()
+
+
+def get_user_unbaked(user_id, session):
+    return session.query(orm.User).filter(
+        orm.User.user_id == user_id).one()
+
+
+def get_user_info_unbaked(user_id, session):
+    return session.query(orm.User.user_id, orm.User.user_name,
+                         orm.User.email).filter(
+        orm.User.user_id == user_id).one()
+
+
+def time_calls(function, calls, session, **kwargs):
+    start = default_timer()
+    for i in range(calls):
+        function(session=session, **kwargs)
+        # Keep the identity map from short-circuiting later calls.
+        session.expunge_all()
+    return (default_timer() - start) / calls
+
+
+def run(calls=CALLS):
+    """
+    Args:
+        calls: Integer. Defaults to CALLS.
+    Returns:
+        Dictionary of the form
+        {function name: (unbaked seconds per call,
+                         baked seconds per call), ...}.
+    """
+    session = orm.start_session()
+    results = {}
+    try:
+        content_id = session.query(orm.ContentPiece.content_id).filter(
+            orm.ContentPiece.deleted_timestamp == None).first()[0]
+        user_id = session.query(orm.User.user_id).first()[0]
+        benchmarks = [
+            ("get_content_piece", get_content_piece_unbaked,
+             select.get_content_piece, {"content_id": content_id}),
+            ("get_names", get_names_unbaked,
+             select.get_names, {"content_id": content_id}),
+            ("get_author_count", get_author_count_unbaked,
+             select.get_author_count, {"content_id": content_id}),
+            ("get_user", get_user_unbaked,
+             select.get_user, {"user_id": user_id}),
+            ("get_user_info", get_user_info_unbaked,
+             select.get_user_info, {"user_id": user_id}),
+        ]
+        for name, unbaked, baked, kwargs in benchmarks:
+            # Warm up both paths so the bakery holds the statement.
+            unbaked(session=session, **kwargs)
+            baked(session=session, **kwargs)
+            results[name] = (time_calls(unbaked, calls, session, **kwargs),
+                             time_calls(baked, calls, session, **kwargs))
+    finally:
+        session.rollback()
+        session.close()
+    return results
+
+
+if __name__ == "__main__":
+    calls = int(sys.argv[1]) if len(sys.argv) > 1 else CALLS
+    print("{:>18} {:>14} {:>14} {:>8}".format(
+        "function", "unbaked (us)", "baked (us)", "speedup"))
+    for name, (unbaked_time, baked_time) in sorted(run(calls).items()):
+        print("{:>18} {:>14.1f} {:>14.1f} {:>7.1f}x".format(
+            name, unbaked_time * 1e6, baked_time * 1e6,
+            unbaked_time / baked_time))
@@ -35,6 +35,40 @@ class ActionQueryTest(PostgresTest, StorageTest):
         yield
         self.session.rollback()
     
+    def test_store_keywords(self):
+        timestamp = datetime.utcnow()
+        keyword_strings = ["sith", "Jedi Order", "sith", "lightsaber"]
+        try:
+            keywords = self.call(action.store_keywords, keyword_strings,
+                                 timestamp)
+            stored_again = self.call(action.store_keywords, keyword_strings,
+                                     timestamp)
+        except Exception as e:
+            self.fail(str(e))
+        else:
+            self.assertEqual([keyword.keyword for keyword in keywords],
+                             ["sith", "Jedi Order", "lightsaber"])
+            self.assertEqual([keyword.keyword_id for keyword in keywords],
+                             [keyword.keyword_id for keyword in stored_again])
+            self.assertEqual(self.session.query(orm.Keyword).filter(
+                orm.Keyword.keyword.in_(keyword_strings)).count(), 3)
+
+    def test_store_citations(self):
+        timestamp = datetime.utcnow()
+        citation_strings = ["Lucas, George. Star Wars: " +
+                            "Revenge of the Sith. 2003.",
+                            "Lucas, George. Star Wars: A New Hope. 1977."]
+        try:
+            citations = self.call(action.store_citations, citation_strings,
+                                  timestamp)
+        except Exception as e:
+            self.fail(str(e))
+        else:
+            self.assertEqual([citation.citation_text for citation in citations],
+                             citation_strings)
+            self.assertEqual(self.session.query(orm.Citation).filter(
+                orm.Citation.citation_text.in_(citation_strings)).count(), 2)
+
     def test_store_content_piece(self):
         timestamp = datetime.utcnow()
         try:
@@ -164,29 +198,30 @@ class ActionQueryTest(PostgresTest, StorageTest):
     def test_store_accepted_edit(self):
         timestamp = datetime.utcnow()
         try:
-            self.call(action.store_accepted_edit, self.test_data["redis_edit_id"], 
+            edit_id = self.call(action.store_accepted_edit,
+                self.test_data["redis_edit_id"],
                 self.test_data["edit_text"], self.test_data["applied_edit_text"], 
                 self.test_data["edit_rationale"], "name", 
                 self.test_data["name_id"], self.test_data["content_id"], 
-                self.test_data["vote_string"], self.test_data["voter_ids"], 
+                self.test_data["votes"], 
                 timestamp, timestamp, timestamp, "U", self.test_data["user_id"])
             self.call(action.store_accepted_edit, self.test_data["redis_edit_id"]-1,
                 self.test_data["edit_text"], self.test_data["applied_edit_text"], 
                 self.test_data["edit_rationale"], "text", 
                 self.test_data["text_id"], self.test_data["content_id"],
-                self.test_data["vote_string"], self.test_data["voter_ids"],
+                self.test_data["votes"],
                 timestamp, timestamp, timestamp, "U", self.test_data["user_id"])
             self.call(action.store_accepted_edit, self.test_data["redis_edit_id"]-2,
                 self.test_data["edit_text"], self.test_data["applied_edit_text"], 
                 self.test_data["edit_rationale"], "keyword", 
                 self.test_data["keyword_id"], self.test_data["content_id"], 
-                self.test_data["vote_string"], self.test_data["voter_ids"], 
+                self.test_data["votes"], 
                 timestamp, timestamp, timestamp, "U", self.test_data["user_id"])
             self.call(action.store_accepted_edit, self.test_data["redis_edit_id"]-3,
                 self.test_data["edit_text"], self.test_data["applied_edit_text"], 
                 self.test_data["edit_rationale"], "citation", 
                 self.test_data["citation_id"], self.test_data["content_id"], 
-                self.test_data["vote_string"], self.test_data["voter_ids"], 
+                self.test_data["votes"], 
                 timestamp, timestamp, timestamp, "U", self.test_data["user_id"])
         except Exception as e:
             self.fail(str(e))
@@ -207,6 +242,17 @@ class ActionQueryTest(PostgresTest, StorageTest):
                           [edit.edit_text for edit in keyword_accepted_edits])
             self.assertIn(self.test_data["edit_text"],
                           [edit.edit_text for edit in citation_accepted_edits])
+            tallies = select.get_vote_tallies("accepted", edit_ids=[edit_id],
+                                              session=self.session)
+            self.assertEqual(tallies[0][:3],
+                (edit_id, len(self.test_data["votes"]), 0))
+            vote_id = select.get_accepted_votes(
+                edit_id=edit_id, session=self.session).vote_id
+            voter_votes = select.get_voter_votes([vote_id],
+                                                 session=self.session)
+            self.assertEqual(
+                sorted(row[1:] for row in voter_votes),
+                sorted(self.test_data["votes"]))
     
     def test_store_rejected_edit(self):
         timestamp = datetime.utcnow()
@@ -214,22 +260,22 @@ class ActionQueryTest(PostgresTest, StorageTest):
             self.call(action.store_rejected_edit, self.test_data["redis_edit_id"]-4,
                 self.test_data["edit_text"], self.test_data["edit_rationale"], 
                 "name", self.test_data["name_id"], self.test_data["content_id"],
-                self.test_data["vote_string"], self.test_data["voter_ids"],
+                self.test_data["votes"],
                 timestamp, timestamp, "U", self.test_data["user_id"])
             self.call(action.store_rejected_edit, self.test_data["redis_edit_id"]-5,
                 self.test_data["edit_text"], self.test_data["edit_rationale"], 
                 "text", self.test_data["text_id"], self.test_data["content_id"],
-                self.test_data["vote_string"], self.test_data["voter_ids"],
+                self.test_data["votes"],
                 timestamp, timestamp, "U", self.test_data["user_id"])
             self.call(action.store_rejected_edit, self.test_data["redis_edit_id"]-6,
                 self.test_data["edit_text"], self.test_data["edit_rationale"], 
                 "keyword", self.test_data["keyword_id"], self.test_data["content_id"],
-                self.test_data["vote_string"], self.test_data["voter_ids"],
+                self.test_data["votes"],
                 timestamp, timestamp, "U", self.test_data["user_id"])
             self.call(action.store_rejected_edit, self.test_data["redis_edit_id"]-7,
                 self.test_data["edit_text"], self.test_data["edit_rationale"], 
                 "citation", self.test_data["citation_id"], self.test_data["content_id"],
-                self.test_data["vote_string"], self.test_data["voter_ids"],
+                self.test_data["votes"],
                 timestamp, timestamp, "U", self.test_data["user_id"])
         except Exception as e:
             self.fail(str(e))
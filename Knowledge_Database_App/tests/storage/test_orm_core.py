@@ -1,8 +1,14 @@
 
-from unittest import TestCase
+import os
+from unittest import TestCase, skipUnless
+from datetime import datetime
+from threading import Thread
+
+from sqlalchemy import event
 
 import Knowledge_Database_App.storage.orm_core as orm
-from . import StorageTest
+from Knowledge_Database_App.storage import action_queries, select_queries
+from . import StorageTest, PostgresTest
 
 
 class ORMTest(TestCase, StorageTest):
@@ -18,3 +24,181 @@ class ORMTest(TestCase, StorageTest):
             orm._create_schema()
         except Exception as e:
             self.fail(str(e))
+
+
+class UnitOfWorkTest(PostgresTest):
+
+    def test_shared_session(self):
+        handler = orm.StorageHandler()
+        sessions = []
+        with orm.unit_of_work() as session:
+            self.assertIs(handler.session, session)
+            with orm.unit_of_work() as inner_session:
+                self.assertIs(inner_session, session)
+            thread = Thread(target=lambda: sessions.append(handler.session))
+            thread.start()
+            thread.join()
+        self.assertIsNot(sessions[0], session)
+        self.assertIsNot(handler.session, session)
+
+    def test_rollback(self):
+        handler = orm.StorageHandler()
+        email = "unit.of.work@empire.gov"
+        try:
+            with orm.unit_of_work():
+                handler.call(action_queries.store_new_user, "standard",
+                             "Tarkin", email, "12345", "MD5", "123", -4242,
+                             datetime.utcnow())
+                raise RuntimeError("Abort the unit of work.")
+        except RuntimeError:
+            pass
+        session = orm.start_session()
+        try:
+            self.assertIsNone(session.query(orm.User.user_id).filter(
+                orm.User.email == email).first())
+        finally:
+            session.close()
+
+    def test_on_commit(self):
+        called = []
+        with orm.unit_of_work():
+            orm.on_commit(lambda: called.append("committed"))
+            self.assertEqual(called, [])
+        self.assertEqual(called, ["committed"])
+        try:
+            with orm.unit_of_work():
+                orm.on_commit(lambda: called.append("rolled back"))
+                raise RuntimeError("Abort the unit of work.")
+        except RuntimeError:
+            pass
+        self.assertEqual(called, ["committed"])
+        orm.on_commit(lambda: called.append("no unit of work"))
+        self.assertEqual(called, ["committed", "no unit of work"])
+
+
+# URL of a second local Postgres instance acting as a read replica.
+REPLICA_URL = os.environ.get("KDB_REPLICA_URL")
+
+
+@skipUnless(REPLICA_URL, "KDB_REPLICA_URL is not set.")
+class ReplicaRoutingTest(PostgresTest):
+
+    def setUp(self):
+        orm.set_replicas([REPLICA_URL])
+
+    def tearDown(self):
+        orm.set_replicas(orm.KDB_replica_urls)
+
+    def test_routing(self):
+        handler = orm.StorageHandler()
+        try:
+            with orm.unit_of_work() as session:
+                self.assertIn(session.get_bind(), orm.replica_engines)
+                handler.call(select_queries.get_content_types)
+                self.assertIn(session.get_bind(), orm.replica_engines)
+                handler.call(action_queries.store_new_user, "standard",
+                             "Krennic", "krennic@empire.gov", "12345", "MD5",
+                             "123", -4343, datetime.utcnow())
+                self.assertIs(session.get_bind(), orm.engine)
+                user_id = handler.call(select_queries.get_user,
+                                       email="krennic@empire.gov").user_id
+                self.assertIsNotNone(user_id)
+                self.assertIs(session.get_bind(), orm.engine)
+                raise RuntimeError("Roll back the stored user.")
+        except RuntimeError:
+            pass
+        with orm.unit_of_work() as session:
+            self.assertIn(session.get_bind(), orm.replica_engines)
+
+
+class QueryPlanTest(PostgresTest, StorageTest):
+    """
+    Fails if one of the hot listing queries is not answered with the
+    index added for it. Sequential scans are disabled for the test
+    session, so the planner falls back to one only if no index fits
+    the query, and a scan of another index, like the primary key's,
+    fails too.
+    """
+
+    def __init__(self, *args, **kwargs):
+        PostgresTest.__init__(self, *args, **kwargs)
+        StorageTest.__init__(self)
+
+    def setUp(self):
+        self.setup()
+
+    def tearDown(self):
+        self.teardown()
+
+    def get_plans(self, function, *args, **kwargs):
+        statements = []
+
+        def capture(connection, cursor, statement, parameters,
+                    context, executemany):
+            statements.append((statement, parameters))
+
+        event.listen(orm.engine, "before_cursor_execute", capture)
+        try:
+            self.call(function, *args, **kwargs)
+        finally:
+            event.remove(orm.engine, "before_cursor_execute", capture)
+        cursor = self.session.connection().connection.cursor()
+        # Set here rather than in setUp, as self.call commits, which
+        # would end a SET LOCAL made before it.
+        cursor.execute("SET LOCAL enable_seqscan = off")
+        plans = []
+        for statement, parameters in statements:
+            cursor.execute("EXPLAIN " + statement, parameters)
+            plans.append("\n".join(row[0] for row in cursor.fetchall()))
+        return plans
+
+    def assertUsesIndex(self, table_name, index_name, function,
+                        *args, **kwargs):
+        plans = self.get_plans(function, *args, **kwargs)
+        for plan in plans:
+            for line in plan.splitlines():
+                if "Seq Scan" in line and table_name in line:
+                    self.fail("Sequential scan on " + table_name
+                              + ":\n" + plan)
+        if not any(index_name in plan for plan in plans):
+            self.fail(index_name + " not used:\n" + "\n\n".join(plans))
+
+    def test_content_piece_listings(self):
+        self.assertUsesIndex("Content_Piece", "ix_Content_Piece_live_timestamp",
+                             select_queries.get_content_pieces,
+                             sort="created_at", page_num=1)
+        self.assertUsesIndex("Content_Piece",
+                             "ix_Content_Piece_live_last_edited_timestamp",
+                             select_queries.get_content_pieces,
+                             sort="last_edited_at", page_num=1)
+
+    def test_edit_history(self):
+        content_id = self.test_data["content_id"]
+        user_id = self.test_data["user_id"]
+        for table_name, validated, function in (
+                ("Accepted_Edit", "acc_timestamp",
+                 select_queries.get_accepted_edits),
+                ("Rejected_Edit", "rej_timestamp",
+                 select_queries.get_rejected_edits)):
+            prefix = "ix_" + table_name + "_"
+            self.assertUsesIndex(table_name,
+                                 prefix + "content_id_" + validated,
+                                 function, content_id=content_id,
+                                 order_by="validated_at", page_num=1,
+                                 per_page=20)
+            self.assertUsesIndex(table_name,
+                                 prefix + "author_id_" + validated,
+                                 function, user_id=user_id,
+                                 order_by="validated_at", page_num=1,
+                                 per_page=20)
+            self.assertUsesIndex(table_name, prefix + "text_id", function,
+                                 text_id=self.test_data["text_id"])
+            self.assertUsesIndex(table_name, prefix + "keyword_id", function,
+                                 keyword_id=self.test_data["keyword_id"])
+            self.assertUsesIndex(table_name, prefix + "ip_author_type",
+                                 function, ip_address="127.0.0.1")
+            self.assertUsesIndex(table_name,
+                                 prefix + "content_id_" + validated,
+                                 select_queries.get_edit_timeline,
+                                 content_ids=[content_id], user_id=user_id,
+                                 limit=20)
@@ -6,10 +6,13 @@ tests. Currently primarily checks only core functionality of all
 functions, not exceptional cases.
 """
 
+import io
+import json
 from unittest import TestCase
 
 import Knowledge_Database_App.storage.select_queries as select
 import Knowledge_Database_App.storage.orm_core as orm
+from Knowledge_Database_App.storage.export import export_history
 from . import StorageTest, PostgresTest
 
 
@@ -66,6 +69,32 @@ class SelectQueryTest(PostgresTest, StorageTest):
                 self.assertIsInstance(content_piece, orm.ContentPiece)
                 self.assertEqual(content_piece.content_id, id_)
 
+    def test_get_content_pieces(self):
+        id_ = self.session.query(orm.ContentPiece.content_id).first()
+        if not id_:
+            return
+        else:
+            try:
+                first_page = self.call(select.get_content_pieces,
+                                       page_num=1, per_page=2)
+                last_piece = first_page[-1]
+                cursor = select.encode_cursor(
+                    (last_piece.timestamp, last_piece.content_id))
+                after = select.decode_cursor(cursor)
+                second_page = self.call(select.get_content_pieces,
+                                        per_page=2, after=after)
+                offset_page = self.call(select.get_content_pieces,
+                                        page_num=2, per_page=2)
+            except Exception as e:
+                self.fail(str(e))
+            else:
+                self.assertEqual(after,
+                    (last_piece.timestamp, last_piece.content_id))
+                self.assertIsInstance(first_page[-1], orm.ContentPiece)
+                self.assertEqual(
+                    [piece.content_id for piece in second_page],
+                    [piece.content_id for piece in offset_page])
+
     def test_get_alternate_names(self):
         id_ = self.session.query(orm.ContentPiece.content_id).first()
         if not id_:
@@ -164,6 +193,35 @@ class SelectQueryTest(PostgresTest, StorageTest):
                     if results[i]:
                         self.assertIsInstance(results[i][-1], orm.AcceptedEdit)
 
+    def test_get_accepted_edits_paged(self):
+        id_ = self.session.query(orm.AcceptedEdit.content_id).first()
+        if not id_:
+            return
+        else:
+            try:
+                edit_count = self.call(select.get_accepted_edits,
+                                       content_id=id_, count_only=True)
+                all_edits = self.call(select.get_accepted_edits,
+                                      content_id=id_, order_by="validated_at")
+                first_page = self.call(select.get_accepted_edits,
+                                       content_id=id_, order_by="validated_at",
+                                       page_num=1, per_page=1)
+                second_page = self.call(select.get_accepted_edits,
+                    content_id=id_, order_by="validated_at",
+                    per_page=1, after=(first_page[-1].acc_timestamp,
+                                       first_page[-1].edit_id))
+            except Exception as e:
+                self.fail(str(e))
+            else:
+                self.assertIsInstance(edit_count, int)
+                self.assertEqual(edit_count, len(all_edits))
+                self.assertEqual(first_page[0].edit_id, all_edits[0].edit_id)
+                if len(all_edits) > 1:
+                    self.assertEqual(second_page[0].edit_id,
+                                     all_edits[1].edit_id)
+                else:
+                    self.assertEqual(second_page, [])
+
     def test_get_rejected_edits(self):
         ids = self.get_sample_ids()
         if not ids:
@@ -196,6 +254,27 @@ class SelectQueryTest(PostgresTest, StorageTest):
                     if results[i]:
                         self.assertIsInstance(results[i][-1], orm.RejectedEdit)
 
+    def test_get_edit_timeline(self):
+        ids = self.get_sample_ids()
+        if not ids:
+            return
+        else:
+            try:
+                timeline = self.call(select.get_edit_timeline,
+                                     content_ids=[ids["content_id"]],
+                                     user_id=ids["user_id"], limit=5)
+            except Exception as e:
+                self.fail(str(e))
+            else:
+                self.assertIsInstance(timeline, list)
+                self.assertLessEqual(len(timeline), 5)
+                timestamps = [edit.validated_timestamp for edit in timeline]
+                self.assertEqual(timestamps,
+                                 sorted(timestamps, reverse=True))
+                for edit in timeline:
+                    self.assertIn(edit.validation_status,
+                                  ["accepted", "rejected"])
+
     def test_user_votes(self):
         id_ = self.session.query(orm.User.user_id).first()
         if not id_:
@@ -308,6 +387,29 @@ class SelectQueryTest(PostgresTest, StorageTest):
                 self.assertEqual(user_from_email, user_from_remember)
                 self.assertEqual(user_from_remember, user_from_id)
 
+    def test_get_names_and_user_info(self):
+        ids = self.get_sample_ids()
+        if not ids:
+            return
+        else:
+            try:
+                name = self.call(select.get_names,
+                                 content_id=ids["content_id"])
+                names = self.call(select.get_names,
+                                  content_ids=[ids["content_id"]])
+                info = self.call(select.get_user_info,
+                                 user_id=ids["user_id"])
+                infos = self.call(select.get_user_info,
+                                  user_ids=[ids["user_id"]])
+            except Exception as e:
+                self.fail(str(e))
+            else:
+                self.assertIsInstance(name, orm.Name)
+                self.assertEqual([name], names)
+                self.assertEqual(info[0], ids["user_id"])
+                self.assertEqual([tuple(info)],
+                                 [tuple(row) for row in infos])
+
     def test_get_user_emails(self):
         ids = self.get_sample_ids()
         if not ids:
@@ -357,3 +459,39 @@ class SelectQueryTest(PostgresTest, StorageTest):
                     else:
                         self.assertIsInstance(results[i], list)
                         self.assertIsInstance(results[i][-1], orm.UserReport)
+
+    def test_stream_history(self):
+        try:
+            rows = list(self.call(select.stream_history, "accepted_edit",
+                                  batch_size=2))
+        except Exception as e:
+            self.fail(str(e))
+        else:
+            edit_ids = [edit_id for edit_id, in self.session.query(
+                orm.AcceptedEdit.edit_id).order_by(orm.AcceptedEdit.edit_id)]
+            self.assertEqual([row["edit_id"] for row in rows], edit_ids)
+            if rows:
+                self.assertIn("acc_timestamp", rows[-1])
+
+    def test_export_user_votes(self):
+        output = io.StringIO()
+        try:
+            row_count = self.call(export_history, "user_votes", output,
+                                  batch_size=2)
+        except Exception as e:
+            self.fail(str(e))
+        else:
+            voter_rows = [{"vote_id": vote_id, "user_id": user_id,
+                           "vote": vote, "timestamp": str(timestamp)}
+                          for vote_id, user_id, vote, timestamp
+                          in self.session.query(
+                              orm.user_votes.c.vote_id,
+                              orm.user_votes.c.user_id,
+                              orm.user_votes.c.vote,
+                              orm.user_votes.c.timestamp).order_by(
+                              orm.user_votes.c.vote_id,
+                              orm.user_votes.c.user_id)]
+            exported_rows = [json.loads(line) for line
+                             in output.getvalue().splitlines()]
+            self.assertEqual(row_count, len(voter_rows))
+            self.assertEqual(exported_rows, voter_rows)
@@ -8,6 +8,7 @@ Functions:
 
 from pyramid.config import Configurator
 from pyramid.authorization import ACLAuthorizationPolicy
+from pyramid.tweens import EXCVIEW, MAIN
 
 from Knowledge_Database_App.storage import exceptions as storage_except
 from Knowledge_Database_App.content import exceptions as content_except
@@ -38,6 +39,10 @@ def main(global_config, **settings):
     config.set_authorization_policy(authorization_policy)
     config.include("pyramid_jinja2")
     config.include("pyramid_redis_sessions")
+    # Placed under the exception view tween, so that requests whose
+    # views raise are rolled back before the exception is rendered.
+    config.add_tween("Knowledge_Database_App.web_api.web_api.tweens."
+                     "unit_of_work_tween_factory", over=MAIN, under=EXCVIEW)
 
     config.add_static_view("static", "static")
     config.add_route("home", "/home")
@@ -77,6 +77,8 @@ def get_content_data(request):
         "citations": request.params.getone("citations"),
         "submit": request.params.getone("submit") or False,
         "page_num": request.params.getone("page_num"),
+        "after": request.params.getone("after"),
+        "cursor": request.params.getone("cursor") or False,
         "validating_page_num": request.params.getone("validating_page_num"),
         "closed_page_num": request.params.getone("closed_page_num")
     }
@@ -0,0 +1,22 @@
+"""
+Tweens wrapping the handling of every request.
+
+Functions:
+
+    unit_of_work_tween_factory
+"""
+
+from Knowledge_Database_App.storage import orm_core as orm
+
+
+def unit_of_work_tween_factory(handler, registry):
+    """
+    Runs each request in its own storage unit of work, so all of its
+    queries share one session and transaction, committed once after
+    the view returns and rolled back if it raises.
+    """
+    def unit_of_work_tween(request):
+        with orm.unit_of_work():
+            return handler(request)
+
+    return unit_of_work_tween
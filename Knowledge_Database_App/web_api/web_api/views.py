@@ -316,27 +316,39 @@ class ContentResourceView:
             or self.request.matchdict.get("content_type")
             or self.request.matchdict.get("name")
             or self.request.matchdict.get("citation"))
+        next_after = None
         if self.request.matchdict.get("sort"):
-            content_pieces = ContentView.bulk_retrieve(
+            content_pieces, next_after = ContentView.bulk_retrieve(
                 sort=self.request.matchdict.get("sort"),
-                page_num=self.request.data["page_num"]
+                page_num=self.request.data["page_num"],
+                after=self.request.data["after"],
+                return_cursor=True
             )
         elif content_part:
-            content_pieces = ContentView.bulk_retrieve(
+            content_pieces, next_after = ContentView.bulk_retrieve(
                 sort=self.request.matchdict.get("sort"),
                 content_part=content_part,
-                page_num=self.request.data["page_num"]
+                page_num=self.request.data["page_num"],
+                after=self.request.data["after"],
+                return_cursor=True
             )
         elif self.request.matchdict.get("q"):
-            content_pieces = ContentView.search(
+            content_pieces, next_after = ContentView.search(
                 query=self.request.matchdict["q"],
                 page_num=self.request.data["page_num"],
+                after=self.request.data["after"],
+                return_cursor=True,
+                cursor=bool(self.request.data["cursor"])
             )
         else:
-            content_pieces = ContentView.bulk_retrieve(
-                page_num=self.request.data["page_num"])
+            content_pieces, next_after = ContentView.bulk_retrieve(
+                page_num=self.request.data["page_num"],
+                after=self.request.data["after"],
+                return_cursor=True
+            )
         return {
             "data": content_pieces,
+            "after": next_after,
             "links": {
                 "came_from": self.came_from,
                 "url": self.url,